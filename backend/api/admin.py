@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Dataset, EquipmentData
+from .models import Dataset, EquipmentData, UploadJob, UploadSession
 
 @admin.register(Dataset)
 class DatasetAdmin(admin.ModelAdmin):
@@ -11,4 +11,16 @@ class DatasetAdmin(admin.ModelAdmin):
 class EquipmentDataAdmin(admin.ModelAdmin):
     list_display = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
     list_filter = ['equipment_type']
-    search_fields = ['equipment_name']
\ No newline at end of file
+    search_fields = ['equipment_name']
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'rows_processed', 'deduplicated', 'created_at', 'finished_at']
+    list_filter = ['status', 'deduplicated']
+    search_fields = ['filename', 'content_hash']
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'offset', 'size', 'created_at', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['filename']
@@ -0,0 +1,77 @@
+import math
+from .stats import PARAMETERS
+from .storage import get_storage
+
+# Per-parameter statistics returned by /api/dataset/<pk>/aggregates/
+AGGREGATE_STATS = ('count', 'mean', 'min', 'max')
+
+
+def finite(value):
+    """JSON-safe number: None instead of NaN or infinity."""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def parameter_stats(stats):
+    return {name: finite(stats.get(name)) if name != 'count' else int(stats.get('count') or 0)
+            for name in AGGREGATE_STATS}
+
+
+def from_summary(summary_stats):
+    """Per-type aggregates from the statistics computed at ingest, or None for older datasets."""
+    by_type = summary_stats.get('by_type')
+    if by_type is None:
+        return None
+    return [
+        {
+            'equipment_type': eq_type,
+            'count': stats['count'],
+            **{field: parameter_stats(stats.get(field, {})) for field in PARAMETERS.values()},
+        }
+        for eq_type, stats in by_type.items()
+    ]
+
+
+def combine(types):
+    """Whole-dataset aggregates from per-type ones."""
+    overall = {'count': sum(entry['count'] for entry in types)}
+    for field in PARAMETERS.values():
+        stats = [entry[field] for entry in types if entry[field]['count']]
+        count = sum(s['count'] for s in stats)
+        overall[field] = {
+            'count': count,
+            'mean': finite(sum(s['mean'] * s['count'] for s in stats) / count) if count else None,
+            'min': min((s['min'] for s in stats), default=None),
+            'max': max((s['max'] for s in stats), default=None),
+        }
+    return overall
+
+
+def dataset_aggregates(dataset):
+    """Count/mean/min/max of every parameter per equipment type, largest types first.
+
+    Datasets ingested with per-type statistics are answered from
+    summary_stats without reading any records; older ones fall back to a
+    single GROUP BY in the dataset's storage engine.
+    """
+    types = from_summary(dataset.summary_stats or {})
+    source = 'summary'
+    if types is None:
+        fields = list(PARAMETERS.values())
+        types = [
+            {**entry, **{field: parameter_stats(entry[field]) for field in fields}}
+            for entry in get_storage(dataset).aggregate_by_type(dataset, fields)
+        ]
+        source = 'group_by'
+    types.sort(key=lambda entry: (-entry['count'], entry['equipment_type']))
+
+    return {
+        'dataset_id': dataset.pk,
+        'row_count': dataset.row_count,
+        'parameters': list(PARAMETERS.values()),
+        'source': source,
+        'overall': combine(types),
+        'types': types,
+    }
@@ -2,4 +2,27 @@ from django.apps import AppConfig
 
 
 class ApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+        from .cache import invalidate_dataset_on_commit
+        from .db import configure_sqlite
+        from .models import Dataset
+        from .reports import delete_report_file
+        from .storage import delete_data_file
+
+        # Cached API responses are dropped whenever a dataset is created or deleted
+        post_save.connect(invalidate_dataset_on_commit, sender=Dataset, dispatch_uid='api-cache-save')
+        post_delete.connect(invalidate_dataset_on_commit, sender=Dataset, dispatch_uid='api-cache-delete')
+
+        # Rendered PDF reports are removed from disk along with their dataset
+        post_delete.connect(delete_report_file, sender=Dataset, dispatch_uid='api-report-delete')
+
+        # Parquet data files go with their dataset too
+        post_delete.connect(delete_data_file, sender=Dataset, dispatch_uid='api-data-file-delete')
+
+        # WAL and cache PRAGMAs on every SQLite connection
+        connection_created.connect(configure_sqlite, dispatch_uid='api-sqlite-pragmas')
@@ -0,0 +1,127 @@
+import hashlib
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from .compression import BROTLI, GZIP, ZSTD, compress_bytes, negotiate_encoding, response_min_size
+
+# Alias of the cache in settings.CACHES that holds rendered API responses
+CACHE_ALIAS = 'api'
+
+HISTORY_GENERATION_KEY = 'history:generation'
+
+# Every ?records= / ?layout= combination a dataset payload can be rendered in
+DATASET_VARIANTS = [
+    (records, layout) for records in (True, False) for layout in ('nested', 'columnar')
+]
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def dataset_key(dataset_id, records, layout):
+    return f"dataset:{dataset_id}:records={int(records)}:layout={layout}"
+
+
+def aggregates_key(dataset_id):
+    return f"aggregates:{dataset_id}"
+
+
+def series_key(dataset, param, method, points):
+    # Not invalidated explicitly: a dataset's records never change, a deleted
+    # dataset 404s before its series is looked up, and the upload time keeps
+    # a reused id (e.g. after a rolled-back insert) from hitting a stale entry
+    return f"series:{dataset.pk}:{dataset.upload_date.timestamp()}:{param}:{method}:{points}"
+
+
+def compare_key(base, other, limit):
+    # Ordered pair; not invalidated explicitly, for the same reasons as series_key
+    return (f"compare:{base.pk}:{base.upload_date.timestamp()}:"
+            f"{other.pk}:{other.upload_date.timestamp()}:limit={limit}")
+
+
+def encoded_key(key, encoding):
+    return f"{key}:encoding={encoding}"
+
+
+def history_key():
+    generation = get_cache().get_or_set(HISTORY_GENERATION_KEY, 0, timeout=None)
+    return f"history:{generation}"
+
+
+def cached_json_response(request, key, build):
+    """Serve JSON bytes from the cache, calling build() on a miss.
+
+    build() returns (body_bytes, last_modified_datetime_or_None). The stored
+    entry carries a strong ETag of the body, so repeat requests with
+    If-None-Match (or If-Modified-Since) get a 304 without touching the body.
+    """
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        body, last_modified = build()
+        entry = {
+            'body': body,
+            'etag': quote_etag(hashlib.sha1(body).hexdigest()),
+            'last_modified': int(last_modified.timestamp()) if last_modified else None,
+        }
+        cache.set(key, entry)
+
+    encoding = None
+    if len(entry['body']) >= response_min_size():
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    etag = 'W/' + entry['etag'] if encoding else entry['etag']
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=entry['last_modified']
+    )
+    if response is None:
+        if encoding:
+            response = HttpResponse(encoded_body(key, entry, encoding), content_type='application/json')
+            response['Content-Encoding'] = encoding
+        else:
+            response = HttpResponse(entry['body'], content_type='application/json')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['ETag'] = etag
+    if entry['last_modified'] is not None:
+        response['Last-Modified'] = http_date(entry['last_modified'])
+    return response
+
+
+def encoded_body(key, entry, encoding):
+    """The entry's body compressed with encoding, compressing it on first use."""
+    cache = get_cache()
+    cached = cache.get(encoded_key(key, encoding))
+    # Checking the ETag guards against a variant left over from an older body
+    if cached is not None and cached[0] == entry['etag']:
+        return cached[1]
+    body = compress_bytes(entry['body'], encoding)
+    cache.set(encoded_key(key, encoding), (entry['etag'], body))
+    return body
+
+
+def invalidate_dataset(dataset_id):
+    """Drop every cached payload of a dataset, its aggregates and the cached history list."""
+    cache = get_cache()
+    keys = [dataset_key(dataset_id, records, layout) for records, layout in DATASET_VARIANTS]
+    keys.append(aggregates_key(dataset_id))
+    cache.delete_many(keys + [encoded_key(key, encoding) for key in keys for encoding in (GZIP, BROTLI, ZSTD)])
+    invalidate_history()
+
+
+def invalidate_history():
+    cache = get_cache()
+    cache.get_or_set(HISTORY_GENERATION_KEY, 0, timeout=None)
+    cache.incr(HISTORY_GENERATION_KEY)
+
+
+def invalidate_dataset_on_commit(sender, instance, **kwargs):
+    """Signal receiver: invalidate once the surrounding transaction has committed.
+
+    Invalidating earlier would let a concurrent request re-cache the
+    pre-commit state under the new history generation.
+    """
+    dataset_id = instance.pk
+    transaction.on_commit(lambda: invalidate_dataset(dataset_id))
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from .aggregates import dataset_aggregates, finite
+from .stats import PARAMETERS
+from .storage import get_storage
+
+# ?limit= bounds for the added/removed/changed equipment lists of /api/compare/
+DEFAULT_COMPARE_LIMIT = 100
+MAX_COMPARE_LIMIT = 10000
+
+
+def delta(base, other):
+    return finite(other - base) if base is not None and other is not None else None
+
+
+def compare_types(base, other):
+    """Per-type count and parameter mean deltas, from each dataset's aggregates."""
+    base_types = {entry['equipment_type']: entry for entry in dataset_aggregates(base)['types']}
+    other_types = {entry['equipment_type']: entry for entry in dataset_aggregates(other)['types']}
+    empty = {'count': 0, **{field: {'mean': None} for field in PARAMETERS.values()}}
+
+    types = []
+    for eq_type in base_types.keys() | other_types.keys():
+        before = base_types.get(eq_type, empty)
+        after = other_types.get(eq_type, empty)
+        types.append({
+            'equipment_type': eq_type,
+            'base_count': before['count'],
+            'other_count': after['count'],
+            'count_delta': after['count'] - before['count'],
+            **{
+                field: {
+                    'base_mean': before[field]['mean'],
+                    'other_mean': after[field]['mean'],
+                    'delta': delta(before[field]['mean'], after[field]['mean']),
+                }
+                for field in PARAMETERS.values()
+            },
+        })
+    types.sort(key=lambda entry: (-max(entry['base_count'], entry['other_count']), entry['equipment_type']))
+    return types
+
+
+def read_equipment(dataset):
+    """One row per equipment name; for repeated names the last record wins."""
+    fields = ['equipment_name', 'equipment_type', *PARAMETERS.values()]
+    frame = get_storage(dataset).read_frame(dataset, fields)
+    frame = frame.astype({field: float for field in PARAMETERS.values()})
+    repeated = frame['equipment_name'].duplicated(keep='last').to_numpy()
+    return frame[~repeated], int(np.count_nonzero(repeated))
+
+
+def differs(before, after):
+    """Elementwise before != after, treating two missing values as equal."""
+    return ~((before == after) | (pd.isna(before) & pd.isna(after)))
+
+
+def to_records(frame):
+    """JSON-safe list of dicts, with None for missing values."""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def compare_equipment(base, other, limit):
+    """Added, removed and changed equipment between two datasets, joined on equipment_name.
+
+    Both datasets are read as DataFrames and matched with a single outer
+    merge; every comparison is a vectorized column operation. Only the first
+    `limit` names (alphabetically) of each list are turned into dicts.
+    """
+    before, base_duplicates = read_equipment(base)
+    after, other_duplicates = read_equipment(other)
+    merged = before.merge(after, on='equipment_name', how='outer', suffixes=('_base', '_other'),
+                          indicator=True, sort=True)
+
+    columns = ['equipment_type', *PARAMETERS.values()]
+    removed = merged[merged['_merge'] == 'left_only']
+    removed = removed[['equipment_name', *(f"{column}_base" for column in columns)]]
+    removed.columns = ['equipment_name', *columns]
+    added = merged[merged['_merge'] == 'right_only']
+    added = added[['equipment_name', *(f"{column}_other" for column in columns)]]
+    added.columns = ['equipment_name', *columns]
+
+    both = merged[merged['_merge'] == 'both']
+    changes = pd.DataFrame({
+        column: differs(both[f"{column}_base"], both[f"{column}_other"]) for column in columns
+    }, index=both.index)
+    changed_mask = changes.any(axis=1).to_numpy()
+    changed = both[changed_mask]
+
+    changed_records = []
+    for name, row, flags in zip(changed['equipment_name'][:limit],
+                                to_records(changed[:limit]), changes[changed_mask][:limit].to_numpy()):
+        changed_records.append({
+            'equipment_name': name,
+            'equipment_type': row['equipment_type_other'],
+            'changes': {
+                column: {
+                    'base': row[f"{column}_base"],
+                    'other': row[f"{column}_other"],
+                    **({'delta': delta(row[f"{column}_base"], row[f"{column}_other"])}
+                       if column in PARAMETERS.values() else {}),
+                }
+                for column, flag in zip(columns, flags) if flag
+            },
+        })
+
+    return {
+        'counts': {
+            'added': len(added),
+            'removed': len(removed),
+            'changed': int(np.count_nonzero(changed_mask)),
+            'unchanged': int(len(both) - np.count_nonzero(changed_mask)),
+        },
+        'duplicate_names': {'base': base_duplicates, 'other': other_duplicates},
+        'limit': limit,
+        'added': to_records(added[:limit]),
+        'removed': to_records(removed[:limit]),
+        'changed': changed_records,
+    }
+
+
+def dataset_comparison(base, other, limit=DEFAULT_COMPARE_LIMIT):
+    """What changed from dataset `base` to dataset `other`, per type and per equipment name."""
+    return {
+        'base': {'id': base.pk, 'filename': base.filename, 'row_count': base.row_count},
+        'other': {'id': other.pk, 'filename': other.filename, 'row_count': other.row_count},
+        'parameters': list(PARAMETERS.values()),
+        'types': compare_types(base, other),
+        'equipment': compare_equipment(base, other, limit),
+    }
@@ -0,0 +1,297 @@
+import gzip
+import hashlib
+import io
+import zlib
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; .csv.zst uploads are refused without it
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses fall back to zstd or gzip
+    brotli = None
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+BROTLI = 'br'
+
+# Response compression levels: fast settings, since API payloads are
+# compressed per request rather than ahead of time
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# Uncompressed bytes a streaming response buffers between flushes
+STREAM_FLUSH_SIZE = 64 * 1024
+
+# Responses smaller than this are sent uncompressed (RESPONSE_COMPRESSION_MIN_SIZE)
+DEFAULT_RESPONSE_MIN_SIZE = 1024
+
+# Output produced per decompression step while hashing, so a small
+# compressed chunk cannot expand into one huge buffer
+DECOMPRESS_STEP = 1024 * 1024
+
+# Largest size a compressed upload or request body may decompress to
+# (UPLOAD_MAX_DECOMPRESSED_SIZE), so a tiny zstd or gzip bomb is refused
+# instead of expanding without bound while it is hashed or ingested
+DEFAULT_MAX_DECOMPRESSED_SIZE = 2 * 1024 * 1024 * 1024
+
+
+class DecompressedSizeError(ValueError):
+    """Raised when compressed data expands past UPLOAD_MAX_DECOMPRESSED_SIZE."""
+
+    def __init__(self, limit):
+        super().__init__(f"Decompressed upload is larger than {limit} bytes")
+        self.limit = limit
+
+
+def max_decompressed_size():
+    return getattr(settings, 'UPLOAD_MAX_DECOMPRESSED_SIZE', DEFAULT_MAX_DECOMPRESSED_SIZE)
+
+
+def upload_suffixes():
+    """File name suffixes accepted for uploads, mapped to their compression."""
+    suffixes = {'.csv': None, '.csv.gz': GZIP}
+    if zstandard is not None:
+        suffixes['.csv.zst'] = ZSTD
+    return suffixes
+
+
+def upload_suffix(filename):
+    """The accepted suffix filename ends with, or None."""
+    name = filename.lower()
+    # Longest first, so 'x.csv.gz' is not taken for a plain '.csv'
+    for suffix in sorted(upload_suffixes(), key=len, reverse=True):
+        if name.endswith(suffix):
+            return suffix
+    return None
+
+
+def upload_compression(filename):
+    """Compression of an upload named filename: None, 'gzip' or 'zstd'."""
+    suffix = upload_suffix(filename)
+    return upload_suffixes()[suffix] if suffix else None
+
+
+def content_encodings():
+    """Request Content-Encoding values the API can decode."""
+    return [GZIP, ZSTD] if zstandard is not None else [GZIP]
+
+
+class DecompressedStream(io.RawIOBase):
+    """Read-only, non-seekable view of a decompressing stream, capped at limit bytes of output.
+
+    Refusing to seek stops upload handlers from probing the body's size,
+    which for a decompressor would mean inflating the whole body up front.
+    """
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self.limit = limit
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        self.size += len(data)
+        if self.size > self.limit:
+            raise DecompressedSizeError(self.limit)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_decompressed(fileobj, compression):
+    """Wrap a binary file object so reads return decompressed bytes, streaming.
+
+    Reading past UPLOAD_MAX_DECOMPRESSED_SIZE bytes raises DecompressedSizeError.
+    """
+    if compression == GZIP:
+        stream = gzip.GzipFile(fileobj=fileobj, mode='rb')
+    elif compression == ZSTD:
+        stream = zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    else:
+        return fileobj
+    return io.BufferedReader(DecompressedStream(stream, max_decompressed_size()))
+
+
+class ContentHasher:
+    """SHA-256 of an upload's decompressed content, fed with the raw bytes as they arrive.
+
+    Hashing the CSV rather than the compressed bytes makes a .csv and a
+    .csv.gz of the same export deduplicate against each other. Data that turns
+    out not to be valid for its compression is hashed raw from then on, and
+    the ingest reports the actual error. Decompressed output is produced at
+    most DECOMPRESS_STEP bytes at a time, and DecompressedSizeError is raised
+    once it passes UPLOAD_MAX_DECOMPRESSED_SIZE.
+    """
+
+    def __init__(self, compression=None):
+        self.compression = compression
+        self.sha256 = hashlib.sha256()
+        self.limit = max_decompressed_size()
+        self.size = 0
+        self.decompressor = self._new_decompressor()
+
+    def _new_decompressor(self):
+        if self.compression == GZIP:
+            # 16 + MAX_WBITS: expect a gzip header and trailer
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.compression == ZSTD:
+            # Hands the output to write() in DECOMPRESS_STEP pieces, across frames
+            return zstandard.ZstdDecompressor().stream_writer(self, write_size=DECOMPRESS_STEP)
+        return None
+
+    def write(self, output):
+        """Hash decompressed output, enforcing the size limit."""
+        self.size += len(output)
+        if self.size > self.limit:
+            raise DecompressedSizeError(self.limit)
+        self.sha256.update(output)
+        return len(output)
+
+    def update(self, data):
+        if self.decompressor is None:
+            self.sha256.update(data)
+            return
+        try:
+            if self.compression == ZSTD:
+                self.decompressor.write(data)
+                return
+            while True:
+                output = self.decompressor.decompress(data, DECOMPRESS_STEP)
+                self.write(output)
+                if self.decompressor.eof:
+                    # Concatenated gzip members continue after the trailer
+                    data = self.decompressor.unused_data
+                    if not data:
+                        break
+                    self.decompressor = self._new_decompressor()
+                    continue
+                data = self.decompressor.unconsumed_tail
+                # A full step may leave output buffered inside zlib; drain it
+                if not data and len(output) < DECOMPRESS_STEP:
+                    break
+        except (zlib.error, getattr(zstandard, 'ZstdError', zlib.error)):
+            self.decompressor = None
+            self.sha256.update(data)
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+
+def response_min_size():
+    return getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', DEFAULT_RESPONSE_MIN_SIZE)
+
+
+def response_encodings():
+    """Response Content-Encodings the API can produce, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append(ZSTD)
+    if brotli is not None:
+        encodings.append(BROTLI)
+    encodings.append(GZIP)
+    return encodings
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header):
+    """Pick the response encoding for an Accept-Encoding header, or None for identity."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    for encoding in response_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+class StreamCompressor:
+    """Incremental compressor for one response body in the given encoding.
+
+    Input is flushed through to the output once STREAM_FLUSH_SIZE bytes have
+    been fed since the last flush, so a streaming response reaches the client
+    steadily without paying a flush per (possibly tiny) chunk.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.unflushed = 0
+        if encoding == GZIP:
+            # 16 + MAX_WBITS: write a gzip header and trailer
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == BROTLI:
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == ZSTD:
+            self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        else:
+            raise ValueError(f"Unsupported response encoding: {encoding}")
+
+    def compress(self, data):
+        if self.encoding == BROTLI:
+            output = self.compressor.process(data)
+        else:
+            output = self.compressor.compress(data)
+        self.unflushed += len(data)
+        if self.unflushed >= STREAM_FLUSH_SIZE:
+            output += self.flush()
+        return output
+
+    def flush(self):
+        self.unflushed = 0
+        if self.encoding == GZIP:
+            return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == BROTLI:
+            return self.compressor.flush()
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        if self.encoding == BROTLI:
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress_bytes(data, encoding):
+    """Compress a whole response body in one call."""
+    if encoding == GZIP:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == BROTLI:
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported response encoding: {encoding}")
+
+
+def compress_chunks(chunks, encoding):
+    """Compress an iterable of byte strings as it is consumed."""
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            output = compressor.compress(chunk)
+            if output:
+                yield output
+    yield compressor.finish()
@@ -0,0 +1,31 @@
+from django.conf import settings
+
+
+def get_sqlite_pragmas():
+    """Return settings.SQLITE_PRAGMAS, leaving out any set to None."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: apply the SQLite PRAGMAs to a fresh connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in get_sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def get_ingest_backend(connection):
+    """Resolve settings.INGEST_BACKEND ('auto', 'orm' or 'copy') for a database connection.
+
+    'auto' uses COPY FROM STDIN on PostgreSQL and batched INSERTs elsewhere.
+    """
+    backend = getattr(settings, 'INGEST_BACKEND', 'auto')
+    if backend == 'auto':
+        return 'copy' if connection.vendor == 'postgresql' else 'orm'
+    if backend not in ('orm', 'copy'):
+        raise ValueError(f"Unknown INGEST_BACKEND: {backend!r}")
+    if backend == 'copy' and connection.vendor != 'postgresql':
+        raise ValueError(f"INGEST_BACKEND 'copy' needs PostgreSQL, not {connection.vendor}")
+    return backend
@@ -0,0 +1,109 @@
+import numpy as np
+from .storage import get_storage
+
+LTTB = 'lttb'
+MINMAX = 'minmax'
+METHODS = (LTTB, MINMAX)
+
+# ?points= bounds for /api/dataset/<pk>/series/
+DEFAULT_POINTS = 1000
+MAX_POINTS = 10000
+
+
+def bucket_edges(start, stop, buckets):
+    """Split [start, stop) into `buckets` contiguous, near-equal index ranges."""
+    return np.linspace(start, stop, buckets + 1).astype(np.int64)
+
+
+def lttb(y, points):
+    """Indices of `points` samples of y chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last samples are always kept. Every bucket in between
+    contributes the sample forming the largest triangle with the sample kept
+    for the previous bucket and the mean of the next bucket, which preserves
+    peaks and the visual shape of the series. x is the sample position.
+    """
+    n = y.size
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    edges = bucket_edges(1, n - 1, points - 2)
+    # Mean point of each bucket, and of the final single-sample bucket
+    sizes = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        px, py = x[previous], y[previous]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs(
+            (px - avg_x[bucket + 1]) * (y[start:stop] - py)
+            - (px - x[start:stop]) * (avg_y[bucket + 1] - py)
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(y, points):
+    """Indices of the minimum and maximum of y in each of points // 2 buckets, in order.
+
+    Fully vectorized: per-bucket extremes come from reduceat, and the first
+    position holding each extreme is found with one searchsorted.
+    """
+    n = y.size
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(n)
+
+    starts = bucket_edges(0, n, buckets)[:-1]
+    sizes = np.diff(np.append(starts, n))
+    lows = np.repeat(np.minimum.reduceat(y, starts), sizes)
+    highs = np.repeat(np.maximum.reduceat(y, starts), sizes)
+    low_at = np.flatnonzero(y == lows)
+    high_at = np.flatnonzero(y == highs)
+    first_low = low_at[np.searchsorted(low_at, starts)]
+    first_high = high_at[np.searchsorted(high_at, starts)]
+    return np.unique(np.concatenate([first_low, first_high]))
+
+
+def downsample(ids, values, points, method=LTTB):
+    """Downsample a series ordered by record id to about `points` samples.
+
+    Missing values are dropped first. Returns (positions, ids, values): the
+    kept samples' 0-based positions in the full series, their record ids and
+    their values.
+    """
+    ids = np.asarray(ids)
+    values = np.asarray(values, dtype=float)
+    positions = np.flatnonzero(~np.isnan(values))
+    y = values[positions]
+    if not y.size:
+        return positions, ids[positions], y
+
+    keep = lttb(y, points) if method == LTTB else minmax(y, points)
+    positions = positions[keep]
+    return positions, ids[positions], values[positions]
+
+
+def dataset_series(dataset, param, points=DEFAULT_POINTS, method=LTTB):
+    """One parameter over the whole dataset, downsampled for a trend chart."""
+    ids, values = get_storage(dataset).read_series(dataset, param)
+    total = len(values)
+    positions, ids, values = downsample(ids, values, points, method)
+    return {
+        'dataset_id': dataset.pk,
+        'param': param,
+        'method': method,
+        'total': total,
+        'points': int(len(values)),
+        'x': positions.tolist(),
+        'ids': ids.tolist(),
+        'y': values.tolist(),
+    }
@@ -0,0 +1,33 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+RECORD_FIELDS = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+
+
+def dumps(data):
+    """Encode data as compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+
+
+def rows_to_columns(rows, fields):
+    """Transpose row tuples into {field: [values...]} with one list per field."""
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    return {field: list(values) for field, values in zip(fields, columns)}
+
+
+def columnar_records(queryset, fields=RECORD_FIELDS):
+    """Read EquipmentData as values_list tuples and return them in columnar form.
+
+    No model instances or per-row dicts are created, and each field name is
+    written once per response instead of once per record.
+    """
+    rows = list(queryset.order_by('id').values_list(*fields))
+    return rows_to_columns(rows, fields)
+
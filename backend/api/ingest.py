@@ -0,0 +1,218 @@
+import io
+from contextlib import closing
+import pandas as pd
+from django.db import connection, transaction
+from .compression import open_decompressed
+from .db import get_ingest_backend
+from .models import Dataset, EquipmentData
+from .stats import SummaryAggregator
+from .storage import get_storage
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+# Number of EquipmentData rows sent to the database per INSERT statement.
+DEFAULT_BATCH_SIZE = 5000
+
+# Number of CSV rows parsed into memory at a time when streaming an upload.
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def validate_columns(df):
+    """Raise ValueError if the DataFrame is missing any required column."""
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+
+def compute_summary(df):
+    """Calculate the summary statistics stored on Dataset.summary_stats."""
+    summary = SummaryAggregator()
+    summary.update(df)
+    return summary.result()
+
+
+def extract_columns(df):
+    """Convert the required columns to plain Python lists in one vectorized pass each."""
+    return (
+        df['Equipment Name'].astype(str).str.strip().tolist(),
+        df['Type'].astype(str).str.strip().tolist(),
+        df['Flowrate'].astype(float).tolist(),
+        df['Pressure'].astype(float).tolist(),
+        df['Temperature'].astype(float).tolist(),
+    )
+
+
+def insert_records(df, dataset, batch_size=DEFAULT_BATCH_SIZE):
+    """Bulk insert the DataFrame rows as EquipmentData for the given dataset.
+
+    Records are built straight from the column lists, one batch at a time,
+    so no per-row pandas Series is ever created.
+    """
+    names, types, flowrates, pressures, temperatures = extract_columns(df)
+    dataset_id = dataset.pk
+    total = len(names)
+
+    for start in range(0, total, batch_size):
+        end = start + batch_size
+        batch = [
+            EquipmentData(
+                dataset_id=dataset_id,
+                equipment_name=name,
+                equipment_type=eq_type,
+                flowrate=flowrate,
+                pressure=pressure,
+                temperature=temperature
+            )
+            for name, eq_type, flowrate, pressure, temperature in zip(
+                names[start:end], types[start:end], flowrates[start:end],
+                pressures[start:end], temperatures[start:end]
+            )
+        ]
+        EquipmentData.objects.bulk_create(batch, batch_size=batch_size)
+
+    return total
+
+
+def copy_records(df, dataset):
+    """Stream the DataFrame rows into EquipmentData with PostgreSQL COPY FROM STDIN.
+
+    The chunk is written once as CSV text and loaded in a single COPY, which
+    skips per-row parameter binding entirely. Works with psycopg 3 and psycopg2.
+    """
+    frame = pd.DataFrame({
+        'dataset_id': dataset.pk,
+        'equipment_name': df['Equipment Name'].astype(str).str.strip(),
+        'equipment_type': df['Type'].astype(str).str.strip(),
+        'flowrate': df['Flowrate'].astype(float),
+        'pressure': df['Pressure'].astype(float),
+        'temperature': df['Temperature'].astype(float),
+    })
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False, na_rep='NaN')
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in frame.columns)
+    # Empty names must stay empty strings, not NULL, as with the ORM path
+    sql = (
+        f"COPY {quote(EquipmentData._meta.db_table)} ({columns}) FROM STDIN "
+        f"WITH (FORMAT csv, FORCE_NOT_NULL (equipment_name, equipment_type))"
+    )
+
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, buffer)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    return len(frame)
+
+
+class RowWriter:
+    """Write DataFrame chunks as EquipmentData rows with batched INSERTs or PostgreSQL COPY."""
+
+    def __init__(self, dataset, batch_size=DEFAULT_BATCH_SIZE, backend=None):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.backend = backend or get_ingest_backend(connection)
+
+    def write(self, df):
+        if self.backend == 'copy':
+            return copy_records(df, self.dataset)
+        return insert_records(df, self.dataset, batch_size=self.batch_size)
+
+    def close(self):
+        return None
+
+    def abort(self):
+        pass
+
+
+def open_writer(dataset, batch_size=DEFAULT_BATCH_SIZE, backend=None):
+    """Return the chunk writer for the dataset's storage engine."""
+    if dataset.storage == Dataset.STORAGE_PARQUET:
+        return get_storage(dataset).writer(dataset)
+    return RowWriter(dataset, batch_size=batch_size, backend=backend)
+
+
+def ingest_chunks(chunks, dataset, batch_size=DEFAULT_BATCH_SIZE, progress=None, backend=None):
+    """Validate, store and summarize an iterable of DataFrame chunks.
+
+    Only one chunk is held in memory at a time; the summary statistics are
+    folded in as each chunk is written. Every chunk is committed in its own
+    transaction, so on SQLite the write lock is released between chunks and
+    other requests (new upload jobs, session updates) are not locked out for
+    the whole ingest. The dataset is marked complete together with its
+    statistics at the end; if ingest fails, records already committed are
+    left for the caller to delete (see jobs.ingest_job_file).
+
+    If given, progress is called with the number of rows written so far after
+    every chunk. Chunks go to the dataset's storage engine; for row storage
+    backend is 'orm' or 'copy' and by default comes from settings.INGEST_BACKEND.
+    """
+    summary = SummaryAggregator()
+    writer = open_writer(dataset, batch_size=batch_size, backend=backend)
+
+    try:
+        for chunk in chunks:
+            validate_columns(chunk)
+            with transaction.atomic():
+                writer.write(chunk)
+            summary.update(chunk)
+            if progress:
+                progress(summary.total_count)
+
+        result = summary.result()
+        dataset.row_count = result['total_count']
+        dataset.summary_stats = result
+        dataset.is_complete = True
+        update_fields = ['row_count', 'summary_stats', 'is_complete']
+        data_file = writer.close()
+        if data_file:
+            dataset.data_file.name = data_file
+            update_fields.append('data_file')
+        with transaction.atomic():
+            dataset.save(update_fields=update_fields)
+    except BaseException:
+        writer.abort()
+        raise
+
+    return result
+
+
+def ingest_dataframe(df, dataset, batch_size=DEFAULT_BATCH_SIZE, backend=None):
+    """Validate, summarize and store an in-memory DataFrame on the dataset."""
+    return ingest_chunks([df], dataset, batch_size=batch_size, backend=backend)
+
+
+def iter_csv_chunks(csv_file, chunksize=DEFAULT_CHUNK_SIZE, encoding='utf-8', compression=None):
+    """Parse a binary CSV file object lazily, yielding DataFrames of at most chunksize rows.
+
+    compression ('gzip' or 'zstd') is undone on the fly as pandas reads, so
+    no decompressed copy of the file is ever written or held in memory.
+    """
+    csv_file.seek(0)
+    # Hand pandas the raw binary stream behind Django's File wrapper; the wrapper
+    # has no `mode`, which makes pandas treat it as text and ignore `encoding`.
+    stream = open_decompressed(getattr(csv_file, 'file', csv_file), compression)
+    with pd.read_csv(stream, chunksize=chunksize, encoding=encoding) as reader:
+        yield from reader
+
+
+def ingest_csv(csv_file, dataset, chunksize=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+               progress=None, compression=None):
+    """Stream a CSV file object into the dataset without reading it all into memory.
+
+    Files that are not valid UTF-8 are re-read as latin-1. The bad byte may
+    only turn up after earlier chunks were committed, so the records of the
+    UTF-8 attempt are deleted before the file is read again.
+    """
+    try:
+        with closing(iter_csv_chunks(csv_file, chunksize, compression=compression)) as chunks:
+            return ingest_chunks(chunks, dataset, batch_size=batch_size, progress=progress)
+    except UnicodeDecodeError:
+        get_storage(dataset).delete_records(dataset)
+        with closing(iter_csv_chunks(csv_file, chunksize, encoding='latin-1', compression=compression)) as chunks:
+            return ingest_chunks(chunks, dataset, batch_size=batch_size, progress=progress)
@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from .models import Dataset, UploadJob
+from .cache import invalidate_dataset
+from .compression import upload_compression
+from .utils import process_csv_file
+from .reports import REPORT_MODE_FULL, prerender_report
+from .retention import delete_dataset, ingest_cutoff, run_retention
+from .storage import default_storage_engine
+
+logger = logging.getLogger(__name__)
+
+# Local worker pool for CSV ingest; no external broker is needed.
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'UPLOAD_WORKERS', 2),
+    thread_name_prefix='upload-worker'
+)
+
+# Live row counts of running jobs, keyed by job id, so polling a job does not
+# cost a database write per chunk.
+_progress = {}
+
+# Report renders queued or running, keyed by (dataset id, mode), so repeated
+# downloads of a report that is not ready yet do not queue it again
+_report_renders = {}
+_report_renders_lock = threading.Lock()
+
+
+def submit_upload_job(job):
+    """Queue an UploadJob for ingest in the worker pool."""
+    return executor.submit(run_upload_job, job.pk)
+
+
+def submit_report(dataset_id, mode=REPORT_MODE_FULL):
+    """Queue a report render in the worker pool unless one is already pending; returns its future.
+
+    A failed render stays registered until it has been returned once, so the
+    next request can report the error; the request after that renders again.
+    """
+    key = (dataset_id, mode)
+    with _report_renders_lock:
+        future = _report_renders.get(key)
+        if future is not None and future.done():
+            del _report_renders[key]
+            if future.exception() is not None:
+                return future
+            future = None
+        if future is None:
+            future = executor.submit(prerender_report, dataset_id, mode)
+            _report_renders[key] = future
+            future.add_done_callback(lambda done: _forget_report_render(key, done))
+    return future
+
+
+def _forget_report_render(key, future):
+    # Lock-free: the callback runs right away if the render already finished
+    if future.exception() is None and _report_renders.get(key) is future:
+        _report_renders.pop(key, None)
+
+
+def get_live_progress(job_id):
+    """Return (rows_processed, started_monotonic) for a running job, or None."""
+    return _progress.get(job_id)
+
+
+def find_duplicate(content_hash):
+    """Return the dataset already ingested from content with this SHA-256, if any."""
+    if not content_hash:
+        return None
+    return Dataset.objects.filter(content_hash=content_hash).first()
+
+
+def wait_for_duplicate(content_hash, poll_interval=0.5):
+    """Wait for another job ingesting the same content; return its dataset, or None if that ingest failed.
+
+    An ingest still unfinished INGEST_TIMEOUT seconds after it started is
+    taken to be dead: its partial dataset is deleted and TimeoutError raised.
+    """
+    while True:
+        dataset = Dataset.all_objects.filter(content_hash=content_hash).first()
+        if dataset is None or dataset.is_complete:
+            return dataset
+        if dataset.upload_date < ingest_cutoff():
+            delete_dataset(dataset)
+            raise TimeoutError("Another upload of the same file did not finish; please upload it again")
+        time.sleep(poll_interval)
+
+
+def reuse_dataset(job, dataset):
+    """Complete a job with an existing dataset instead of ingesting the same content again.
+
+    The dataset's upload date is bumped so the re-upload counts as the latest
+    dataset for the summary, history and retention.
+    """
+    Dataset.objects.filter(pk=dataset.pk).update(upload_date=timezone.now())
+    transaction.on_commit(lambda: invalidate_dataset(dataset.pk))
+    job.dataset = dataset
+    job.deduplicated = True
+    job.rows_processed = dataset.row_count
+    job.status = UploadJob.STATUS_SUCCEEDED
+
+
+def duplicate_upload_job(filename, content_hash):
+    """Return a finished job reusing the dataset with this content, or None if the content is new."""
+    duplicate = find_duplicate(content_hash)
+    if duplicate is None:
+        return None
+    now = timezone.now()
+    job = UploadJob(filename=filename, content_hash=content_hash, started_at=now, finished_at=now)
+    reuse_dataset(job, duplicate)
+    job.save()
+    logger.info("Duplicate upload of %s, reusing dataset %s", filename, duplicate.pk)
+    return job
+
+
+def ingest_job_file(job, progress):
+    """Create the job's Dataset and ingest its stored CSV, committing chunk by chunk.
+
+    The dataset stays hidden (is_complete=False) until every record is in;
+    if the ingest fails, whatever was already committed is deleted again.
+    """
+    dataset = Dataset.objects.create(
+        filename=job.filename,
+        row_count=0,
+        summary_stats={},
+        file=job.file.name,
+        storage=default_storage_engine(),
+        content_hash=job.content_hash,
+        is_complete=False,
+    )
+    try:
+        with job.file.open('rb') as csv_file:
+            process_csv_file(csv_file, dataset, progress=progress,
+                             compression=upload_compression(job.file.name))
+    except BaseException:
+        try:
+            delete_dataset(dataset)
+        except Exception:
+            logger.exception("Could not remove partial dataset %s", dataset.pk)
+        raise
+    return dataset
+
+
+def fail_job(job, error):
+    """Record a failed job; never raises, so a job can not be left queued or running."""
+    job.status = UploadJob.STATUS_FAILED
+    job.error = str(error) or error.__class__.__name__
+    job.finished_at = timezone.now()
+    try:
+        UploadJob.objects.filter(pk=job.pk).update(
+            status=job.status, error=job.error, finished_at=job.finished_at
+        )
+    except Exception:
+        logger.exception("Could not record the failure of upload job %s", job.pk)
+    try:
+        job.file.delete(save=False)
+    except Exception:
+        pass
+
+
+def run_upload_job(job_id):
+    """Ingest the job's stored CSV into a new Dataset and record the outcome.
+
+    Any error, including failing to write the job row itself (e.g. SQLite
+    reporting the database as locked), marks the job failed with the message.
+    """
+    close_old_connections()
+    job = None
+    try:
+        job = UploadJob.objects.get(pk=job_id)
+        job.status = UploadJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+
+        started = time.monotonic()
+        _progress[job.pk] = (0, started)
+
+        def progress(rows):
+            _progress[job.pk] = (rows, started)
+
+        try:
+            dataset = ingest_job_file(job, progress)
+        except IntegrityError:
+            # Another upload of the same content was ingested, or is being ingested, meanwhile
+            duplicate = wait_for_duplicate(job.content_hash) if job.content_hash else None
+            if duplicate is None:
+                raise
+            reuse_dataset(job, duplicate)
+            job.file.delete(save=False)
+            logger.info("Upload job %s matched dataset %s, not ingested again", job.pk, duplicate.pk)
+        else:
+            job.dataset = dataset
+            job.rows_processed = dataset.row_count
+            job.status = UploadJob.STATUS_SUCCEEDED
+            logger.info("Upload job %s finished: %s records saved", job.pk, job.rows_processed)
+        job.finished_at = timezone.now()
+        job.save()
+    except Exception as e:
+        logger.exception("Upload job %s failed", job_id)
+        if job is None:
+            job = UploadJob(pk=job_id)
+        fail_job(job, e)
+        return
+    finally:
+        _progress.pop(job_id, None)
+        close_old_connections()
+
+    if not job.deduplicated:
+        submit_report(job.dataset_id)
+    # Prune old datasets on the worker pool, not in this job
+    executor.submit(run_retention)
@@ -0,0 +1,89 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from api.cache import get_cache
+from api.compression import response_encodings
+from api.models import Dataset
+from api.ingest import ingest_dataframe
+from .bench_ingest import make_dataframe
+
+IDENTITY = 'identity'
+
+
+def timed(func, repeat):
+    """Best wall time of func() over repeat runs, in milliseconds, and its last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure bytes on the wire and latency of dataset responses per response encoding: '
+        'cold (render + compress), warm (cached), 304 revalidation and a records page. '
+        'Database writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--mbps', type=float, default=50.0,
+                            help='Link speed used to estimate transfer time (megabits/s).')
+
+    def handle(self, *args, **options):
+        # Go through the full middleware stack, as a real client would
+        client = Client(SERVER_NAME='localhost')
+        encodings = [IDENTITY] + response_encodings()
+        self.stdout.write(f"Encodings: {', '.join(encodings)}  link: {options['mbps']:g} Mbit/s")
+        self.stdout.write(
+            f"{'rows':>8} {'layout':>9} {'encoding':>9} {'bytes':>11} {'ratio':>6} {'cold ms':>8} "
+            f"{'warm ms':>8} {'304 ms':>7} {'wire ms':>8} {'page B':>8} {'page ms':>8}"
+        )
+
+        for rows in options['rows']:
+            with transaction.atomic():
+                dataset = Dataset.objects.create(
+                    filename=f'bench_{rows}.csv',
+                    row_count=0,
+                    summary_stats={}
+                )
+                ingest_dataframe(make_dataframe(rows), dataset)
+
+                for layout in ('nested', 'columnar'):
+                    url = f'/api/dataset/{dataset.pk}/?layout={layout}'
+                    identity_size = None
+                    for encoding in encodings:
+                        headers = {'HTTP_ACCEPT_ENCODING': encoding}
+
+                        def cold():
+                            get_cache().clear()
+                            return client.get(url, **headers)
+
+                        cold_ms, response = timed(cold, options['repeat'])
+                        warm_ms, response = timed(lambda: client.get(url, **headers), options['repeat'])
+                        size = len(response.content)
+                        identity_size = identity_size or size
+                        not_modified_ms, revalidated = timed(
+                            lambda: client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers),
+                            options['repeat'],
+                        )
+                        assert revalidated.status_code == 304, revalidated.status_code
+                        page_ms, page = timed(
+                            lambda: client.get(f'/api/dataset/{dataset.pk}/records/?limit=5000', **headers),
+                            options['repeat'],
+                        )
+                        wire_ms = size * 8 / (options['mbps'] * 1e6) * 1000
+
+                        self.stdout.write(
+                            f"{rows:>8} {layout:>9} {response.get('Content-Encoding', IDENTITY):>9} "
+                            f"{size:>11,} {identity_size / size:6.1f} {cold_ms:8.1f} {warm_ms:8.2f} "
+                            f"{not_modified_ms:7.2f} {wire_ms:8.1f} {len(page.content):>8,} {page_ms:8.2f}"
+                        )
+
+                transaction.set_rollback(True)
+        get_cache().clear()
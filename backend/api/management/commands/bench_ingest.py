@@ -0,0 +1,72 @@
+import time
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from api.models import Dataset
+from api.ingest import ingest_dataframe, DEFAULT_BATCH_SIZE
+
+EQUIPMENT_TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+
+def make_dataframe(rows, seed=0):
+    """Build a synthetic equipment export with the upload CSV columns."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Equipment Name': [f"EQ-{i:07d}" for i in range(rows)],
+        'Type': rng.choice(EQUIPMENT_TYPES, size=rows),
+        'Flowrate': rng.uniform(50, 300, size=rows).round(1),
+        'Pressure': rng.uniform(1, 20, size=rows).round(1),
+        'Temperature': rng.uniform(20, 200, size=rows).round(1),
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the bulk ingest path and report rows/sec for each ingest backend. '
+        'The COPY backend is skipped unless the database is PostgreSQL. All writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--backend', nargs='+', choices=['orm', 'copy'], default=['orm', 'copy'])
+
+    def handle(self, *args, **options):
+        connection.ensure_connection()
+        self.stdout.write(f"Database: {connection.vendor}")
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = []
+                for name in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size'):
+                    cursor.execute(f"PRAGMA {name}")
+                    pragmas.append(f"{name}={cursor.fetchone()[0]}")
+            self.stdout.write(f"PRAGMAs: {', '.join(pragmas)}")
+
+        backends = options['backend']
+        if 'copy' in backends and connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                'Skipping copy backend: COPY FROM STDIN needs PostgreSQL (set POSTGRES_DB to use one)'
+            ))
+            backends = [backend for backend in backends if backend != 'copy']
+
+        for rows in options['rows']:
+            df = make_dataframe(rows)
+            for backend in backends:
+                self.bench(df, rows, backend, options['batch_size'])
+
+    def bench(self, df, rows, backend, batch_size):
+        with transaction.atomic():
+            dataset = Dataset.objects.create(
+                filename=f'bench_{rows}.csv',
+                row_count=0,
+                summary_stats={}
+            )
+            start = time.perf_counter()
+            ingest_dataframe(df, dataset, batch_size=batch_size, backend=backend)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{backend:>4}  {rows:>9} rows  {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/sec"
+        )
@@ -0,0 +1,79 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.models import Dataset
+from api.ingest import ingest_csv, DEFAULT_CHUNK_SIZE
+from .bench_ingest import make_dataframe
+
+
+def write_csv(path, rows, chunk_rows=100000):
+    """Write a synthetic CSV of the given size without holding it all in memory."""
+    with open(path, 'w', newline='') as f:
+        for start in range(0, rows, chunk_rows):
+            df = make_dataframe(min(chunk_rows, rows - start), seed=start)
+            df['Equipment Name'] = [f"EQ-{i:07d}" for i in range(start, start + len(df))]
+            df.to_csv(f, index=False, header=(start == 0))
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that streaming ingest keeps peak RSS flat as the CSV grows. '
+        'Each size is ingested in a fresh process and all writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100000, 500000, 2000000])
+        parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--tolerance-mb', type=float, default=64.0,
+                            help='Allowed growth of peak RSS between the smallest and largest file.')
+        parser.add_argument('--probe', help='Internal: ingest this file and print peak RSS in MB.')
+
+    def handle(self, *args, **options):
+        if options['probe']:
+            self.probe(options['probe'], options['chunksize'])
+            return
+
+        peaks = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in options['rows']:
+                path = os.path.join(tmp, f'bench_{rows}.csv')
+                write_csv(path, rows)
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+
+                output = subprocess.run(
+                    [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_ingest_memory',
+                     '--probe', path, '--chunksize', str(options['chunksize'])],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                peak = float(output.strip().splitlines()[-1])
+                peaks.append(peak)
+                os.remove(path)
+
+                self.stdout.write(f"{rows:>9} rows  {size_mb:8.1f} MB file  peak RSS {peak:8.1f} MB")
+
+        growth = max(peaks) - min(peaks)
+        if growth > options['tolerance_mb']:
+            raise CommandError(f"Peak RSS grew by {growth:.1f} MB across file sizes")
+        self.stdout.write(self.style.SUCCESS(f"Peak RSS stayed flat (growth {growth:.1f} MB)"))
+
+    def probe(self, path, chunksize):
+        with open(path, 'rb') as f, transaction.atomic():
+            dataset = Dataset.objects.create(
+                filename=os.path.basename(path),
+                row_count=0,
+                summary_stats={}
+            )
+            ingest_csv(f, dataset, chunksize=chunksize)
+            transaction.set_rollback(True)
+        self.stdout.write(f"{peak_rss_mb():.1f}")
@@ -0,0 +1,65 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max, Min
+from api.models import Dataset, EquipmentData
+from api.ingest import ingest_dataframe
+from .bench_ingest import make_dataframe
+
+
+def query_plans(dataset, other_datasets=5):
+    """The hot API queries, each paired with the index its plan is expected to use."""
+    records = EquipmentData.objects.filter(dataset=dataset)
+    return [
+        ('history', Dataset.objects.all()[:5], 'dataset_upload_date_idx'),
+        ('summary', Dataset.objects.all()[:1], 'dataset_upload_date_idx'),
+        ('records page', records.filter(id__gt=0).order_by('id')[:501], 'equipment_dataset_id_idx'),
+        ('records by type', records.filter(equipment_type='Pump').order_by('id')[:501],
+         'equipment_dataset_type_idx'),
+        ('per-type aggregates',
+         records.values('equipment_type').annotate(
+             count=Count('id'), mean=Avg('flowrate'), min=Min('flowrate'), max=Max('flowrate')
+         ).order_by(),
+         'equipment_dataset_type_idx'),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load a large dataset and time the history, summary, records and per-type queries, '
+        'printing their EXPLAIN output. All writes are rolled back. The index usage itself is '
+        'asserted by api.tests.QueryPlanTests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--datasets', type=int, default=5,
+                            help='Number of datasets to spread the rows over.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            per_dataset = options['rows'] // options['datasets']
+            for i in range(options['datasets']):
+                dataset = Dataset.objects.create(
+                    filename=f'bench_{i}.csv',
+                    row_count=0,
+                    summary_stats={}
+                )
+                ingest_dataframe(make_dataframe(per_dataset, seed=i), dataset)
+
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            self.stdout.write(f"{options['rows']:,} rows in {options['datasets']} datasets ({connection.vendor})\n")
+            for name, queryset, index in query_plans(dataset):
+                plan = queryset.explain()
+                start = time.perf_counter()
+                list(queryset)
+                elapsed = time.perf_counter() - start
+
+                marker = self.style.SUCCESS('uses') if index in plan else self.style.WARNING('not using')
+                self.stdout.write(f"{name}: {elapsed * 1000:.2f} ms, {marker} {index}")
+                self.stdout.write('    ' + plan.replace('\n', '\n    ') + '\n')
+
+            transaction.set_rollback(True)
@@ -0,0 +1,54 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from api.models import Dataset
+from api.ingest import ingest_dataframe
+from api.reports import report_path
+from api.views import GenerateReportView
+from .bench_ingest import make_dataframe
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold (render) vs. warm (cached file) latency of the report endpoint. '
+        'Database writes are rolled back and the rendered PDF is removed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        view = GenerateReportView.as_view()
+        factory = RequestFactory()
+
+        for rows in options['rows']:
+            with transaction.atomic():
+                dataset = Dataset.objects.create(
+                    filename=f'bench_{rows}.csv',
+                    row_count=0,
+                    summary_stats={}
+                )
+                ingest_dataframe(make_dataframe(rows), dataset)
+
+                def download():
+                    start = time.perf_counter()
+                    response = view(factory.get(f'/api/report/{dataset.pk}/'), pk=dataset.pk)
+                    size = sum(len(block) for block in response.streaming_content)
+                    return time.perf_counter() - start, size
+
+                try:
+                    cold, size = download()
+                    warm = min(download()[0] for _ in range(options['repeat']))
+                finally:
+                    path = report_path(dataset)
+                    if os.path.exists(path):
+                        os.remove(path)
+                    transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{rows:>8} rows  {size / 1024:8.1f} KB  cold {cold * 1000:9.1f} ms  "
+                f"warm {warm * 1000:7.2f} ms  speedup {cold / warm:7.1f}x"
+            )
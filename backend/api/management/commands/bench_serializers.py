@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.models import Dataset
+from api.ingest import ingest_dataframe
+from api.serializers import DatasetSerializer, DatasetListSerializer
+from api.encoders import columnar_records, dumps, orjson
+from .bench_ingest import make_dataframe
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare nested DatasetSerializer output with the columnar values_list path. '
+        'All writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 500000])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"JSON encoder for columnar path: {'orjson' if orjson else 'json'}")
+
+        for rows in options['rows']:
+            with transaction.atomic():
+                dataset = Dataset.objects.create(
+                    filename=f'bench_{rows}.csv',
+                    row_count=0,
+                    summary_stats={}
+                )
+                ingest_dataframe(make_dataframe(rows), dataset)
+
+                nested_time, nested = timed(
+                    lambda: JSONRenderer().render(DatasetSerializer(dataset).data)
+                )
+
+                def columnar():
+                    data = dict(DatasetListSerializer(dataset).data)
+                    data['equipment_columns'] = columnar_records(dataset.equipment_records.all())
+                    return dumps(data)
+
+                columnar_time, columnar_body = timed(columnar)
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{rows:>8} rows  DatasetSerializer {nested_time:7.2f} s {len(nested) / 1e6:7.1f} MB  |  "
+                f"columnar {columnar_time:7.2f} s {len(columnar_body) / 1e6:7.1f} MB  |  "
+                f"speedup {nested_time / columnar_time:5.1f}x"
+            )
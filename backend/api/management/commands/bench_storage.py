@@ -0,0 +1,97 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from api.models import Dataset
+from api.encoders import RECORD_FIELDS
+from api.ingest import ingest_dataframe
+from api.storage import STORAGE_ENGINES, get_storage, pa
+from .bench_ingest import make_dataframe
+
+REPORT_FIELDS = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+
+
+def sqlite_used_bytes():
+    """Bytes of the SQLite file in use, as seen by this connection's open transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA page_size")
+        page_size = cursor.fetchone()[0]
+        cursor.execute("PRAGMA page_count")
+        page_count = cursor.fetchone()[0]
+        cursor.execute("PRAGMA freelist_count")
+        free = cursor.fetchone()[0]
+    return (page_count - free) * page_size
+
+
+def timed(func, repeat):
+    """Best wall time of func() over repeat runs, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare on-disk size and read latency of the row and Parquet dataset storage engines. '
+        'Row data is rolled back and Parquet files are removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--engine', nargs='+', choices=list(STORAGE_ENGINES), default=list(STORAGE_ENGINES))
+
+    def handle(self, *args, **options):
+        engines = options['engine']
+        if Dataset.STORAGE_PARQUET in engines and pa is None:
+            if engines == [Dataset.STORAGE_PARQUET]:
+                raise CommandError('pyarrow is not installed')
+            self.stdout.write(self.style.WARNING('Skipping parquet storage: pyarrow is not installed'))
+            engines = [engine for engine in engines if engine != Dataset.STORAGE_PARQUET]
+
+        self.stdout.write(
+            f"{'engine':>8} {'rows':>9} {'size MB':>9} {'B/row':>7} {'write s':>8} "
+            f"{'all ms':>9} {'page ms':>8} {'type ms':>8} {'report ms':>10}"
+        )
+        for rows in options['rows']:
+            df = make_dataframe(rows)
+            for engine in engines:
+                self.bench(df, rows, engine, options['repeat'])
+
+    def bench(self, df, rows, engine, repeat):
+        with transaction.atomic():
+            before = sqlite_used_bytes() if connection.vendor == 'sqlite' else None
+            dataset = Dataset.objects.create(
+                filename=f'bench_{rows}.csv', row_count=0, summary_stats={}, storage=engine
+            )
+            start = time.perf_counter()
+            ingest_dataframe(df, dataset)
+            write_seconds = time.perf_counter() - start
+
+            storage = get_storage(dataset)
+            if engine == Dataset.STORAGE_PARQUET:
+                size = os.path.getsize(storage.path(dataset))
+            elif before is not None:
+                size = sqlite_used_bytes() - before
+            else:
+                size = None
+
+            first_id = storage.page(dataset, ['id'], 0, 1)[0][0]
+            middle = first_id + rows // 2
+            read_all = timed(lambda: storage.read_columns(dataset, RECORD_FIELDS), repeat)
+            page = timed(lambda: storage.page(dataset, RECORD_FIELDS, middle, 500), repeat)
+            by_type = timed(lambda: storage.page(dataset, RECORD_FIELDS, middle, 500, 'Valve'), repeat)
+            report = timed(lambda: sum(1 for _ in storage.iter_rows(dataset, REPORT_FIELDS)), repeat)
+
+            storage.delete_records(dataset)
+            transaction.set_rollback(True)
+
+        size_mb = f"{size / 1e6:9.2f}" if size is not None else f"{'n/a':>9}"
+        per_row = f"{size / rows:7.1f}" if size is not None else f"{'n/a':>7}"
+        self.stdout.write(
+            f"{engine:>8} {rows:>9} {size_mb} {per_row} {write_seconds:8.2f} "
+            f"{read_all:9.1f} {page:8.2f} {by_type:8.2f} {report:10.1f}"
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from api.retention import RetentionPolicy, abandoned_datasets, apply_retention
+from api.uploads import expire_upload_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete datasets that fall outside the DATASET_RETENTION policy, with their rows, files and reports, '
+        'datasets left incomplete by an ingest that died, and abandoned chunked upload sessions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-datasets', type=int, help='Override MAX_DATASETS.')
+        parser.add_argument('--max-age-days', type=int, help='Override MAX_AGE_DAYS.')
+        parser.add_argument('--max-total-rows', type=int, help='Override MAX_TOTAL_ROWS.')
+        parser.add_argument('--batch-size', type=int, help='Override DELETE_BATCH_SIZE.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the datasets that would be deleted.')
+
+    def handle(self, *args, **options):
+        policy = RetentionPolicy.from_settings()
+        for option, attribute in [
+            ('max_datasets', 'max_datasets'),
+            ('max_age_days', 'max_age_days'),
+            ('max_total_rows', 'max_total_rows'),
+            ('batch_size', 'delete_batch_size'),
+        ]:
+            if options[option] is not None:
+                setattr(policy, attribute, options[option])
+
+        if options['dry_run']:
+            expired = [*abandoned_datasets(), *policy.select_expired()]
+            for dataset in expired:
+                self.stdout.write(f"Would delete {dataset} ({dataset.row_count} rows)")
+            self.stdout.write(f"{len(expired)} datasets would be deleted")
+            return
+
+        result = apply_retention(policy)
+        self.stdout.write(self.style.SUCCESS(f"Retention {result}"))
+        sessions = expire_upload_sessions()
+        if sessions:
+            self.stdout.write(f"Removed {sessions} abandoned upload sessions")
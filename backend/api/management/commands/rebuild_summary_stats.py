@@ -0,0 +1,37 @@
+from itertools import islice
+import pandas as pd
+from django.core.management.base import BaseCommand
+from api.models import Dataset
+from api.ingest import DEFAULT_CHUNK_SIZE
+from api.stats import SummaryAggregator
+from api.storage import get_storage
+
+FIELDS = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute summary_stats from stored EquipmentData for datasets uploaded before '
+        'per-column and per-type statistics existed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every dataset, not only outdated ones.')
+
+    def handle(self, *args, **options):
+        for dataset in Dataset.objects.all():
+            if not options['all'] and 'by_type' in dataset.summary_stats:
+                continue
+
+            summary = SummaryAggregator()
+            rows = get_storage(dataset).iter_rows(dataset, FIELDS)
+            while True:
+                chunk = list(islice(rows, DEFAULT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                summary.update(pd.DataFrame(chunk, columns=COLUMNS))
+
+            dataset.summary_stats = summary.result()
+            dataset.save(update_fields=['summary_stats'])
+            self.stdout.write(f"Rebuilt summary for {dataset} ({summary.total_count} rows)")
@@ -0,0 +1,103 @@
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from .compression import (
+    StreamCompressor, compress_bytes, compress_chunks, content_encodings, negotiate_encoding,
+    open_decompressed, response_min_size,
+)
+
+# Content types worth compressing; PDFs and images are compressed already
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+class RequestDecompressionMiddleware:
+    """Decode request bodies sent with Content-Encoding: gzip (or zstd when installed).
+
+    The body stream is wrapped in a streaming decompressor before any parser
+    touches it, so multipart uploads and raw upload chunks are decompressed as
+    they are read and never buffered whole. Reading past
+    UPLOAD_MAX_DECOMPRESSED_SIZE raises DecompressedSizeError, which the
+    upload views answer with 413. Decoded requests are flagged with
+    request.content_decoded, because CONTENT_LENGTH still counts the
+    compressed bytes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding and encoding != 'identity':
+            if encoding not in content_encodings():
+                return JsonResponse(
+                    {'error': f"Unsupported Content-Encoding: {encoding}"}, status=415
+                )
+            request._stream = open_decompressed(request._stream, encoding)
+            request.content_decoded = True
+            # CONTENT_LENGTH understates the decoded size, so never spool files in memory
+            request.upload_handlers = [
+                handler for handler in request.upload_handlers
+                if not isinstance(handler, MemoryFileUploadHandler)
+            ]
+        return self.get_response(request)
+
+
+class ResponseCompressionMiddleware:
+    """Compress responses with the best encoding the client accepts: zstd, br or gzip.
+
+    zstd and br are offered only when zstandard / brotli are installed.
+    Bodies under RESPONSE_COMPRESSION_MIN_SIZE are left alone, and streaming
+    responses are compressed chunk by chunk as they are sent. Strong ETags
+    are weakened, as Django's GZipMiddleware does, so If-None-Match still
+    matches the ETag of the uncompressed body and conditional GETs keep
+    returning 304.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_chunks(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < response_min_size():
+                return response
+            compressed = compress_bytes(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressible(self, response):
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def compress_async(self, chunks, encoding):
+        compressor = StreamCompressor(encoding)
+        async for chunk in chunks:
+            if chunk:
+                output = compressor.compress(chunk)
+                if output:
+                    yield output
+        yield compressor.finish()
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_equipment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='storage',
+            field=models.CharField(choices=[('rows', 'EquipmentData rows'), ('parquet', 'Parquet file')], default='rows', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='data_file',
+            field=models.FileField(blank=True, upload_to='datasets/'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:30
+
+import api.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_dataset_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadjob',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadjob',
+            name='deduplicated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='uploadjob',
+            name='file',
+            field=models.FileField(blank=True, upload_to=api.models.content_addressed_path),
+        ),
+        migrations.AddConstraint(
+            model_name='dataset',
+            constraint=models.UniqueConstraint(condition=models.Q(('content_hash', ''), _negated=True), fields=('content_hash',), name='dataset_unique_content_hash'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:04
+
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_upload_session'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dataset',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-upload_date']},
+        ),
+        migrations.AlterModelManagers(
+            name='dataset',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='is_complete',
+            field=models.BooleanField(default=True),
+        ),
+    ]
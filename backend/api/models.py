@@ -1,16 +1,66 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
+from .compression import upload_suffix
+
+
+def content_addressed_path(instance, filename):
+    """Store uploads under uploads/sha256/<first two hex digits>/<sha256>.csv[.gz|.zst]."""
+    if not instance.content_hash:
+        return f"uploads/{filename}"
+    suffix = upload_suffix(filename) or '.csv'
+    return f"uploads/sha256/{instance.content_hash[:2]}/{instance.content_hash}{suffix}"
+
+
+class CompleteDatasetManager(models.Manager):
+    """Datasets whose ingest has finished; the ones still being written stay hidden."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_complete=True)
+
 
 class Dataset(models.Model):
+    STORAGE_ROWS = 'rows'
+    STORAGE_PARQUET = 'parquet'
+    STORAGE_CHOICES = [
+        (STORAGE_ROWS, 'EquipmentData rows'),
+        (STORAGE_PARQUET, 'Parquet file'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     filename = models.CharField(max_length=255)
     upload_date = models.DateTimeField(auto_now_add=True)
     row_count = models.IntegerField()
     summary_stats = models.JSONField()
     file = models.FileField(upload_to='uploads/')
+    # Where the equipment records live: EquipmentData rows or a Parquet data_file
+    storage = models.CharField(max_length=20, choices=STORAGE_CHOICES, default=STORAGE_ROWS)
+    data_file = models.FileField(upload_to='datasets/', blank=True)
+    # SHA-256 of the uploaded CSV; re-uploads of the same content reuse this dataset
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    # False while an upload job is still writing the records, which it commits in batches
+    is_complete = models.BooleanField(default=True)
+    
+    objects = CompleteDatasetManager()
+    # Includes datasets still being ingested
+    all_objects = models.Manager()
     
     class Meta:
         ordering = ['-upload_date']
+        # Admin, dumpdata and related lookups see every dataset
+        default_manager_name = 'all_objects'
+        indexes = [
+            # Every history/summary query orders datasets by upload date
+            models.Index(fields=['upload_date'], name='dataset_upload_date_idx'),
+        ]
+        constraints = [
+            # At most one dataset per uploaded content; also settles concurrent identical uploads
+            models.UniqueConstraint(
+                fields=['content_hash'],
+                condition=~models.Q(content_hash=''),
+                name='dataset_unique_content_hash',
+            ),
+        ]
         
     def __str__(self):
         return f"{self.filename} - {self.upload_date.strftime('%Y-%m-%d %H:%M')}"
@@ -23,5 +73,77 @@ class EquipmentData(models.Model):
     pressure = models.FloatField()
     temperature = models.FloatField()
     
+    class Meta:
+        indexes = [
+            # Per-type filtering and aggregation within a dataset
+            models.Index(fields=['dataset', 'equipment_type'], name='equipment_dataset_type_idx'),
+            # Keyset pagination of a dataset's records ordered by id
+            models.Index(fields=['dataset', 'id'], name='equipment_dataset_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment_name} ({self.equipment_type})"
+
+class UploadJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    file = models.FileField(upload_to=content_addressed_path, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    # True when the upload matched an existing dataset and was not ingested again
+    deduplicated = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    rows_processed = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+class UploadSession(models.Model):
+    """A resumable chunked upload: chunks are appended to a partial file until it is completed."""
+
+    STATUS_OPEN = 'open'
+    STATUS_COMPLETE = 'complete'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_COMPLETE, 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    # Declared total size in bytes, if the client knows it up front
+    size = models.BigIntegerField(null=True, blank=True)
+    # Bytes received and acknowledged so far; the next chunk must start here
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    job = models.ForeignKey(UploadJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def partial_name(self):
+        """Storage name of the file the chunks are appended to."""
+        return f"uploads/partial/{self.pk}.part"
+
     def __str__(self):
-        return f"{self.equipment_name} ({self.equipment_type})"
\ No newline at end of file
+        return f"{self.filename} ({self.offset} bytes, {self.status})"
@@ -0,0 +1,64 @@
+from .encoders import RECORD_FIELDS, rows_to_columns
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+class PaginationError(ValueError):
+    """Raised for malformed cursor, limit or fields query parameters."""
+
+
+def parse_fields(value):
+    """Return the requested record fields, always including id for the cursor."""
+    if not value:
+        return list(RECORD_FIELDS)
+    requested = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in RECORD_FIELDS]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {unknown}")
+    return ['id'] + [f for f in RECORD_FIELDS[1:] if f in requested]
+
+
+def parse_int(value, name, default, minimum=0, maximum=None):
+    if value in (None, ''):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError(f"{name} must be an integer")
+    if number < minimum:
+        raise PaginationError(f"{name} must be at least {minimum}")
+    return min(number, maximum) if maximum else number
+
+
+def keyset_paginate(fetch, request, fields, columnar=False):
+    """Return one page of records ordered by id, starting after ?cursor=<id>.
+
+    fetch(after, limit) returns up to limit tuples of fields with id > after
+    (see RowStorage.page). Unlike OFFSET pagination every page is a single
+    index range scan, so the cost of a page does not grow with how deep into
+    the dataset it is. With columnar=True the page is returned as
+    {field: [values...]} under 'columns'.
+    """
+    cursor = parse_int(request.query_params.get('cursor'), 'cursor', default=0)
+    limit = parse_int(request.query_params.get('limit'), 'limit', default=DEFAULT_PAGE_SIZE,
+                      minimum=1, maximum=MAX_PAGE_SIZE)
+
+    # Fetch one extra row to find out whether another page exists
+    rows = fetch(cursor, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = rows[-1][0] if has_more else None
+    next_url = None
+    if next_cursor is not None:
+        params = request.query_params.copy()
+        params['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    page = {'next_cursor': next_cursor, 'next': next_url}
+    if columnar:
+        page['columns'] = rows_to_columns(rows, fields)
+    else:
+        page['results'] = [dict(zip(fields, row)) for row in rows]
+    return page
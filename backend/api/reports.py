@@ -0,0 +1,377 @@
+import os
+import re
+import logging
+import tempfile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from .compression import upload_suffix
+from .models import Dataset
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Bump when the report layout changes so previously cached PDFs are not served
+REPORT_VERSION = 2
+
+REPORT_MODE_FULL = 'full'
+REPORT_MODE_SUMMARY = 'summary'
+REPORT_MODES = [REPORT_MODE_FULL, REPORT_MODE_SUMMARY]
+
+# Seconds a client is told to wait (Retry-After) before asking again for a
+# report that is still being rendered
+REPORT_RETRY_AFTER = 2
+
+# Records shown by the short summary report
+SUMMARY_RECORD_LIMIT = 20
+
+# Records per table flowable (~one page)
+ROWS_PER_TABLE = 40
+
+MAX_PIE_SLICES = 8
+
+RECORD_HEADER = ['Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+RECORD_COL_WIDTHS = [140, 100, 70, 70, 80]
+TYPE_COL_WIDTHS = [100, 50, 105, 105, 105]
+CHART_COLORS = [
+    colors.HexColor('#1e40af'), colors.HexColor('#f59e0b'), colors.HexColor('#ef4444'),
+    colors.HexColor('#10b981'), colors.HexColor('#8b5cf6'), colors.HexColor('#0891b2'),
+    colors.HexColor('#ec4899'), colors.HexColor('#06b6d4'),
+]
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def report_name(dataset, mode=REPORT_MODE_FULL):
+    """Storage name of the cached PDF, kept next to the dataset's uploaded file."""
+    if dataset.file and dataset.file.name:
+        name = dataset.file.name
+        suffix = upload_suffix(name)
+        stem = name[:-len(suffix)] if suffix else os.path.splitext(name)[0]
+    else:
+        stem = f"uploads/dataset_{dataset.pk}"
+    return f"{stem}_report_{dataset.pk}_{mode}_v{REPORT_VERSION}.pdf"
+
+
+def report_path(dataset, mode=REPORT_MODE_FULL):
+    return default_storage.path(report_name(dataset, mode))
+
+
+class FlowableStream(list):
+    """List of flowables that refills itself from an iterator as ReportLab consumes it.
+
+    SimpleDocTemplate.build() only ever works at the front of its list (checks
+    len(), reads and deletes [0], re-inserts split parts), so keeping a small
+    look-ahead buffer materialized is enough; the rest of the report is never
+    held in memory.
+    """
+
+    def __init__(self, flowables, buffer_size=8):
+        super().__init__()
+        self._source = iter(flowables)
+        self._buffer_size = buffer_size
+
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < self._buffer_size:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+
+def format_average(value):
+    """Format an avg_* summary value, which is None for a column without values."""
+    return 'N/A' if value is None else f"{value:.2f}"
+
+
+def summary_section(dataset, styles):
+    stats = dataset.summary_stats
+    summary_text = f"""
+    <b>Upload Date:</b> {dataset.upload_date.strftime('%Y-%m-%d %H:%M')}<br/>
+    <b>Total Records:</b> {dataset.row_count}<br/>
+    <b>Average Flowrate:</b> {format_average(stats.get('avg_flowrate'))}<br/>
+    <b>Average Pressure:</b> {format_average(stats.get('avg_pressure'))}<br/>
+    <b>Average Temperature:</b> {format_average(stats.get('avg_temperature'))}<br/>
+    """
+    return [Paragraph(summary_text, styles['Normal']), Spacer(1, 12)]
+
+
+def format_stat(stats):
+    """Format one parameter's per-type statistics as 'mean (min-max)'."""
+    if not stats or not stats.get('count'):
+        return '-'
+    return f"{stats['mean']:.2f} ({stats['min']:.1f}-{stats['max']:.1f})"
+
+
+def type_table_section(dataset, styles):
+    """Per-type counts and parameter statistics taken from summary_stats."""
+    equipment_types = dataset.summary_stats.get('equipment_types', {})
+    if not equipment_types:
+        return []
+    by_type = dataset.summary_stats.get('by_type', {})
+
+    table_data = [['Type', 'Count', 'Flowrate', 'Pressure', 'Temperature']]
+    for eq_type, count in equipment_types.items():
+        type_stats = by_type.get(eq_type, {})
+        table_data.append([
+            eq_type,
+            str(count),
+            format_stat(type_stats.get('flowrate')),
+            format_stat(type_stats.get('pressure')),
+            format_stat(type_stats.get('temperature'))
+        ])
+
+    table = Table(table_data, colWidths=TYPE_COL_WIDTHS, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return [
+        Paragraph("Statistics by Equipment Type", styles['Heading2']),
+        Paragraph("Parameter values are shown as mean (min-max).", styles['Normal']),
+        Spacer(1, 6),
+        table,
+        Spacer(1, 12),
+    ]
+
+
+def charts_section(dataset, styles):
+    """Type distribution pie and per-type average bar charts drawn with reportlab.graphics."""
+    equipment_types = dataset.summary_stats.get('equipment_types', {})
+    if not equipment_types:
+        return []
+    by_type = dataset.summary_stats.get('by_type', {})
+
+    # Keep the pie readable: largest types plus an "Other" slice
+    items = list(equipment_types.items())
+    if len(items) > MAX_PIE_SLICES:
+        other = sum(count for _, count in items[MAX_PIE_SLICES - 1:])
+        items = items[:MAX_PIE_SLICES - 1] + [('Other', other)]
+
+    pie_drawing = Drawing(460, 200)
+    pie = Pie()
+    pie.x, pie.y, pie.width, pie.height = 140, 15, 170, 170
+    pie.data = [count for _, count in items]
+    pie.labels = [name for name, _ in items]
+    pie.sideLabels = True
+    for i in range(len(items)):
+        pie.slices[i].fillColor = CHART_COLORS[i % len(CHART_COLORS)]
+    pie_drawing.add(pie)
+
+    elements = [
+        KeepTogether([Paragraph("Equipment Type Distribution", styles['Heading2']), pie_drawing]),
+        Spacer(1, 12),
+    ]
+
+    types = [name for name in equipment_types if name in by_type]
+    if types:
+        bar_drawing = Drawing(460, 220)
+        chart = VerticalBarChart()
+        chart.x, chart.y, chart.width, chart.height = 40, 60, 400, 140
+        chart.data = [
+            [by_type[name].get(field, {}).get('mean', 0) or 0 for name in types]
+            for field in ('flowrate', 'pressure', 'temperature')
+        ]
+        chart.categoryAxis.categoryNames = types
+        chart.categoryAxis.labels.angle = 45
+        chart.categoryAxis.labels.boxAnchor = 'ne'
+        chart.categoryAxis.labels.fontSize = 7
+        chart.valueAxis.valueMin = 0
+        for i, color in enumerate(CHART_COLORS[:3]):
+            chart.bars[i].fillColor = color
+        bar_drawing.add(chart)
+
+        legend = Legend()
+        legend.x, legend.y = 250, 215
+        legend.columnMaximum = 1
+        legend.alignment = 'right'
+        legend.fontSize = 7
+        legend.colorNamePairs = list(zip(CHART_COLORS[:3], ['Flowrate', 'Pressure', 'Temperature']))
+        bar_drawing.add(legend)
+
+        elements += [
+            KeepTogether([
+                Paragraph("Average Parameters by Type", styles['Heading2']),
+                bar_drawing,
+            ]),
+            Spacer(1, 12),
+        ]
+
+    return elements
+
+
+def record_tables(dataset, limit=None):
+    """Yield page-sized Table flowables of equipment records, streamed from the dataset's storage."""
+    records = get_storage(dataset).iter_rows(
+        dataset, ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature'], limit=limit
+    )
+
+    rows = [RECORD_HEADER]
+    for name, eq_type, flowrate, pressure, temperature in records:
+        rows.append([name, eq_type, f"{flowrate:.2f}", f"{pressure:.2f}", f"{temperature:.2f}"])
+        if len(rows) > ROWS_PER_TABLE:
+            yield record_table(rows)
+            rows = [RECORD_HEADER]
+    if len(rows) > 1:
+        yield record_table(rows)
+
+
+def record_table(rows):
+    # Fixed column widths spare ReportLab from measuring every cell
+    table = Table(rows, colWidths=RECORD_COL_WIDTHS, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def report_flowables(dataset, mode):
+    styles = getSampleStyleSheet()
+    yield Paragraph(f"Equipment Report: {dataset.filename}", styles['Title'])
+    yield Spacer(1, 12)
+    yield from summary_section(dataset, styles)
+    yield from type_table_section(dataset, styles)
+    yield from charts_section(dataset, styles)
+
+    if mode == REPORT_MODE_FULL:
+        yield Paragraph(f"Equipment Inventory ({dataset.row_count} records)", styles['Heading2'])
+        yield from record_tables(dataset)
+    else:
+        yield Paragraph(f"Equipment Sample (first {SUMMARY_RECORD_LIMIT} records)", styles['Heading2'])
+        yield from record_tables(dataset, limit=SUMMARY_RECORD_LIMIT)
+
+
+def build_report(dataset, output, mode=REPORT_MODE_FULL):
+    """Render the PDF report for a dataset into a binary file object.
+
+    Flowables are generated lazily, so memory stays bounded even when the
+    full inventory of a 100k+ row dataset is included.
+    """
+    doc = SimpleDocTemplate(output, pagesize=letter, pageCompression=1)
+    doc.build(FlowableStream(report_flowables(dataset, mode)))
+
+
+def render_report(dataset, mode=REPORT_MODE_FULL):
+    """Render the report to disk and return its path.
+
+    The PDF is written to a temporary file in the same directory and renamed
+    into place, so a concurrent download never sees a half-written report.
+    """
+    path = report_path(dataset, mode)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.pdf.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            build_report(dataset, output, mode)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def get_report_path(dataset, mode=REPORT_MODE_FULL):
+    """Return the cached report path, rendering it first on a cache miss."""
+    path = report_path(dataset, mode)
+    if not os.path.exists(path):
+        path = render_report(dataset, mode)
+    return path
+
+
+def prerender_report(dataset_id, mode=REPORT_MODE_FULL):
+    """Worker task: render a dataset's report so downloads are served from the cache.
+
+    Returns the report path, or None if the dataset was deleted meanwhile.
+    Failures are logged and re-raised for the caller of the task's future.
+    """
+    close_old_connections()
+    try:
+        dataset = Dataset.objects.get(pk=dataset_id)
+        return get_report_path(dataset, mode)
+    except Dataset.DoesNotExist:
+        return None
+    except Exception:
+        logger.exception("Report render failed for dataset %s (%s)", dataset_id, mode)
+        raise
+    finally:
+        close_old_connections()
+
+
+def delete_report_file(sender, instance, **kwargs):
+    """Signal receiver: remove the cached reports when their dataset is deleted."""
+    for mode in REPORT_MODES:
+        try:
+            path = report_path(instance, mode)
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+
+
+def _iter_file_range(f, length):
+    try:
+        while length > 0:
+            block = f.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        f.close()
+
+
+def ranged_file_response(request, path, filename, content_type='application/pdf'):
+    """Serve a file as an attachment, answering single `Range: bytes=` requests with 206."""
+    size = os.path.getsize(path)
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+
+    if match and any(match.groups()):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the final N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        f = open(path, 'rb')
+        f.seek(start)
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_file_range(f, length), status=206, content_type=content_type
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .models import Dataset
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION = {
+    # Keep at most this many of the newest datasets
+    'MAX_DATASETS': 5,
+    # Delete datasets uploaded more than this many days ago (None disables)
+    'MAX_AGE_DAYS': None,
+    # Delete the oldest datasets once the kept ones exceed this many rows (None disables)
+    'MAX_TOTAL_ROWS': None,
+    # EquipmentData rows removed per DELETE statement
+    'DELETE_BATCH_SIZE': 10000,
+}
+
+# Seconds before an unfinished ingest is taken to be dead (settings.INGEST_TIMEOUT)
+DEFAULT_INGEST_TIMEOUT = 30 * 60
+
+# Serializes retention runs within this process
+_retention_lock = threading.Lock()
+
+
+class RetentionPolicy:
+    """Which datasets to keep, by count, age and total number of equipment rows."""
+
+    def __init__(self, max_datasets=5, max_age_days=None, max_total_rows=None, delete_batch_size=10000):
+        self.max_datasets = max_datasets
+        self.max_age_days = max_age_days
+        self.max_total_rows = max_total_rows
+        self.delete_batch_size = delete_batch_size
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULT_RETENTION, **getattr(settings, 'DATASET_RETENTION', {})}
+        return cls(
+            max_datasets=config['MAX_DATASETS'],
+            max_age_days=config['MAX_AGE_DAYS'],
+            max_total_rows=config['MAX_TOTAL_ROWS'],
+            delete_batch_size=config['DELETE_BATCH_SIZE'],
+        )
+
+    def select_expired(self):
+        """Return the datasets this policy would delete, oldest last.
+
+        The newest dataset is always kept, even if it alone breaks a limit.
+        """
+        datasets = list(
+            Dataset.objects.order_by('-upload_date')
+            .only('id', 'upload_date', 'row_count', 'file', 'storage', 'data_file')
+        )
+        cutoff = timezone.now() - timedelta(days=self.max_age_days) if self.max_age_days is not None else None
+
+        expired = []
+        kept_rows = 0
+        for position, dataset in enumerate(datasets):
+            if position == 0:
+                kept_rows += dataset.row_count
+                continue
+            too_many = self.max_datasets is not None and position >= self.max_datasets
+            too_old = cutoff is not None and dataset.upload_date < cutoff
+            too_big = self.max_total_rows is not None and kept_rows + dataset.row_count > self.max_total_rows
+            if too_many or too_old or too_big:
+                expired.append(dataset)
+            else:
+                kept_rows += dataset.row_count
+        return expired
+
+
+class RetentionResult:
+    def __init__(self):
+        self.datasets_deleted = 0
+        self.rows_deleted = 0
+        self.files_deleted = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'datasets_deleted': self.datasets_deleted,
+            'rows_deleted': self.rows_deleted,
+            'files_deleted': self.files_deleted,
+            'seconds': round(self.seconds, 3),
+        }
+
+    def __str__(self):
+        return (
+            f"deleted {self.datasets_deleted} datasets, {self.rows_deleted} rows and "
+            f"{self.files_deleted} files in {self.seconds:.2f} s"
+        )
+
+
+def delete_dataset(dataset, batch_size=10000):
+    """Delete one dataset: its records (in batches for row storage), then the Dataset row, then its file.
+
+    Returns (rows_deleted, file_deleted).
+    """
+    rows = get_storage(dataset).delete_records(dataset, batch_size)
+    # The Dataset row goes through the ORM so post_delete receivers (response
+    # cache, rendered reports) still run.
+    dataset.delete()
+
+    file_deleted = False
+    if dataset.file and dataset.file.name:
+        try:
+            dataset.file.delete(save=False)
+            file_deleted = True
+        except Exception:
+            pass
+    return rows, file_deleted
+
+
+def ingest_cutoff():
+    """Creation time before which a dataset that is still incomplete counts as abandoned."""
+    timeout = getattr(settings, 'INGEST_TIMEOUT', DEFAULT_INGEST_TIMEOUT)
+    return timezone.now() - timedelta(seconds=timeout)
+
+
+def abandoned_datasets():
+    """Incomplete datasets whose ingest has run longer than INGEST_TIMEOUT, i.e. died part way."""
+    return Dataset.all_objects.filter(is_complete=False, upload_date__lt=ingest_cutoff())
+
+
+def apply_retention(policy=None):
+    """Delete every dataset the policy expires, and abandoned partial ones, and report what was removed."""
+    policy = policy or RetentionPolicy.from_settings()
+    result = RetentionResult()
+    start = time.perf_counter()
+
+    with _retention_lock:
+        for dataset in [*abandoned_datasets(), *policy.select_expired()]:
+            rows, file_deleted = delete_dataset(dataset, policy.delete_batch_size)
+            result.datasets_deleted += 1
+            result.rows_deleted += rows
+            result.files_deleted += int(file_deleted)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def run_retention():
+    """Worker task: apply the configured retention policy outside the request path."""
+    close_old_connections()
+    try:
+        result = apply_retention()
+        if result.datasets_deleted:
+            logger.info("Retention: %s", result)
+        return result
+    except Exception:
+        logger.exception("Retention failed")
+    finally:
+        close_old_connections()
@@ -1,5 +1,7 @@
+import time
 from rest_framework import serializers
-from .models import Dataset, EquipmentData
+from .models import Dataset, EquipmentData, UploadJob, UploadSession
+from .jobs import get_live_progress
 
 class EquipmentDataSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,4 +18,40 @@ class DatasetSerializer(serializers.ModelSerializer):
 class DatasetListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dataset
-        fields = ['id', 'filename', 'upload_date', 'row_count', 'summary_stats']
\ No newline at end of file
+        fields = ['id', 'filename', 'upload_date', 'row_count', 'summary_stats']
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    rows_processed = serializers.SerializerMethodField()
+    elapsed_seconds = serializers.SerializerMethodField()
+    rows_per_second = serializers.SerializerMethodField()
+    dataset_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = UploadJob
+        fields = [
+            'id', 'filename', 'status', 'rows_processed', 'elapsed_seconds', 'rows_per_second',
+            'dataset_id', 'content_hash', 'deduplicated', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+
+    def get_rows_processed(self, job):
+        live = get_live_progress(job.pk)
+        return live[0] if live else job.rows_processed
+
+    def get_elapsed_seconds(self, job):
+        live = get_live_progress(job.pk)
+        if live:
+            return round(time.monotonic() - live[1], 3)
+        if job.started_at and job.finished_at:
+            return round((job.finished_at - job.started_at).total_seconds(), 3)
+        return 0.0
+
+    def get_rows_per_second(self, job):
+        elapsed = self.get_elapsed_seconds(job)
+        return round(self.get_rows_processed(job) / elapsed, 1) if elapsed else 0.0
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    job = UploadJobSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'status', 'job', 'created_at', 'updated_at']
@@ -0,0 +1,160 @@
+import math
+import numpy as np
+
+# CSV column -> EquipmentData field for every numeric equipment parameter
+PARAMETERS = {
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+QUANTILES = {'p05': 0.05, 'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p95': 0.95}
+
+
+class TDigest:
+    """Mergeable approximate quantile sketch (t-digest with the k1 scale function).
+
+    Centroids are compressed with NumPy after every batch instead of one value
+    at a time, so the digest never holds more than about `compression` centroids
+    regardless of how many values are added.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        """Add an array of values."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self._merge(values, np.ones(values.size))
+
+    def merge(self, other):
+        """Fold another digest into this one."""
+        if other.means.size:
+            self._merge(other.means, other.weights)
+
+    def _merge(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        mid = (np.cumsum(weights) - weights / 2) / total
+        # k1 scale: centroids are small near the tails and large near the median
+        k = self.compression * (np.arcsin(2 * mid - 1) / math.pi + 0.5)
+        cluster = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        if not self.means.size:
+            return float('nan')
+        if self.means.size == 1:
+            return float(self.means[0])
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), positions, self.means))
+
+
+class ColumnStats:
+    """One-pass count, mean, variance (Welford/Chan merge), min, max and quantiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.digest = TDigest()
+
+    def update(self, values):
+        """Fold a chunk of values into the running statistics."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        n = values.size
+        if not n:
+            return
+
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.digest.update(values)
+
+    @property
+    def variance(self):
+        """Sample variance, matching pandas' default ddof=1."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def result(self):
+        if not self.count:
+            return {'count': 0}
+        stats = {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance,
+            'std': math.sqrt(self.variance),
+            'min': self.min,
+            'max': self.max,
+        }
+        for key, q in QUANTILES.items():
+            stats[key] = self.digest.quantile(q)
+        return stats
+
+
+class SummaryAggregator:
+    """Fold DataFrame chunks into the summary statistics stored on Dataset.summary_stats.
+
+    Statistics are kept for every parameter over the whole dataset and per
+    equipment type, so each uploaded row is looked at exactly once.
+    """
+
+    def __init__(self):
+        self.total_count = 0
+        self.columns = {field: ColumnStats() for field in PARAMETERS.values()}
+        self.by_type = {}
+
+    def update(self, df):
+        """Add one chunk of rows to the running statistics."""
+        self.total_count += int(len(df))
+        for column, field in PARAMETERS.items():
+            self.columns[field].update(df[column].to_numpy(dtype=float, na_value=np.nan))
+
+        types = df['Type'].astype(str).str.strip()
+        for eq_type, group in df.groupby(types, sort=False):
+            type_stats = self.by_type.setdefault(eq_type, {
+                'count': 0,
+                'columns': {field: ColumnStats() for field in PARAMETERS.values()},
+            })
+            type_stats['count'] += int(len(group))
+            for column, field in PARAMETERS.items():
+                type_stats['columns'][field].update(group[column].to_numpy(dtype=float, na_value=np.nan))
+
+    def result(self):
+        summary = {'total_count': self.total_count}
+        for field, stats in self.columns.items():
+            # None (JSON null) when the column has no values: NaN is not valid JSON
+            summary[f'avg_{field}'] = stats.mean if stats.count else None
+
+        ordered_types = sorted(self.by_type.items(), key=lambda item: item[1]['count'], reverse=True)
+        summary['equipment_types'] = {eq_type: stats['count'] for eq_type, stats in ordered_types}
+        summary['columns'] = {field: stats.result() for field, stats in self.columns.items()}
+        summary['by_type'] = {
+            eq_type: {
+                'count': stats['count'],
+                **{field: col.result() for field, col in stats['columns'].items()},
+            }
+            for eq_type, stats in ordered_types
+        }
+        return summary
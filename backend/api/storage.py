@@ -0,0 +1,342 @@
+import os
+import tempfile
+from itertools import islice
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max, Min
+from .encoders import RECORD_FIELDS, rows_to_columns
+from .models import Dataset, EquipmentData
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only the Parquet storage engine needs it
+    pa = None
+    pc = None
+    pq = None
+
+# Rows per Parquet row group. Row groups carry min/max id statistics, so a
+# records page only decodes the group(s) its cursor falls into; smaller groups
+# make pages cheaper at a small cost in compression.
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Rows fetched per round trip when streaming records for reports
+ITER_CHUNK_SIZE = 2000
+
+# Rows converted from database tuples to a DataFrame at a time by read_frame
+FRAME_CHUNK_SIZE = 50000
+
+
+def aggregate_stats(group, field):
+    """Pick one field's {count, mean, min, max} out of a flat aggregate row."""
+    return {
+        'count': group[f'{field}_count'],
+        'mean': group[f'{field}_mean'],
+        'min': group[f'{field}_min'],
+        'max': group[f'{field}_max'],
+    }
+
+
+class RowStorage:
+    """Equipment records stored as one EquipmentData row each."""
+
+    name = Dataset.STORAGE_ROWS
+
+    def queryset(self, dataset, equipment_type=None):
+        records = EquipmentData.objects.filter(dataset_id=dataset.pk)
+        if equipment_type:
+            records = records.filter(equipment_type=equipment_type)
+        return records
+
+    def read_columns(self, dataset, fields=RECORD_FIELDS):
+        """Return every record as {field: [values...]}, ordered by id."""
+        rows = list(self.queryset(dataset).order_by('id').values_list(*fields))
+        return rows_to_columns(rows, fields)
+
+    def read_records(self, dataset, fields=RECORD_FIELDS):
+        """Return every record as a dict, ordered by id."""
+        return list(self.queryset(dataset).order_by('id').values(*fields))
+
+    def read_frame(self, dataset, fields=RECORD_FIELDS):
+        """Return every record as a pandas DataFrame, ordered by id.
+
+        The rows go straight from the database cursor into frames of
+        FRAME_CHUNK_SIZE rows (as pandas.read_sql does with chunksize), so
+        only one chunk of Python tuples exists at a time and numeric columns
+        are packed into float arrays as they arrive.
+        """
+        sql, params = self.queryset(dataset).order_by('id').values_list(*fields).query.sql_with_params()
+        columns = list(fields)
+        frames = []
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            while rows := cursor.fetchmany(FRAME_CHUNK_SIZE):
+                frames.append(pd.DataFrame.from_records(rows, columns=columns, coerce_float=True))
+        if not frames:
+            return pd.DataFrame.from_records([], columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def read_series(self, dataset, field):
+        """Return (ids, values) NumPy arrays of one numeric field, ordered by id."""
+        rows = list(self.queryset(dataset).order_by('id').values_list('id', field))
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        values = np.fromiter(
+            (np.nan if row[1] is None else row[1] for row in rows), dtype=float, count=len(rows)
+        )
+        return ids, values
+
+    def iter_rows(self, dataset, fields, limit=None):
+        """Stream records as tuples ordered by id without loading them all."""
+        records = self.queryset(dataset).order_by('id').values_list(*fields)
+        if limit:
+            records = records[:limit]
+        return records.iterator(chunk_size=ITER_CHUNK_SIZE)
+
+    def page(self, dataset, fields, after, limit, equipment_type=None):
+        """Return up to limit record tuples with id > after, ordered by id."""
+        records = self.queryset(dataset, equipment_type).filter(id__gt=after).order_by('id')
+        return list(records.values_list(*fields)[:limit])
+
+    def aggregate_by_type(self, dataset, fields):
+        """Count/mean/min/max of fields per equipment type, with one GROUP BY query."""
+        annotations = {'rows': Count('id')}
+        for field in fields:
+            annotations.update({
+                f'{field}_count': Count(field),
+                f'{field}_mean': Avg(field),
+                f'{field}_min': Min(field),
+                f'{field}_max': Max(field),
+            })
+        groups = self.queryset(dataset).values('equipment_type').annotate(**annotations).order_by()
+        return [
+            {
+                'equipment_type': group['equipment_type'],
+                'count': group['rows'],
+                **{field: aggregate_stats(group, field) for field in fields},
+            }
+            for group in groups
+        ]
+
+    def delete_records(self, dataset, batch_size=10000):
+        """Delete the records with raw DELETEs over id ranges of the (dataset, id) index.
+
+        Each batch commits on its own, so the write lock is released between
+        batches and readers or a concurrent ingest are not stalled by one huge
+        DELETE. Returns the number of rows deleted.
+        """
+        table = connection.ops.quote_name(EquipmentData._meta.db_table)
+        sql = f"DELETE FROM {table} WHERE dataset_id = %s AND id >= %s AND id <= %s"
+        deleted = 0
+
+        while True:
+            ids = list(
+                self.queryset(dataset).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return deleted
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [dataset.pk, ids[0], ids[-1]])
+                deleted += cursor.rowcount
+
+
+class ParquetStorage:
+    """Equipment records stored column-wise in one compressed Parquet file per dataset.
+
+    Record ids are the 1-based row positions written to an `id` column, so
+    keyset cursors work the same as with EquipmentData rows. Files are opened
+    memory-mapped and only the requested columns are decoded.
+    """
+
+    name = Dataset.STORAGE_PARQUET
+
+    def __init__(self):
+        if pa is None:
+            raise ImproperlyConfigured("The 'parquet' dataset storage requires pyarrow")
+
+    def schema(self):
+        return pa.schema([
+            ('id', pa.int64()),
+            ('equipment_name', pa.string()),
+            ('equipment_type', pa.string()),
+            ('flowrate', pa.float64()),
+            ('pressure', pa.float64()),
+            ('temperature', pa.float64()),
+        ])
+
+    def writer(self, dataset):
+        return ParquetDatasetWriter(dataset, self.schema())
+
+    def path(self, dataset):
+        return default_storage.path(dataset.data_file.name)
+
+    def read_table(self, dataset, fields):
+        return pq.read_table(self.path(dataset), columns=list(fields), memory_map=True)
+
+    def read_columns(self, dataset, fields=RECORD_FIELDS):
+        """Return every record as {field: [values...]}, ordered by id."""
+        return self.read_table(dataset, fields).to_pydict()
+
+    def read_records(self, dataset, fields=RECORD_FIELDS):
+        """Return every record as a dict, ordered by id."""
+        return self.read_table(dataset, fields).to_pylist()
+
+    def read_frame(self, dataset, fields=RECORD_FIELDS):
+        """Return every record as a pandas DataFrame, ordered by id."""
+        return self.read_table(dataset, fields).to_pandas()
+
+    def read_series(self, dataset, field):
+        """Return (ids, values) NumPy arrays of one numeric field, ordered by id."""
+        table = self.read_table(dataset, ['id', field])
+        ids = table.column('id').to_numpy()
+        values = table.column(field).to_numpy(zero_copy_only=False).astype(float, copy=False)
+        return ids, values
+
+    def iter_rows(self, dataset, fields, limit=None):
+        """Stream records as tuples ordered by id, one record batch at a time."""
+        rows = self._iter_rows(dataset, fields)
+        return islice(rows, limit) if limit else rows
+
+    def _iter_rows(self, dataset, fields):
+        parquet_file = pq.ParquetFile(self.path(dataset), memory_map=True)
+        try:
+            for batch in parquet_file.iter_batches(batch_size=ITER_CHUNK_SIZE, columns=list(fields)):
+                yield from zip(*(column.to_pylist() for column in batch.columns))
+        finally:
+            parquet_file.close()
+
+    def page(self, dataset, fields, after, limit, equipment_type=None):
+        """Return up to limit record tuples with id > after, ordered by id.
+
+        Row groups whose id statistics end at or before the cursor are skipped
+        and batches are decoded only until the page is full.
+        """
+        columns = list(fields)
+        if equipment_type and 'equipment_type' not in columns:
+            columns.append('equipment_type')
+
+        parquet_file = pq.ParquetFile(self.path(dataset), memory_map=True)
+        try:
+            metadata = parquet_file.metadata
+            id_index = parquet_file.schema_arrow.get_field_index('id')
+            row_groups = [
+                index for index in range(metadata.num_row_groups)
+                if metadata.row_group(index).column(id_index).statistics.max > after
+            ]
+            rows = []
+            for batch in parquet_file.iter_batches(batch_size=max(limit, ITER_CHUNK_SIZE),
+                                                   row_groups=row_groups, columns=columns):
+                mask = pc.greater(batch.column('id'), after)
+                if equipment_type:
+                    mask = pc.and_(mask, pc.equal(batch.column('equipment_type'), equipment_type))
+                batch = batch.filter(mask).slice(0, limit - len(rows))
+                rows.extend(zip(*(batch.column(field).to_pylist() for field in fields)))
+                if len(rows) >= limit:
+                    break
+            return rows
+        finally:
+            parquet_file.close()
+
+    def aggregate_by_type(self, dataset, fields):
+        """Count/mean/min/max of fields per equipment type, grouped by Arrow."""
+        table = self.read_table(dataset, ['equipment_type'] + list(fields))
+        aggregations = [('equipment_type', 'count')]
+        for field in fields:
+            aggregations += [(field, 'count'), (field, 'mean'), (field, 'min'), (field, 'max')]
+        groups = table.group_by('equipment_type').aggregate(aggregations).to_pylist()
+        return [
+            {
+                'equipment_type': group['equipment_type'],
+                'count': group['equipment_type_count'],
+                **{field: aggregate_stats(group, field) for field in fields},
+            }
+            for group in groups
+        ]
+
+    def delete_records(self, dataset, batch_size=None):
+        """Remove the dataset's Parquet file and return how many records it held."""
+        if dataset.data_file:
+            dataset.data_file.delete(save=False)
+        return dataset.row_count
+
+
+class ParquetDatasetWriter:
+    """Append DataFrame chunks to a dataset's Parquet file.
+
+    Rows are written to a temporary file that only replaces the final path
+    in close(), so readers never see a half-written dataset.
+    """
+
+    def __init__(self, dataset, schema):
+        self.name = f"datasets/dataset_{dataset.pk}.parquet"
+        self.path = default_storage.path(self.name)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.parquet.tmp')
+        os.close(fd)
+        self.schema = schema
+        self.writer = pq.ParquetWriter(
+            self.tmp_path, schema,
+            compression=getattr(settings, 'PARQUET_COMPRESSION', 'zstd'),
+        )
+        self.next_id = 1
+
+    def write(self, df):
+        count = len(df)
+        table = pa.table({
+            'id': np.arange(self.next_id, self.next_id + count, dtype=np.int64),
+            'equipment_name': df['Equipment Name'].astype(str).str.strip(),
+            'equipment_type': df['Type'].astype(str).str.strip(),
+            'flowrate': df['Flowrate'].astype(float),
+            'pressure': df['Pressure'].astype(float),
+            'temperature': df['Temperature'].astype(float),
+        }, schema=self.schema)
+        self.writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        self.next_id += count
+        return count
+
+    def close(self):
+        """Finish the file, move it into place and return its storage name."""
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+        return self.name
+
+    def abort(self):
+        if self.writer.is_open:
+            self.writer.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+STORAGE_ENGINES = {
+    Dataset.STORAGE_ROWS: RowStorage,
+    Dataset.STORAGE_PARQUET: ParquetStorage,
+}
+
+
+def default_storage_engine():
+    """Storage engine for new datasets, from settings.DATASET_STORAGE."""
+    engine = getattr(settings, 'DATASET_STORAGE', Dataset.STORAGE_ROWS)
+    if engine not in STORAGE_ENGINES:
+        raise ImproperlyConfigured(f"Unknown DATASET_STORAGE: {engine!r}")
+    return engine
+
+
+def get_storage(dataset):
+    """Return the storage engine holding a dataset's equipment records."""
+    return STORAGE_ENGINES[dataset.storage]()
+
+
+def delete_data_file(sender, instance, **kwargs):
+    """Signal receiver: remove a deleted dataset's Parquet file."""
+    if instance.data_file:
+        try:
+            instance.data_file.delete(save=False)
+        except Exception:
+            pass
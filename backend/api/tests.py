@@ -1,3 +1,986 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import math
+import os
+import tempfile
+import unittest
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
+import pandas as pd
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.utils import timezone
+from .cache import dataset_key, get_cache
+from .compare import compare_equipment
+from .compression import ZSTD, ContentHasher, DecompressedSizeError, zstandard
+from .db import get_ingest_backend, get_sqlite_pragmas
+from .downsample import LTTB, MINMAX, downsample
+from .ingest import ingest_csv, ingest_dataframe
+from .utils import process_csv_file
+from .management.commands.bench_ingest import make_dataframe
+from .management.commands.bench_queries import query_plans
+from .models import Dataset, EquipmentData, UploadJob, UploadSession
+from .jobs import run_upload_job, wait_for_duplicate
+from .reports import REPORT_RETRY_AFTER, build_report, report_path
+from .retention import RetentionPolicy, apply_retention
+from .stats import PARAMETERS
+from .storage import get_storage, pq
 
-# Create your tests here.
+HEADER = b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+
+
+def frame_csv(frame):
+    return frame.to_csv(index=False).encode()
+
+
+class TemporaryMediaMixin:
+    """Store uploads, Parquet files and rendered reports under a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class SynchronousJobsMixin(TemporaryMediaMixin):
+    """Queue upload jobs in self.queued and run them in the test with run_queued_jobs().
+
+    Report pre-rendering and retention, which run_upload_job hands to the
+    worker pool, are left out.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.queued = []
+        for target, kwargs in [
+            ('api.views.submit_upload_job', {'side_effect': self.queued.append}),
+            ('api.uploads.submit_upload_job', {'side_effect': self.queued.append}),
+            ('api.jobs.submit_report', {}),
+            ('api.jobs.executor', {}),
+            ('api.views.executor', {}),
+            # Each job closes its connection; keep the test's transaction open
+            ('api.jobs.close_old_connections', {}),
+        ]:
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_queued_jobs(self):
+        while self.queued:
+            run_upload_job(self.queued.pop(0).pk)
+
+    def upload(self, content, name='upload.csv', **extra):
+        """POST a file to /api/upload/ and run the job it queued."""
+        response = self.client.post('/api/upload/', {'file': SimpleUploadedFile(name, content)}, **extra)
+        self.run_queued_jobs()
+        return response
+
+    def job(self, response):
+        return self.client.get(f"/api/jobs/{response.json()['id']}/").json()
+
+
+class ResponseCacheMixin:
+    """Start from an empty API response cache; dataset ids are reused between tests."""
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+
+    def make_dataset(self, rows=20, seed=0, filename='cached.csv'):
+        """Ingest a synthetic dataset, running the cache invalidation queued for commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset = Dataset.objects.create(filename=filename, row_count=0, summary_stats={})
+            ingest_dataframe(make_dataframe(rows, seed=seed), dataset)
+        dataset.refresh_from_db()
+        return dataset
+
+
+class SummaryAssertions:
+    def assertSummaryMatches(self, dataset, frame):
+        """The dataset holds frame's rows, and its summary_stats agree with pandas over the whole frame."""
+        dataset.refresh_from_db()
+        stats = dataset.summary_stats
+        self.assertTrue(dataset.is_complete)
+        self.assertEqual(dataset.row_count, len(frame))
+        self.assertEqual(get_storage(dataset).read_frame(dataset, ['id']).shape[0], len(frame))
+        self.assertEqual(stats['total_count'], len(frame))
+        self.assertEqual(stats['equipment_types'], frame['Type'].value_counts().to_dict())
+        for column, field in PARAMETERS.items():
+            self.assertAlmostEqual(stats[f'avg_{field}'], frame[column].mean())
+            self.assertAlmostEqual(stats['columns'][field]['std'], frame[column].std())
+            self.assertEqual(stats['columns'][field]['min'], frame[column].min())
+            self.assertEqual(stats['columns'][field]['max'], frame[column].max())
+
+
+class EmptyDatasetTests(TestCase):
+    """A header-only CSV stores null averages and every reader copes with them."""
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='empty.csv', row_count=0, summary_stats={})
+        ingest_csv(io.BytesIO(HEADER), self.dataset)
+        self.dataset.refresh_from_db()
+
+    def test_averages_are_null(self):
+        self.assertEqual(self.dataset.row_count, 0)
+        for field in PARAMETERS.values():
+            self.assertIsNone(self.dataset.summary_stats[f'avg_{field}'])
+
+    def test_summary_endpoint(self):
+        response = self.client.get('/api/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['summary_stats']['avg_flowrate'])
+
+    def test_report_renders(self):
+        output = io.BytesIO()
+        build_report(self.dataset, output)
+        self.assertTrue(output.getvalue().startswith(b'%PDF'))
+
+
+class StreamingIngestTests(SummaryAssertions, TestCase):
+    """CSV uploads are parsed and summarized chunk by chunk."""
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='stream.csv', row_count=0, summary_stats={})
+
+    def test_chunks_match_whole_frame(self):
+        frame = make_dataframe(1000)
+        chunk_sizes = []
+        ingest_csv(io.BytesIO(frame_csv(frame)), self.dataset, chunksize=64, progress=chunk_sizes.append)
+        # One progress report per chunk, with the running row count
+        self.assertEqual(chunk_sizes, [*range(64, 1000, 64), 1000])
+        self.assertSummaryMatches(self.dataset, frame)
+
+    def test_records_are_stored_trimmed(self):
+        ingest_csv(io.BytesIO(HEADER + b' P-1 , Pump ,1.5,2.5,3.5\n'), self.dataset)
+        record = EquipmentData.objects.get(dataset=self.dataset)
+        self.assertEqual((record.equipment_name, record.equipment_type), ('P-1', 'Pump'))
+        self.assertEqual((record.flowrate, record.pressure, record.temperature), (1.5, 2.5, 3.5))
+
+    def test_missing_column(self):
+        with self.assertRaisesRegex(ValueError, 'Temperature'):
+            ingest_csv(io.BytesIO(b'Equipment Name,Type,Flowrate,Pressure\nP-1,Pump,1,2\n'), self.dataset)
+
+
+class UploadJobTests(SynchronousJobsMixin, SummaryAssertions, TestCase):
+    """Uploads are queued as jobs whose progress and outcome are polled from /api/jobs/<id>/."""
+
+    def test_upload_is_queued(self):
+        response = self.client.post('/api/upload/', {'file': SimpleUploadedFile('q.csv', frame_csv(make_dataframe(10)))})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertEqual(self.job(response)['status'], 'queued')
+        self.assertEqual(len(self.queued), 1)
+
+    def test_job_reports_progress_and_result(self):
+        frame = make_dataframe(500)
+        polled = []
+
+        def ingest_and_poll(csv_file, dataset, progress=None, compression=None):
+            progress(123)
+            polled.append(self.job(response))
+            return process_csv_file(csv_file, dataset, progress=progress, compression=compression)
+
+        response = self.client.post('/api/upload/', {'file': SimpleUploadedFile('p.csv', frame_csv(frame))})
+        with mock.patch('api.jobs.process_csv_file', side_effect=ingest_and_poll):
+            self.run_queued_jobs()
+
+        self.assertEqual((polled[0]['status'], polled[0]['rows_processed']), ('running', 123))
+        job = self.job(response)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['rows_processed'], 500)
+        self.assertSummaryMatches(Dataset.objects.get(pk=job['dataset_id']), frame)
+
+    def test_failed_job(self):
+        response = self.upload(b'Equipment Name,Type\nP-1,Pump\n')
+        job = self.job(response)
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('Missing columns', job['error'])
+        self.assertIsNone(job['dataset_id'])
+        # The partial dataset is removed, so the content can be uploaded again
+        self.assertFalse(Dataset.all_objects.exists())
+
+    def test_unknown_job(self):
+        response = self.client.get('/api/jobs/00000000-0000-0000-0000-000000000000/')
+        self.assertEqual(response.status_code, 404)
+
+
+class DeduplicationTests(SynchronousJobsMixin, TestCase):
+    """Re-uploading content that is already a dataset reuses it instead of ingesting again."""
+
+    CSV = frame_csv(make_dataframe(200))
+
+    def test_hash_is_of_the_content(self):
+        response = self.upload(self.CSV)
+        self.assertEqual(response.json()['content_hash'], hashlib.sha256(self.CSV).hexdigest())
+
+    def test_repeat_upload_reuses_dataset(self):
+        first = self.job(self.upload(self.CSV, name='first.csv'))
+        original_date = Dataset.objects.get().upload_date
+
+        response = self.upload(self.CSV, name='second.csv')
+        self.assertEqual(response.status_code, 200)
+        second = response.json()
+        self.assertTrue(second['deduplicated'])
+        self.assertEqual(second['status'], 'succeeded')
+        self.assertEqual(second['dataset_id'], first['dataset_id'])
+        self.assertEqual(second['rows_processed'], 200)
+        self.assertEqual(self.queued, [])
+        # The reused dataset becomes the latest one
+        self.assertEqual(Dataset.objects.count(), 1)
+        self.assertGreater(Dataset.objects.get().upload_date, original_date)
+
+    def test_compressed_upload_matches_plain_csv(self):
+        first = self.job(self.upload(self.CSV))
+        second = self.upload(gzip.compress(self.CSV), name='again.csv.gz').json()
+        self.assertTrue(second['deduplicated'])
+        self.assertEqual(second['dataset_id'], first['dataset_id'])
+
+    def test_different_content_is_ingested(self):
+        self.upload(self.CSV)
+        response = self.upload(frame_csv(make_dataframe(200, seed=1)))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Dataset.objects.count(), 2)
+
+
+class ConcurrentDuplicateTests(SynchronousJobsMixin, TransactionTestCase):
+    """Two uploads of the same content queued before either ran end up sharing one dataset."""
+
+    def test_second_job_reuses_first_dataset(self):
+        content = frame_csv(make_dataframe(50))
+        for name in ('a.csv', 'b.csv'):
+            self.client.post('/api/upload/', {'file': SimpleUploadedFile(name, content)})
+        jobs = list(self.queued)
+        self.run_queued_jobs()
+
+        first, second = (UploadJob.objects.get(pk=job.pk) for job in jobs)
+        self.assertEqual((first.status, second.status), ('succeeded', 'succeeded'))
+        self.assertFalse(first.deduplicated)
+        self.assertTrue(second.deduplicated)
+        self.assertEqual(second.dataset_id, first.dataset_id)
+        self.assertEqual(Dataset.all_objects.count(), 1)
+
+
+class ResumableUploadTests(SynchronousJobsMixin, SummaryAssertions, TestCase):
+    """Chunked upload sessions: PUT chunks at the acknowledged offset, resume after a failure, complete."""
+
+    FRAME = make_dataframe(300)
+    CSV = frame_csv(FRAME)
+
+    def create(self, size=None, filename='big.csv'):
+        response = self.client.post('/api/uploads/', {'filename': filename, 'size': size or len(self.CSV)},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def put(self, session_id, offset, data):
+        return self.client.put(f'/api/uploads/{session_id}/chunk/?offset={offset}', data,
+                               content_type='application/octet-stream')
+
+    def complete(self, session_id):
+        return self.client.post(f'/api/uploads/{session_id}/complete/')
+
+    def test_chunks_complete_to_a_dataset(self):
+        session_id = self.create()
+        for offset in range(0, len(self.CSV), 4096):
+            response = self.put(session_id, offset, self.CSV[offset:offset + 4096])
+            self.assertEqual(response.json()['offset'], min(offset + 4096, len(self.CSV)))
+
+        response = self.complete(session_id)
+        self.assertEqual(response.status_code, 202)
+        self.run_queued_jobs()
+        job = self.job(response)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertSummaryMatches(Dataset.objects.get(pk=job['dataset_id']), self.FRAME)
+        # Completing again hands back the same job
+        self.assertEqual(self.complete(session_id).json()['id'], job['id'])
+
+    def test_resume_after_offset_mismatch(self):
+        session_id = self.create()
+        self.put(session_id, 0, self.CSV[:1000])
+
+        # A chunk that skips ahead, or repeats one already acknowledged, gets the offset to resume from
+        for offset in (2000, 0):
+            response = self.put(session_id, offset, self.CSV[offset:offset + 1000])
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['offset'], 1000)
+        self.assertEqual(self.client.get(f'/api/uploads/{session_id}/').json()['offset'], 1000)
+
+        self.put(session_id, 1000, self.CSV[1000:])
+        self.assertEqual(self.complete(session_id).status_code, 202)
+
+    def test_incomplete_upload_cannot_complete(self):
+        session_id = self.create()
+        self.put(session_id, 0, self.CSV[:1000])
+        response = self.complete(session_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('incomplete', response.json()['error'])
+
+    def test_chunk_past_declared_size(self):
+        session_id = self.create(size=100)
+        self.assertEqual(self.put(session_id, 0, self.CSV[:200]).status_code, 400)
+
+    @override_settings(UPLOAD_MAX_CHUNK_SIZE=1024)
+    def test_chunk_too_large(self):
+        session_id = self.create()
+        self.assertEqual(self.put(session_id, 0, self.CSV[:2048]).status_code, 400)
+
+    def test_abort(self):
+        session_id = self.create()
+        self.put(session_id, 0, self.CSV[:1000])
+        partial = UploadSession.objects.get(pk=session_id).partial_name
+        self.assertEqual(self.client.delete(f'/api/uploads/{session_id}/').status_code, 204)
+        self.assertFalse(default_storage.exists(partial))
+        self.assertEqual(self.put(session_id, 1000, self.CSV[1000:2000]).status_code, 404)
+
+    def test_only_csv(self):
+        response = self.client.post('/api/uploads/', {'filename': 'data.xlsx'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CompressedUploadTests(SynchronousJobsMixin, SummaryAssertions, TestCase):
+    """gzip/zstd compressed CSV files and Content-Encoding request bodies are decompressed as they stream."""
+
+    FRAME = make_dataframe(400)
+    CSV = frame_csv(FRAME)
+
+    def assertIngested(self, response):
+        job = self.job(response)
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        self.assertSummaryMatches(Dataset.objects.get(pk=job['dataset_id']), self.FRAME)
+
+    def test_gzip_file(self):
+        self.assertIngested(self.upload(gzip.compress(self.CSV), name='data.csv.gz'))
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_file(self):
+        self.assertIngested(self.upload(zstandard.ZstdCompressor().compress(self.CSV), name='data.csv.zst'))
+
+    def test_gzip_request_body(self):
+        body = encode_multipart(BOUNDARY, {'file': SimpleUploadedFile('data.csv', self.CSV)})
+        response = self.client.generic('POST', '/api/upload/', gzip.compress(body), content_type=MULTIPART_CONTENT,
+                                       HTTP_CONTENT_ENCODING='gzip')
+        self.run_queued_jobs()
+        self.assertIngested(response)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_chunk(self):
+        session_id = self.client.post('/api/uploads/', {'filename': 'data.csv'},
+                                      content_type='application/json').json()['id']
+        response = self.client.put(f'/api/uploads/{session_id}/chunk/?offset=0',
+                                   zstandard.ZstdCompressor().compress(self.CSV),
+                                   content_type='application/octet-stream', HTTP_CONTENT_ENCODING='zstd')
+        # The acknowledged offset counts decompressed bytes
+        self.assertEqual(response.json()['offset'], len(self.CSV))
+        response = self.client.post(f'/api/uploads/{session_id}/complete/')
+        self.run_queued_jobs()
+        self.assertIngested(response)
+
+    def test_unsupported_encoding(self):
+        response = self.client.post('/api/upload/', b'data', content_type='application/octet-stream',
+                                    HTTP_CONTENT_ENCODING='compress')
+        self.assertEqual(response.status_code, 415)
+
+    def test_corrupt_gzip_fails_the_job(self):
+        job = self.job(self.upload(b'not gzip at all', name='broken.csv.gz'))
+        self.assertEqual(job['status'], 'failed')
+        self.assertFalse(Dataset.all_objects.exists())
+
+
+class RecordPaginationTests(TestCase):
+    """/records/ pages walk the dataset in id order, resuming after ?cursor=<last id>."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.frame = make_dataframe(25)
+        cls.dataset = Dataset.objects.create(filename='pages.csv', row_count=0, summary_stats={})
+        ingest_dataframe(cls.frame, cls.dataset)
+
+    def records(self, **params):
+        return self.client.get(f'/api/dataset/{self.dataset.pk}/records/', params)
+
+    def walk(self, **params):
+        pages, cursor = [], None
+        while True:
+            page = self.records(**params, **({'cursor': cursor} if cursor is not None else {})).json()
+            pages.append(page)
+            cursor = page['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_cursor_round_trip(self):
+        pages = self.walk(limit=10)
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        ids = [record['id'] for page in pages for record in page['results']]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual([record['equipment_name'] for page in pages for record in page['results']],
+                         list(self.frame['Equipment Name']))
+        # Each cursor is the last id of its page, and its next link resumes there
+        self.assertEqual(pages[0]['next_cursor'], pages[0]['results'][-1]['id'])
+        self.assertIn(f"cursor={pages[0]['next_cursor']}", pages[0]['next'])
+        self.assertIsNone(pages[-1]['next'])
+
+    def test_exact_final_page(self):
+        pages = self.walk(limit=25)
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(len(pages[0]['results']), 25)
+
+    def test_fields(self):
+        page = self.records(fields='pressure,equipment_name', limit=3).json()
+        self.assertEqual([list(record) for record in page['results']], [['id', 'equipment_name', 'pressure']] * 3)
+
+    def test_columnar(self):
+        page = self.records(layout='columnar', fields='flowrate', limit=4).json()
+        self.assertNotIn('results', page)
+        self.assertEqual(list(page['columns']), ['id', 'flowrate'])
+        self.assertEqual(page['columns']['flowrate'], list(self.frame['Flowrate'][:4]))
+
+    def test_equipment_type_filter(self):
+        equipment_type = self.frame['Type'].iloc[0]
+        pages = self.walk(equipment_type=equipment_type, limit=4)
+        records = [record for page in pages for record in page['results']]
+        self.assertEqual(len(records), (self.frame['Type'] == equipment_type).sum())
+        self.assertEqual({record['equipment_type'] for record in records}, {equipment_type})
+
+    def test_invalid_parameters(self):
+        for params in ({'limit': 'many'}, {'limit': 0}, {'cursor': 'abc'}, {'fields': 'colour'}):
+            with self.subTest(params):
+                self.assertEqual(self.records(**params).status_code, 400)
+
+
+class ResponseCacheTests(ResponseCacheMixin, TestCase):
+    """Summary, history and dataset payloads are rendered once and dropped when datasets change."""
+
+    def setUp(self):
+        super().setUp()
+        self.dataset = self.make_dataset()
+
+    def test_repeat_request_is_served_from_cache(self):
+        url = f'/api/dataset/{self.dataset.pk}/'
+        first = self.client.get(url)
+        # Only the dataset lookup; no records are read or serialized again
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(second.json()['equipment_records']), 20)
+
+    def test_variants_are_cached_separately(self):
+        url = f'/api/dataset/{self.dataset.pk}/'
+        self.assertIn('equipment_records', self.client.get(url).json())
+        self.assertNotIn('equipment_records', self.client.get(url, {'records': 'false'}).json())
+        self.assertIn('equipment_columns', self.client.get(url, {'layout': 'columnar'}).json())
+
+    def test_upload_invalidates_summary_and_history(self):
+        self.assertEqual(self.client.get('/api/summary/').json()['id'], self.dataset.pk)
+        self.assertEqual(len(self.client.get('/api/history/').json()), 1)
+
+        newer = self.make_dataset(seed=1, filename='newer.csv')
+        self.assertEqual(self.client.get('/api/summary/').json()['id'], newer.pk)
+        self.assertEqual([entry['id'] for entry in self.client.get('/api/history/').json()],
+                         [newer.pk, self.dataset.pk])
+
+    def test_delete_invalidates_dataset(self):
+        key = dataset_key(self.dataset.pk, True, 'nested')
+        self.client.get(f'/api/dataset/{self.dataset.pk}/')
+        self.assertIsNotNone(get_cache().get(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset.delete()
+        self.assertIsNone(get_cache().get(key))
+        self.assertEqual(self.client.get('/api/history/').json(), [])
+
+
+class ResponseCompressionTests(ResponseCacheMixin, TestCase):
+    """JSON responses are compressed per Accept-Encoding and still answer conditional GETs with 304."""
+
+    def setUp(self):
+        super().setUp()
+        self.dataset = self.make_dataset(rows=100)
+        self.url = f'/api/dataset/{self.dataset.pk}/'
+
+    def test_conditional_get(self):
+        for url in ('/api/summary/', '/api/history/', self.url):
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('"'))
+                for header, value in [('HTTP_IF_NONE_MATCH', response['ETag']),
+                                      ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified'])]:
+                    not_modified = self.client.get(url, **{header: value})
+                    self.assertEqual(not_modified.status_code, 304)
+                    self.assertEqual(not_modified.content, b'')
+
+    def test_gzip(self):
+        identity = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        # The compressed body is a different byte sequence: its ETag is the weak form of the identity one
+        self.assertEqual(response['ETag'], 'W/' + identity['ETag'])
+
+    def test_conditional_get_across_encodings(self):
+        strong = self.client.get(self.url)['ETag']
+        weak = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        for etag in (strong, weak):
+            with self.subTest(etag):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertNotIn('Content-Encoding', response)
+
+    def test_refused_or_unknown_encoding(self):
+        for header in ('gzip;q=0', 'compress', 'identity'):
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=header)
+                self.assertNotIn('Content-Encoding', response)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_body_is_not_compressed(self):
+        size = len(self.client.get(self.url, {'records': 'false'}).content)
+        with override_settings(RESPONSE_COMPRESSION_MIN_SIZE=size + 1):
+            response = self.client.get(self.url, {'records': 'false'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len(response.content), size)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_uncached_view_is_compressed_by_middleware(self):
+        url = f'/api/dataset/{self.dataset.pk}/records/'
+        identity = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_is_preferred(self):
+        identity = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br, zstd')
+        self.assertEqual(response['Content-Encoding'], ZSTD)
+        self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(response.content),
+                         identity.content)
+
+
+class AggregatesTests(ResponseCacheMixin, TestCase):
+    """/aggregates/ returns per-type and overall statistics matching pandas over the raw rows."""
+
+    def setUp(self):
+        super().setUp()
+        self.frame = make_dataframe(300)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset = Dataset.objects.create(filename='aggregates.csv', row_count=0, summary_stats={})
+            ingest_dataframe(self.frame, self.dataset)
+
+    def aggregates(self):
+        response = self.client.get(f'/api/dataset/{self.dataset.pk}/aggregates/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertStatsMatch(self, stats, values):
+        self.assertEqual(stats['count'], values.count())
+        self.assertAlmostEqual(stats['mean'], values.mean())
+        self.assertEqual(stats['min'], values.min())
+        self.assertEqual(stats['max'], values.max())
+
+    def assertAggregatesMatch(self, data):
+        self.assertEqual(data['overall']['count'], len(self.frame))
+        for column, field in PARAMETERS.items():
+            self.assertStatsMatch(data['overall'][field], self.frame[column])
+
+        counts = self.frame['Type'].value_counts()
+        self.assertEqual([entry['equipment_type'] for entry in data['types']],
+                         sorted(counts.index, key=lambda name: (-counts[name], name)))
+        groups = dict(list(self.frame.groupby('Type')))
+        for entry in data['types']:
+            group = groups[entry['equipment_type']]
+            self.assertEqual(entry['count'], len(group))
+            for column, field in PARAMETERS.items():
+                self.assertStatsMatch(entry[field], group[column])
+
+    def test_from_summary(self):
+        data = self.aggregates()
+        self.assertEqual(data['source'], 'summary')
+        self.assertEqual(data['row_count'], len(self.frame))
+        self.assertEqual(data['parameters'], list(PARAMETERS.values()))
+        self.assertAggregatesMatch(data)
+
+    def test_group_by_fallback(self):
+        # Datasets ingested before per-type statistics were kept have no by_type entry
+        self.dataset.refresh_from_db()
+        self.dataset.summary_stats.pop('by_type')
+        Dataset.objects.filter(pk=self.dataset.pk).update(summary_stats=self.dataset.summary_stats)
+        data = self.aggregates()
+        self.assertEqual(data['source'], 'group_by')
+        self.assertAggregatesMatch(data)
+
+    def test_empty_dataset(self):
+        self.dataset = Dataset.objects.create(filename='empty.csv', row_count=0, summary_stats={})
+        ingest_csv(io.BytesIO(HEADER), self.dataset)
+        data = self.aggregates()
+        self.assertEqual(data['types'], [])
+        self.assertEqual(data['overall']['count'], 0)
+        self.assertEqual(data['overall']['flowrate'], {'count': 0, 'mean': None, 'min': None, 'max': None})
+
+    def test_missing_dataset(self):
+        self.assertEqual(self.client.get('/api/dataset/999999/aggregates/').status_code, 404)
+
+
+class DownsampleTests(unittest.TestCase):
+    """LTTB and min/max keep a series' shape in a bounded number of points."""
+
+    def setUp(self):
+        self.ids = list(range(101, 1101))
+        self.values = [math.sin(i / 50) for i in range(1000)]
+        self.values[437] = 25.0
+        self.values[612] = -25.0
+
+    def test_point_budget_and_extremes(self):
+        for method in (LTTB, MINMAX):
+            with self.subTest(method):
+                positions, ids, values = downsample(self.ids, self.values, 50, method)
+                self.assertLessEqual(len(positions), 50)
+                self.assertEqual(list(positions), sorted(set(positions)))
+                self.assertEqual(list(ids), [self.ids[p] for p in positions])
+                self.assertEqual(list(values), [self.values[p] for p in positions])
+                self.assertIn(437, positions)
+                self.assertIn(612, positions)
+
+    def test_lttb_keeps_endpoints(self):
+        positions, _, _ = downsample(self.ids, self.values, 50, LTTB)
+        self.assertEqual(len(positions), 50)
+        self.assertEqual((positions[0], positions[-1]), (0, 999))
+
+    def test_short_series_is_returned_whole(self):
+        for method in (LTTB, MINMAX):
+            with self.subTest(method):
+                positions, _, values = downsample(self.ids[:20], self.values[:20], 50, method)
+                self.assertEqual(list(positions), list(range(20)))
+                self.assertEqual(list(values), self.values[:20])
+
+    def test_missing_values_are_skipped(self):
+        values = list(self.values)
+        values[0] = values[500] = float('nan')
+        for method in (LTTB, MINMAX):
+            with self.subTest(method):
+                positions, _, kept = downsample(self.ids, values, 50, method)
+                self.assertNotIn(0, positions)
+                self.assertNotIn(500, positions)
+                self.assertFalse(any(math.isnan(value) for value in kept))
+
+        positions, ids, kept = downsample(self.ids[:3], [float('nan')] * 3, 50)
+        self.assertEqual((len(positions), len(ids), len(kept)), (0, 0, 0))
+
+
+class SeriesViewTests(ResponseCacheMixin, TestCase):
+    """/series/ returns at most ?points= samples of one parameter, positioned in the full series."""
+
+    def setUp(self):
+        super().setUp()
+        self.frame = make_dataframe(2000)
+        self.dataset = self.make_dataset(rows=2000)
+        self.url = f'/api/dataset/{self.dataset.pk}/series/'
+
+    def test_series(self):
+        ids = list(EquipmentData.objects.filter(dataset=self.dataset).order_by('id').values_list('id', flat=True))
+        for method in (LTTB, MINMAX):
+            with self.subTest(method):
+                data = self.client.get(self.url, {'param': 'pressure', 'points': 100, 'method': method}).json()
+                self.assertEqual((data['param'], data['method'], data['total']), ('pressure', method, 2000))
+                self.assertLessEqual(data['points'], 100)
+                self.assertEqual(len(data['x']), data['points'])
+                self.assertEqual(data['ids'], [ids[x] for x in data['x']])
+                self.assertEqual(data['y'], [self.frame['Pressure'][x] for x in data['x']])
+
+    def test_defaults(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual((data['param'], data['method'], data['points']), ('flowrate', LTTB, 1000))
+
+    def test_points_above_total(self):
+        data = self.client.get(self.url, {'points': 5000}).json()
+        self.assertEqual(data['points'], 2000)
+        self.assertEqual(data['y'], list(self.frame['Flowrate']))
+
+    def test_invalid_parameters(self):
+        for params in ({'param': 'colour'}, {'method': 'average'}, {'points': 2}, {'points': 'all'}):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.assertEqual(self.client.get('/api/dataset/999999/series/').status_code, 404)
+
+
+class RetentionTests(TemporaryMediaMixin, TestCase):
+    """Retention removes expired datasets with their records and files, and always keeps the newest."""
+
+    def make_dataset(self, rows, age_days=0, storage=Dataset.STORAGE_ROWS):
+        dataset = Dataset.objects.create(filename=f'retention_{rows}.csv', row_count=0, summary_stats={},
+                                         storage=storage, file=SimpleUploadedFile('retention.csv', HEADER))
+        ingest_dataframe(make_dataframe(rows), dataset)
+        # auto_now_add ignores values passed to create()
+        Dataset.objects.filter(pk=dataset.pk).update(upload_date=timezone.now() - timedelta(days=age_days))
+        dataset.refresh_from_db()
+        return dataset
+
+    def make_datasets(self, *rows):
+        """One dataset per row count, oldest first."""
+        return [self.make_dataset(count, age_days=len(rows) - position) for position, count in enumerate(rows)]
+
+    def remaining(self):
+        return list(Dataset.all_objects.order_by('upload_date'))
+
+    def test_max_datasets(self):
+        datasets = self.make_datasets(10, 20, 30, 40, 50)
+        paths = [dataset.file.path for dataset in datasets]
+        # A batch size smaller than a dataset deletes its records over several statements
+        result = apply_retention(RetentionPolicy(max_datasets=3, delete_batch_size=7))
+
+        self.assertEqual((result.datasets_deleted, result.rows_deleted, result.files_deleted), (2, 30, 2))
+        self.assertEqual(self.remaining(), datasets[2:])
+        self.assertEqual(EquipmentData.objects.count(), 30 + 40 + 50)
+        self.assertEqual([os.path.exists(path) for path in paths], [False, False, True, True, True])
+
+    def test_max_age_keeps_newest(self):
+        datasets = [self.make_dataset(10, age_days=40), self.make_dataset(10, age_days=35),
+                    self.make_dataset(10, age_days=2)]
+        apply_retention(RetentionPolicy(max_datasets=None, max_age_days=30))
+        self.assertEqual(self.remaining(), datasets[2:])
+
+        # Even an expired dataset survives when it is the newest one
+        Dataset.objects.update(upload_date=timezone.now() - timedelta(days=90))
+        self.assertEqual(apply_retention(RetentionPolicy(max_datasets=None, max_age_days=30)).datasets_deleted, 0)
+
+    def test_max_total_rows(self):
+        datasets = self.make_datasets(10, 50, 30, 40)
+        apply_retention(RetentionPolicy(max_datasets=None, max_total_rows=80))
+        # Newest first: 40 + 30 fit, 50 more would not, but the older 10-row dataset still fits
+        self.assertEqual(self.remaining(), [datasets[0], datasets[2], datasets[3]])
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet_dataset(self):
+        old = self.make_dataset(25, age_days=2, storage=Dataset.STORAGE_PARQUET)
+        self.make_dataset(5)
+        data_file = old.data_file.path
+        self.assertTrue(os.path.exists(data_file))
+
+        result = apply_retention(RetentionPolicy(max_datasets=1))
+        self.assertEqual((result.datasets_deleted, result.rows_deleted), (1, 25))
+        self.assertFalse(os.path.exists(data_file))
+
+    def test_prune_datasets_command(self):
+        datasets = self.make_datasets(10, 20, 30)
+        output = io.StringIO()
+        call_command('prune_datasets', '--max-datasets', '1', '--dry-run', stdout=output)
+        self.assertIn('2 datasets would be deleted', output.getvalue())
+        self.assertEqual(len(self.remaining()), 3)
+
+        call_command('prune_datasets', '--max-datasets', '1', stdout=io.StringIO())
+        self.assertEqual(self.remaining(), datasets[2:])
+
+
+class EncodingFallbackTests(TestCase):
+    """A non-UTF-8 byte past the first parse buffer re-reads the file as latin-1 exactly once."""
+
+    def test_latin1_byte_after_committed_chunks(self):
+        rows = [b'EQ-%05d,Pump,1.5,2.5,3.5\n' % i for i in range(20000)]
+        rows[-1] = b'Caf\xe9,Valve,4.0,5.0,6.0\n'
+        dataset = Dataset.objects.create(filename='latin1.csv', row_count=0, summary_stats={})
+        ingest_csv(io.BytesIO(HEADER + b''.join(rows)), dataset, chunksize=1000)
+        dataset.refresh_from_db()
+
+        self.assertEqual(dataset.row_count, 20000)
+        self.assertEqual(EquipmentData.objects.filter(dataset=dataset).count(), 20000)
+        self.assertEqual(dataset.summary_stats['equipment_types'], {'Pump': 19999, 'Valve': 1})
+        self.assertTrue(EquipmentData.objects.filter(dataset=dataset, equipment_name='Café').exists())
+
+
+class AbandonedIngestTests(TestCase):
+    """An incomplete dataset left by a dead ingest does not hold its content hash forever."""
+
+    def make_incomplete(self, minutes_ago):
+        dataset = Dataset.objects.create(filename='dead.csv', row_count=0, summary_stats={},
+                                         content_hash='ab' * 32, is_complete=False)
+        Dataset.all_objects.filter(pk=dataset.pk).update(
+            upload_date=timezone.now() - timedelta(minutes=minutes_ago))
+        return dataset
+
+    @override_settings(INGEST_TIMEOUT=60)
+    def test_wait_for_duplicate_gives_up(self):
+        dataset = self.make_incomplete(minutes_ago=5)
+        with self.assertRaises(TimeoutError):
+            wait_for_duplicate(dataset.content_hash, poll_interval=0)
+        self.assertFalse(Dataset.all_objects.filter(pk=dataset.pk).exists())
+
+    @override_settings(INGEST_TIMEOUT=60)
+    def test_retention_deletes_abandoned_datasets(self):
+        dead = self.make_incomplete(minutes_ago=5)
+        Dataset.all_objects.filter(pk=dead.pk).update(content_hash='')
+        running = self.make_incomplete(minutes_ago=0)
+        self.assertEqual(apply_retention().datasets_deleted, 1)
+        self.assertEqual(list(Dataset.all_objects.values_list('pk', flat=True)), [running.pk])
+
+
+@unittest.skipIf(zstandard is None, 'zstandard is not installed')
+@override_settings(UPLOAD_MAX_DECOMPRESSED_SIZE=1024 * 1024)
+class DecompressionLimitTests(TestCase):
+    """A small compressed upload that expands past UPLOAD_MAX_DECOMPRESSED_SIZE is refused."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.BOMB = zstandard.ZstdCompressor(level=19).compress(bytes(16 * 1024 * 1024))
+
+    def test_hasher_stops_at_limit(self):
+        with self.assertRaises(DecompressedSizeError):
+            ContentHasher(ZSTD).update(self.BOMB)
+
+    def test_upload_is_rejected(self):
+        response = self.client.post('/api/upload/', {'file': SimpleUploadedFile('bomb.csv.zst', self.BOMB)})
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(UploadJob.objects.exists())
+
+
+class QueryPlanTests(TestCase):
+    """The hot API queries use the indexes added for them (see the bench_queries command)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            cls.dataset = Dataset.objects.create(filename=f'plan_{i}.csv', row_count=0, summary_stats={})
+            ingest_dataframe(make_dataframe(2000, seed=i), cls.dataset)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            if connection.vendor == 'postgresql':
+                # Tables this small are cheaper to scan; check that the index is usable
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_queries_use_their_index(self):
+        for name, queryset, index in query_plans(self.dataset):
+            with self.subTest(name):
+                self.assertIn(index, queryset.explain())
+
+
+class CompareTests(TestCase):
+    def make_dataset(self, rows):
+        dataset = Dataset.objects.create(filename='compare.csv', row_count=0, summary_stats={})
+        frame = pd.DataFrame(rows, columns=['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'])
+        ingest_dataframe(frame, dataset)
+        return dataset
+
+    def test_compare_equipment(self):
+        base = self.make_dataset([
+            ('P-1', 'Pump', 10.0, 1.0, 50.0),
+            ('V-1', 'Valve', 5.0, 3.0, 20.0),
+            ('R-1', 'Reactor', 1.0, 2.0, 3.0),
+        ])
+        other = self.make_dataset([
+            ('P-1', 'Pump', 12.5, 1.0, 50.0),
+            ('V-1', 'Valve', 5.0, 3.0, 20.0),
+            ('H-1', 'HeatExchanger', 7.0, 8.0, 9.0),
+            ('H-1', 'HeatExchanger', 7.0, 8.0, 10.0),
+        ])
+        result = compare_equipment(base, other, limit=10)
+
+        self.assertEqual(result['counts'], {'added': 1, 'removed': 1, 'changed': 1, 'unchanged': 1})
+        self.assertEqual(result['duplicate_names'], {'base': 0, 'other': 1})
+        self.assertEqual(result['added'][0]['temperature'], 10.0)
+        self.assertEqual(result['removed'][0]['equipment_name'], 'R-1')
+        self.assertEqual(result['changed'], [{
+            'equipment_name': 'P-1',
+            'equipment_type': 'Pump',
+            'changes': {'flowrate': {'base': 10.0, 'other': 12.5, 'delta': 2.5}},
+        }])
+
+
+class DatabaseSettingsTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'mmap_size': None})
+    def test_sqlite_pragmas_come_from_settings(self):
+        self.assertEqual(get_sqlite_pragmas(), {'journal_mode': 'WAL'})
+
+    def test_auto_ingest_backend(self):
+        expected = 'copy' if connection.vendor == 'postgresql' else 'orm'
+        self.assertEqual(get_ingest_backend(connection), expected)
+
+    @unittest.skipIf(connection.vendor == 'postgresql', 'COPY is available on PostgreSQL')
+    @override_settings(INGEST_BACKEND='copy')
+    def test_copy_backend_needs_postgresql(self):
+        with self.assertRaises(ValueError):
+            get_ingest_backend(connection)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'COPY FROM STDIN needs PostgreSQL')
+class CopyIngestTests(TestCase):
+    """The COPY backend stores exactly what the batched INSERT backend does."""
+
+    FRAME = pd.DataFrame({
+        'Equipment Name': ['  Pump-1 ', 'Valve, "A"', '', 'Reactor-9'],
+        'Type': ['Pump', 'Valve', 'Valve', ' Reactor '],
+        'Flowrate': [120.5, float('nan'), 0.0, 1e-7],
+        'Pressure': [5.2, 3.0, float('nan'), 250.0],
+        'Temperature': [110.0, -20.5, 80.0, float('nan')],
+    })
+
+    def ingest(self, backend):
+        dataset = Dataset.objects.create(filename=f'{backend}.csv', row_count=0, summary_stats={})
+        ingest_dataframe(self.FRAME, dataset, backend=backend)
+        return [
+            tuple('nan' if isinstance(value, float) and math.isnan(value) else value for value in row)
+            for row in EquipmentData.objects.filter(dataset=dataset).order_by('id').values_list(
+                'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature'
+            )
+        ]
+
+    def test_copy_matches_orm(self):
+        copied = self.ingest('copy')
+        self.assertEqual(len(copied), len(self.FRAME))
+        self.assertEqual(copied, self.ingest('orm'))
+        self.assertEqual(copied[0][:2], ('Pump-1', 'Pump'))
+        self.assertEqual(copied[2][0], '')
+
+    def test_copy_summary(self):
+        dataset = Dataset.objects.create(filename='copy.csv', row_count=0, summary_stats={})
+        result = ingest_dataframe(self.FRAME, dataset, backend='copy')
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.row_count, 4)
+        self.assertEqual(result['equipment_types'], {'Valve': 2, 'Pump': 1, 'Reactor': 1})
+
+
+class ReportViewTests(TemporaryMediaMixin, TestCase):
+    """An uncached report is rendered on the worker pool while the client retries."""
+
+    def setUp(self):
+        super().setUp()
+        self.dataset = Dataset.objects.create(filename='report.csv', row_count=0, summary_stats={})
+        self.url = f'/api/report/{self.dataset.pk}/'
+
+    def get(self, future):
+        with mock.patch('api.views.submit_report', return_value=future) as submit:
+            response = self.client.get(self.url)
+        submit.assert_called_once_with(self.dataset.pk, 'full')
+        return response
+
+    def test_pending_render_returns_202(self):
+        response = self.get(Future())
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], str(REPORT_RETRY_AFTER))
+
+    def test_failed_render_returns_500(self):
+        future = Future()
+        future.set_exception(RuntimeError('out of disk'))
+        response = self.get(future)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('out of disk', response.json()['error'])
+
+    def test_rendered_report_is_served(self):
+        path = report_path(self.dataset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as output:
+            build_report(self.dataset, output)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
@@ -0,0 +1,206 @@
+import os
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils import timezone
+from .compression import ContentHasher, upload_compression
+from .jobs import duplicate_upload_job, submit_upload_job
+from .models import UploadJob, UploadSession, content_addressed_path
+
+# Bytes read from the request body / partial file per loop iteration
+READ_SIZE = 1024 * 1024
+
+# Largest chunk a single PUT may carry
+DEFAULT_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Open sessions untouched for this long are removed with their partial file
+DEFAULT_SESSION_EXPIRY_HOURS = 24
+
+# One lock per open session, so a chunk and a retry of it cannot interleave
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
+
+class UploadSessionError(ValueError):
+    """Raised for chunks or completions a session cannot accept."""
+
+
+class OffsetMismatch(UploadSessionError):
+    """Raised when a chunk does not start at the session's acknowledged offset."""
+
+    def __init__(self, offset):
+        super().__init__(f"Chunk must start at offset {offset}")
+        self.offset = offset
+
+
+class Sha256UploadHandler(FileUploadHandler):
+    """Hash every uploaded file with SHA-256 while its chunks stream in.
+
+    The data is passed on untouched to the next handler, so this must come
+    first in FILE_UPLOAD_HANDLERS. Compressed uploads (.csv.gz, .csv.zst) are
+    hashed by their decompressed content. Digests are stored on the request
+    as request.upload_hashes[field_name].
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = ContentHasher(upload_compression(self.file_name or ''))
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_hashes'):
+            self.request.upload_hashes = {}
+        self.request.upload_hashes[self.field_name] = self.hasher.hexdigest()
+        # Let the next handler build the UploadedFile
+        return None
+
+
+def uploaded_file_sha256(request, field_name, uploaded_file):
+    """SHA-256 hex digest of an uploaded file, hashed during upload when possible."""
+    digest = getattr(request, 'upload_hashes', {}).get(field_name)
+    if digest:
+        return digest
+    hasher = ContentHasher(upload_compression(uploaded_file.name))
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    uploaded_file.seek(0)
+    return hasher.hexdigest()
+
+
+def file_sha256(path, compression=None):
+    """SHA-256 of a stored file's (decompressed) content."""
+    hasher = ContentHasher(compression)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def session_lock(session_id):
+    with _session_locks_guard:
+        return _session_locks.setdefault(session_id, threading.Lock())
+
+
+def max_chunk_size():
+    return getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', DEFAULT_MAX_CHUNK_SIZE)
+
+
+def create_session(filename, size=None):
+    """Start a chunked upload and create its empty partial file."""
+    session = UploadSession.objects.create(filename=filename, size=size)
+    path = default_storage.path(session.partial_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return session
+
+
+def append_chunk(session, offset, stream, length=None):
+    """Write length bytes from stream at offset and acknowledge them.
+
+    The chunk is written at `offset` rather than appended, so a chunk whose
+    acknowledgement was lost can simply be sent again. The offset stored in
+    the database is only advanced once the bytes are on disk. With length
+    None (a Content-Encoding compressed body) the stream is read to its end.
+    """
+    limit = max_chunk_size()
+    if length is not None and length > limit:
+        raise UploadSessionError(f"Chunks may be at most {limit} bytes")
+
+    with session_lock(session.pk):
+        session.refresh_from_db(fields=['offset', 'status'])
+        if session.status != UploadSession.STATUS_OPEN:
+            raise UploadSessionError('Upload session is already complete')
+        if offset != session.offset:
+            raise OffsetMismatch(session.offset)
+        if session.size is not None and length is not None and offset + length > session.size:
+            raise UploadSessionError(f"Chunk ends past the declared size of {session.size} bytes")
+
+        expected = length if length is not None else limit + 1
+        written = 0
+        with open(default_storage.path(session.partial_name), 'r+b') as f:
+            f.seek(offset)
+            while written < expected:
+                data = stream.read(min(READ_SIZE, expected - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+            f.truncate()
+        if length is None and written > limit:
+            raise UploadSessionError(f"Chunks may be at most {limit} bytes")
+        if length is not None and written != length:
+            raise UploadSessionError(f"Chunk ended after {written} of {length} bytes")
+        if session.size is not None and offset + written > session.size:
+            raise UploadSessionError(f"Chunk ends past the declared size of {session.size} bytes")
+
+        session.offset = offset + written
+        session.save(update_fields=['offset', 'updated_at'])
+    return session
+
+
+def complete_session(session):
+    """Hash the assembled file and hand it to the ingest, or to an existing dataset with the same content.
+
+    Completing a session twice returns the same job.
+    """
+    with session_lock(session.pk):
+        session.refresh_from_db()
+        if session.status == UploadSession.STATUS_COMPLETE:
+            return session.job
+        if session.size is not None and session.offset != session.size:
+            raise UploadSessionError(f"Upload incomplete: {session.offset} of {session.size} bytes received")
+
+        path = default_storage.path(session.partial_name)
+        content_hash = file_sha256(path, upload_compression(session.filename))
+        job = duplicate_upload_job(session.filename, content_hash)
+        if job:
+            os.remove(path)
+        else:
+            # Move the partial file into content-addressed storage instead of copying it.
+            # The job row is written first: if that fails (e.g. the database is busy)
+            # the partial file is still in place for the client to retry.
+            name = default_storage.get_available_name(
+                content_addressed_path(UploadJob(content_hash=content_hash), session.filename)
+            )
+            job = UploadJob.objects.create(filename=session.filename, content_hash=content_hash, file=name)
+            target = default_storage.path(name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+            submit_upload_job(job)
+
+        session.status = UploadSession.STATUS_COMPLETE
+        session.job = job
+        session.save(update_fields=['status', 'job', 'updated_at'])
+
+    with _session_locks_guard:
+        _session_locks.pop(session.pk, None)
+    return job
+
+
+def delete_session(session):
+    """Abort a session and remove its partial file."""
+    session_id = session.pk
+    try:
+        default_storage.delete(session.partial_name)
+    except OSError:
+        pass
+    session.delete()
+    with _session_locks_guard:
+        _session_locks.pop(session_id, None)
+
+
+def expire_upload_sessions():
+    """Delete open sessions that have not received a chunk within UPLOAD_SESSION_EXPIRY_HOURS."""
+    hours = getattr(settings, 'UPLOAD_SESSION_EXPIRY_HOURS', DEFAULT_SESSION_EXPIRY_HOURS)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    expired = UploadSession.objects.filter(status=UploadSession.STATUS_OPEN, updated_at__lt=cutoff)
+    count = 0
+    for session in expired:
+        delete_session(session)
+        count += 1
+    return count
@@ -4,7 +4,16 @@ from .views import (
     SummaryView, 
     HistoryView,
     DatasetDetailView,
-    GenerateReportView
+    DatasetRecordsView,
+    DatasetAggregatesView,
+    DatasetSeriesView,
+    CompareView,
+    GenerateReportView,
+    UploadJobView,
+    UploadSessionCreateView,
+    UploadSessionView,
+    UploadChunkView,
+    UploadCompleteView
 )
 
 urlpatterns = [
@@ -12,5 +21,14 @@ urlpatterns = [
     path('summary/', SummaryView.as_view(), name='summary'),
     path('history/', HistoryView.as_view(), name='history'),
     path('dataset/<int:pk>/', DatasetDetailView.as_view(), name='dataset-detail'),
+    path('dataset/<int:pk>/records/', DatasetRecordsView.as_view(), name='dataset-records'),
+    path('dataset/<int:pk>/aggregates/', DatasetAggregatesView.as_view(), name='dataset-aggregates'),
+    path('dataset/<int:pk>/series/', DatasetSeriesView.as_view(), name='dataset-series'),
+    path('compare/', CompareView.as_view(), name='compare'),
+    path('jobs/<uuid:pk>/', UploadJobView.as_view(), name='upload-job'),
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload-session-create'),
+    path('uploads/<uuid:pk>/', UploadSessionView.as_view(), name='upload-session'),
+    path('uploads/<uuid:pk>/chunk/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:pk>/complete/', UploadCompleteView.as_view(), name='upload-complete'),
     path('report/<int:pk>/', GenerateReportView.as_view(), name='generate-report'),
 ]
\ No newline at end of file
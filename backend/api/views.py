@@ -1,203 +1,343 @@
+import logging
+import os
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.http import FileResponse
+from rest_framework.renderers import JSONRenderer
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .models import Dataset, EquipmentData
-from .serializers import DatasetSerializer, DatasetListSerializer
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-import pandas as pd
-import io
+from django.db import OperationalError
+from .models import Dataset, UploadJob, UploadSession
+from .serializers import DatasetListSerializer, UploadJobSerializer, UploadSessionSerializer
+from .jobs import duplicate_upload_job, executor, submit_report, submit_upload_job
+from .encoders import dumps
+from .cache import aggregates_key, cached_json_response, compare_key, dataset_key, history_key, series_key
+from .aggregates import dataset_aggregates
+from .compare import DEFAULT_COMPARE_LIMIT, MAX_COMPARE_LIMIT, dataset_comparison
+from .downsample import DEFAULT_POINTS, LTTB, MAX_POINTS, METHODS, dataset_series
+from .pagination import PaginationError, keyset_paginate, parse_fields, parse_int
+from .stats import PARAMETERS
+from .reports import REPORT_MODE_FULL, REPORT_MODES, REPORT_RETRY_AFTER, ranged_file_response, report_path
+from .storage import get_storage
+from .compression import DecompressedSizeError, upload_suffix, upload_suffixes
+from .uploads import (
+    OffsetMismatch, UploadSessionError, append_chunk, complete_session, create_session,
+    delete_session, expire_upload_sessions, uploaded_file_sha256
+)
+
+logger = logging.getLogger(__name__)
+
+def csv_only_message():
+    return f"Only CSV files allowed ({', '.join(upload_suffixes())})"
+
+def database_busy_response():
+    """503 for a write that timed out waiting for the database lock (SQLite); the client may retry."""
+    response = Response({'error': 'The server is busy storing another upload, please retry'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '5'
+    return response
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FileUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     
     def post(self, request):
-        print("=" * 60)
-        print("UPLOAD REQUEST RECEIVED")
-        print("FILES:", request.FILES)
-        print("=" * 60)
-        
-        file = request.FILES.get('file')
+        try:
+            file = request.FILES.get('file')
+        except DecompressedSizeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         
         if not file:
-            print("ERROR: No file in request")
+            logger.warning("Upload request without a file")
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
-        print(f"File received: {file.name}, size: {file.size}")
+        logger.info("Upload received: %s (%s bytes)", file.name, file.size)
         
-        if not file.name.endswith('.csv'):
-            return Response({'error': 'Only CSV files allowed'}, status=status.HTTP_400_BAD_REQUEST)
+        if not upload_suffix(file.name):
+            return Response({'error': csv_only_message()}, status=status.HTTP_400_BAD_REQUEST)
         
-        dataset = None
+        # Same content as an existing dataset: hand that back without storing or parsing anything
         try:
-            # Create dataset
-            dataset = Dataset.objects.create(
-                filename=file.name,
-                row_count=0,
-                summary_stats={},
-                file=file
-            )
-            print(f"Dataset created with ID: {dataset.id}")
-            
-            # Read CSV
-            file_content = file.read()
-            try:
-                csv_string = file_content.decode('utf-8')
-            except:
-                csv_string = file_content.decode('latin-1')
-            
-            # Instead of reading a raw string, use the uploaded file object directly
-            csv_file = request.FILES['file']
-# Ensure we start reading from the very first character
-            csv_file.seek(0) 
-            df = pd.read_csv(csv_file)
-            
-            print("CSV Columns:", list(df.columns))
-            print("CSV Shape:", df.shape)
-            
-            # Check required columns
-            required = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-            missing = [col for col in required if col not in df.columns]
-            if missing:
-                raise ValueError(f"Missing columns: {missing}")
-            
-            # Calculate summary
-            summary = {
-                'total_count': int(len(df)),
-                'avg_flowrate': float(df['Flowrate'].mean()),
-                'avg_pressure': float(df['Pressure'].mean()),
-                'avg_temperature': float(df['Temperature'].mean()),
-                'equipment_types': {str(k): int(v) for k, v in df['Type'].value_counts().to_dict().items()},
-            }
-            
-            print(f"Processing {len(df)} rows...")
-            
-            # Create equipment records
-            for idx, row in df.iterrows():
-                EquipmentData.objects.create(
-                    dataset=dataset,
-                    equipment_name=str(row['Equipment Name']).strip(),
-                    equipment_type=str(row['Type']).strip(),
-                    flowrate=float(row['Flowrate']),
-                    pressure=float(row['Pressure']),
-                    temperature=float(row['Temperature'])
-                )
-            
-            # Update dataset
-            dataset.row_count = summary['total_count']
-            dataset.summary_stats = summary
-            dataset.save()
-            
-            print(f"✅ Upload successful! {summary['total_count']} records saved")
-            print("=" * 60)
-            
-            # Keep only last 5
-            old_datasets = Dataset.objects.all().order_by('-upload_date')[5:]
-            for old in old_datasets:
-                try:
-                    old.file.delete()
-                except:
-                    pass
-                old.delete()
-            
-            serializer = DatasetSerializer(dataset)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            print("❌ ERROR:", str(e))
-            import traceback
-            traceback.print_exc()
-            
-            if dataset:
-                try:
-                    dataset.delete()
-                except:
-                    pass
+            content_hash = uploaded_file_sha256(request, 'file', file)
+        except DecompressedSizeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            job = duplicate_upload_job(file.name, content_hash)
+            if job:
+                return Response(UploadJobSerializer(job).data, status=status.HTTP_200_OK)
             
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Store the file under its content hash and hand the ingest to the worker pool
+            job = UploadJob.objects.create(filename=file.name, content_hash=content_hash, file=file)
+        except OperationalError:
+            return database_busy_response()
+        submit_upload_job(job)
+        logger.info("Upload job %s queued for %s", job.pk, file.name)
+        
+        serializer = UploadJobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadSessionCreateView(APIView):
+    """Start a resumable chunked upload: POST {"filename": ..., "size": ...}."""
+    
+    def post(self, request):
+        filename = request.data.get('filename', '')
+        if not upload_suffix(filename):
+            return Response({'error': csv_only_message()}, status=status.HTTP_400_BAD_REQUEST)
+        
+        size = request.data.get('size')
+        try:
+            size = int(size) if size not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        session = create_session(filename, size)
+        # Housekeeping for abandoned sessions, off the request path
+        executor.submit(expire_upload_sessions)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadSessionView(APIView):
+    """GET the acknowledged offset to resume from, or DELETE to abort the upload."""
+    
+    def get(self, request, pk):
+        try:
+            session = UploadSession.objects.get(pk=pk)
+            return Response(UploadSessionSerializer(session).data)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    def delete(self, request, pk):
+        try:
+            session = UploadSession.objects.get(pk=pk)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        delete_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadChunkView(APIView):
+    """PUT raw bytes to /uploads/<id>/chunk/?offset=N; N must equal the acknowledged offset."""
+    
+    def put(self, request, pk):
+        try:
+            session = UploadSession.objects.get(pk=pk)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response({'error': 'offset must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        length = request.META.get('CONTENT_LENGTH')
+        if not length:
+            return Response({'error': 'Content-Length is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        # A Content-Encoding body decompresses to an unknown length; read it to the end
+        length = None if getattr(request, 'content_decoded', False) else int(length)
+        
+        try:
+            session = append_chunk(session, offset, request.stream, length)
+        except OffsetMismatch as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+        except UploadSessionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DecompressedSizeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return Response({'id': session.id, 'offset': session.offset})
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadCompleteView(APIView):
+    """Finish a chunked upload and queue its ingest; returns the upload job."""
+    
+    def post(self, request, pk):
+        try:
+            session = UploadSession.objects.get(pk=pk)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            job = complete_session(session)
+        except UploadSessionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DecompressedSizeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except OperationalError:
+            return database_busy_response()
+        
+        code = status.HTTP_200_OK if job.deduplicated else status.HTTP_202_ACCEPTED
+        return Response(UploadJobSerializer(job).data, status=code)
+
+class UploadJobView(APIView):
+    def get(self, request, pk):
+        try:
+            job = UploadJob.objects.get(pk=pk)
+            serializer = UploadJobSerializer(job)
+            return Response(serializer.data)
+        except UploadJob.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+def include_records(request):
+    """Whether the response should embed equipment_records (?records=false leaves them out)."""
+    return request.query_params.get('records', 'true').lower() not in ('0', 'false', 'no')
+
+def columnar_layout(request):
+    """Whether records should be sent as one array per field (?layout=columnar)."""
+    return request.query_params.get('layout') == 'columnar'
+
+def dataset_response(request, dataset):
+    """Serialize a dataset honouring the ?records= and ?layout= query parameters."""
+    records = include_records(request)
+    layout = 'columnar' if records and columnar_layout(request) else 'nested'
+    
+    def build():
+        if not records:
+            body = JSONRenderer().render(DatasetListSerializer(dataset).data)
+        elif layout == 'columnar':
+            data = dict(DatasetListSerializer(dataset).data)
+            data['equipment_columns'] = get_storage(dataset).read_columns(dataset)
+            body = dumps(data)
+        else:
+            data = dict(DatasetListSerializer(dataset).data)
+            data['equipment_records'] = get_storage(dataset).read_records(dataset)
+            body = dumps(data)
+        return body, dataset.upload_date
+    
+    return cached_json_response(request, dataset_key(dataset.pk, records, layout), build)
 
 class SummaryView(APIView):
     def get(self, request):
         dataset = Dataset.objects.first()
         if not dataset:
             return Response({'message': 'No data available'}, status=status.HTTP_404_NOT_FOUND)
-        serializer = DatasetSerializer(dataset)
-        return Response(serializer.data)
+        return dataset_response(request, dataset)
 
 class HistoryView(APIView):
     def get(self, request):
-        datasets = Dataset.objects.all()[:5]
-        serializer = DatasetListSerializer(datasets, many=True)
-        return Response(serializer.data)
+        def build():
+            datasets = list(Dataset.objects.all()[:5])
+            serializer = DatasetListSerializer(datasets, many=True)
+            latest = datasets[0].upload_date if datasets else None
+            return JSONRenderer().render(serializer.data), latest
+        
+        return cached_json_response(request, history_key(), build)
 
 class DatasetDetailView(APIView):
     def get(self, request, pk):
         try:
             dataset = Dataset.objects.get(pk=pk)
-            serializer = DatasetSerializer(dataset)
-            return Response(serializer.data)
+            return dataset_response(request, dataset)
         except Dataset.DoesNotExist:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
 
-class GenerateReportView(APIView):
+class DatasetAggregatesView(APIView):
     def get(self, request, pk):
         try:
             dataset = Dataset.objects.get(pk=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            title = Paragraph(f"Equipment Report: {dataset.filename}", styles['Title'])
-            elements.append(title)
-            elements.append(Spacer(1, 12))
-            
-            summary_text = f"""
-            <b>Upload Date:</b> {dataset.upload_date.strftime('%Y-%m-%d %H:%M')}<br/>
-            <b>Total Records:</b> {dataset.row_count}<br/>
-            <b>Average Flowrate:</b> {dataset.summary_stats.get('avg_flowrate', 'N/A'):.2f}<br/>
-            <b>Average Pressure:</b> {dataset.summary_stats.get('avg_pressure', 'N/A'):.2f}<br/>
-            <b>Average Temperature:</b> {dataset.summary_stats.get('avg_temperature', 'N/A'):.2f}<br/>
-            """
-            summary = Paragraph(summary_text, styles['Normal'])
-            elements.append(summary)
-            elements.append(Spacer(1, 12))
-            
-            equipment_data = EquipmentData.objects.filter(dataset=dataset)[:20]
-            table_data = [['Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']]
-            for eq in equipment_data:
-                table_data.append([
-                    eq.equipment_name,
-                    eq.equipment_type,
-                    f"{eq.flowrate:.2f}",
-                    f"{eq.pressure:.2f}",
-                    f"{eq.temperature:.2f}"
-                ])
-            
-            table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            
-            doc.build(elements)
-            buffer.seek(0)
+        except Dataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        def build():
+            return dumps(dataset_aggregates(dataset)), dataset.upload_date
+        
+        return cached_json_response(request, aggregates_key(dataset.pk), build)
+
+class DatasetSeriesView(APIView):
+    def get(self, request, pk):
+        try:
+            dataset = Dataset.objects.get(pk=pk)
+        except Dataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        param = request.query_params.get('param', 'flowrate')
+        if param not in PARAMETERS.values():
+            return Response({'error': f"param must be one of {list(PARAMETERS.values())}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        method = request.query_params.get('method', LTTB)
+        if method not in METHODS:
+            return Response({'error': f"method must be one of {list(METHODS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            points = parse_int(request.query_params.get('points'), 'points', default=DEFAULT_POINTS,
+                               minimum=3, maximum=MAX_POINTS)
+        except PaginationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def build():
+            return dumps(dataset_series(dataset, param, points, method)), dataset.upload_date
+        
+        return cached_json_response(request, series_key(dataset, param, method, points), build)
+
+class CompareView(APIView):
+    def get(self, request):
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'ids must be a comma-separated list of dataset ids'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) != 2 or ids[0] == ids[1]:
+            return Response({'error': 'ids must name two different datasets, e.g. ?ids=1,2'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = parse_int(request.query_params.get('limit'), 'limit', default=DEFAULT_COMPARE_LIMIT,
+                              minimum=0, maximum=MAX_COMPARE_LIMIT)
+        except PaginationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        datasets = Dataset.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in datasets]
+        if missing:
+            return Response({'error': f"Dataset not found: {missing}"}, status=status.HTTP_404_NOT_FOUND)
+        base, other = datasets[ids[0]], datasets[ids[1]]
+        
+        def build():
+            return dumps(dataset_comparison(base, other, limit)), max(base.upload_date, other.upload_date)
+        
+        return cached_json_response(request, compare_key(base, other, limit), build)
+
+class DatasetRecordsView(APIView):
+    def get(self, request, pk):
+        try:
+            dataset = Dataset.objects.get(pk=pk)
+        except Dataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        storage = get_storage(dataset)
+        equipment_type = request.query_params.get('equipment_type')
+        
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
             
-            return FileResponse(buffer, as_attachment=True, filename=f'report_{dataset.id}.pdf')
+            def fetch(after, limit):
+                return storage.page(dataset, fields, after, limit, equipment_type)
             
+            page = keyset_paginate(fetch, request, fields, columnar=columnar_layout(request))
+        except PaginationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(page)
+
+class GenerateReportView(APIView):
+    def get(self, request, pk):
+        mode = request.query_params.get('mode', REPORT_MODE_FULL)
+        if mode not in REPORT_MODES:
+            return Response({'error': f"mode must be one of {REPORT_MODES}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            dataset = Dataset.objects.get(pk=pk)
         except Dataset.DoesNotExist:
-            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        path = report_path(dataset, mode)
+        if not os.path.exists(path):
+            # Rendering a large report takes seconds; do it on the worker pool
+            # and let the client retry instead of holding this request open
+            future = submit_report(dataset.pk, mode)
+            if future.done() and future.exception() is not None:
+                return Response({'error': f"Report rendering failed: {future.exception()}"},
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            if not future.done() or not os.path.exists(path):
+                response = Response({'status': 'rendering'}, status=status.HTTP_202_ACCEPTED)
+                response['Retry-After'] = str(REPORT_RETRY_AFTER)
+                return response
+        
+        filename = f'report_{dataset.id}.pdf' if mode == REPORT_MODE_FULL else f'report_{dataset.id}_{mode}.pdf'
+        return ranged_file_response(request, path, filename)
\ No newline at end of file
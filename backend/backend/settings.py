@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+import os
 import sys
 
 # Force show all errors
@@ -62,7 +63,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses the final response body, so it sits above everything that writes it
+    'api.middleware.ResponseCompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # Must run before anything reads the request body
+    'api.middleware.RequestDecompressionMiddleware',
+    # ETags (and 304s) for responses that do not set their own, computed on
+    # the uncompressed body
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,11 +102,125 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite allows one writer at a time. Writers wait up to `timeout` seconds for
+# the lock instead of failing at once with "database is locked", and
+# IMMEDIATE transactions take the write lock when they begin, so a
+# transaction that read first never has to upgrade its lock (which SQLite
+# refuses without waiting while another writer holds it). transaction_mode
+# needs Django 5.1 or later.
+SQLITE_OPTIONS = {
+    'timeout': 30,
+    'transaction_mode': 'IMMEDIATE',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+    }
+}
+
+# Use PostgreSQL instead when POSTGRES_DB is set in the environment
+if os.environ.get('POSTGRES_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_DB'],
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
     }
+
+# PRAGMAs run on every new SQLite connection by api.db.configure_sqlite (set
+# one to None to leave SQLite's default). WAL lets API reads proceed while an
+# upload is being written, and synchronous=NORMAL is durable across
+# application crashes in WAL mode.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Memory-map up to 256 MiB of the database file
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative values are KiB: a 64 MiB page cache per connection
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# How uploaded rows are written: 'orm' (batched INSERTs), 'copy' (PostgreSQL
+# COPY FROM STDIN) or 'auto' (COPY on PostgreSQL, INSERTs elsewhere)
+INGEST_BACKEND = 'auto'
+
+# Where new datasets keep their equipment records: 'rows' (one EquipmentData
+# row each) or 'parquet' (one compressed Parquet file per dataset under
+# MEDIA_ROOT/datasets/, read memory-mapped; requires pyarrow)
+DATASET_STORAGE = 'rows'
+PARQUET_COMPRESSION = 'zstd'
+
+
+# Upload processing
+# Number of background worker threads that ingest uploaded CSV files
+
+UPLOAD_WORKERS = 2
+
+# Seconds an ingest may run before its unfinished dataset counts as abandoned
+# (e.g. the worker was killed) and is deleted, freeing its content hash.
+# Uploads of the same content give up waiting for it after this long.
+INGEST_TIMEOUT = 30 * 60
+
+# Uploaded files are hashed (SHA-256) as they stream in, so repeat uploads of
+# the same CSV can be matched to an existing dataset without re-ingesting
+FILE_UPLOAD_HANDLERS = [
+    'api.uploads.Sha256UploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Resumable chunked uploads (/api/uploads/): largest accepted chunk, and how
+# long an abandoned session keeps its partial file
+UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_SESSION_EXPIRY_HOURS = 24
+
+# Largest size a gzip/zstd upload or Content-Encoding request body may
+# decompress to; larger ones are refused with 413 while hashing or ingesting
+UPLOAD_MAX_DECOMPRESSED_SIZE = 2 * 1024 * 1024 * 1024
+
+# Response compression
+# JSON responses are compressed with zstd, br or gzip, whichever the client
+# accepts (zstd and br need the zstandard / brotli packages). Smaller bodies
+# are not worth the CPU and are sent as-is.
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+
+
+# Dataset retention
+# Applied after every successful upload and by `manage.py prune_datasets`.
+# Limits set to None are disabled; the newest dataset is always kept.
+
+DATASET_RETENTION = {
+    'MAX_DATASETS': 5,
+    'MAX_AGE_DAYS': None,
+    'MAX_TOTAL_ROWS': None,
+    'DELETE_BATCH_SIZE': 10000,
+}
+
+
+# Cache
+# Rendered summary/history/dataset responses live in the 'api' cache. The
+# local-memory backend evicts least recently used entries once MAX_ENTRIES is
+# reached; point it at Redis or Memcached when running several processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-responses',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 200,
+            'CULL_FREQUENCY': 4,
+        },
+    },
 }
 
 
@@ -169,6 +291,11 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+
+# Let the web app read Retry-After when a report is still being rendered
+CORS_EXPOSE_HEADERS = [
+    'retry-after',
+]
 # Force show detailed errors in console
 import logging
 logging.basicConfig(
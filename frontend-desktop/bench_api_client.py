@@ -0,0 +1,51 @@
+"""Compare APIClient latency with one-connection-per-request calls.
+
+Runs against the local stub server from tests/stub_server.py; the client's
+keep-alive, retry, timeout and gzip behaviour is covered by
+tests/test_api_client.py.
+
+    python bench_api_client.py [--requests 200]
+"""
+import argparse
+import time
+import requests
+from services.api_client import APIClient
+from tests.stub_server import StubHandler, start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    client = APIClient(base_url)
+
+    try:
+        url = f"{base_url}/summary/"
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            client.request('GET', url, params={'layout': 'columnar'}).json()
+        pooled = (time.perf_counter() - start) / args.requests * 1000
+        stats = client.latency_stats()
+
+        StubHandler.reset()
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            requests.get(url, params={'layout': 'columnar'}).json()
+        unpooled = (time.perf_counter() - start) / args.requests * 1000
+        unpooled_connections = StubHandler.connections
+
+        print(f"{args.requests} GET /summary/ requests")
+        print(f"  pooled session:       {pooled:6.2f} ms/request  "
+              f"(p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms)")
+        print(f"  connection per call:  {unpooled:6.2f} ms/request  ({unpooled_connections} connections)")
+    finally:
+        client.close()
+        server.shutdown()
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""Measure ChartsWidget refresh cost on the GUI thread.
+
+Compares the previous refresh (aggregate in Python, clear the figures,
+rebuild every artist, tight_layout() and a synchronous draw() on the GUI
+thread) with the current pipeline (aggregate with NumPy in a
+ChartDataThread, update artists in place, coalesced draw_idle()).
+
+    QT_QPA_PLATFORM=offscreen python bench_charts.py [--rows 10000 1000000]
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from ui.chart_data import PARAMETERS, from_records
+from ui.charts_widget import ChartsWidget
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+
+def make_records(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    types = rng.choice(TYPES, rows)
+    flowrate = rng.normal(150, 40, rows).round(1)
+    pressure = rng.normal(6, 1.5, rows).round(1)
+    temperature = rng.normal(110, 25, rows).round(1)
+    return [
+        {
+            'equipment_name': f"EQ-{i:07d}",
+            'equipment_type': str(types[i]),
+            'flowrate': float(flowrate[i]),
+            'pressure': float(pressure[i]),
+            'temperature': float(temperature[i]),
+        }
+        for i in range(rows)
+    ]
+
+
+def legacy_refresh(widget, equipment):
+    """The refresh as it was: Python aggregation, full rebuild, synchronous draw."""
+    counts, sums = {}, {}
+    for item in equipment:
+        counts[item['equipment_type']] = counts.get(item['equipment_type'], 0) + 1
+        sums[item['equipment_type']] = sums.get(item['equipment_type'], 0) + item['flowrate']
+    types = sorted(counts, key=lambda name: (-counts[name], name))
+    sample = equipment[:20]
+
+    for fig in (widget.fig1, widget.fig2, widget.fig3):
+        fig.clear()
+    ax = widget.fig1.add_subplot(111)
+    ax.pie([counts[name] for name in types], labels=types, autopct='%1.1f%%', startangle=90)
+    ax = widget.fig2.add_subplot(111)
+    ax.bar(range(len(types)), [sums[name] / counts[name] for name in types])
+    ax.set_xticks(range(len(types)))
+    ax.set_xticklabels(types, rotation=45, ha='right')
+    widget.fig2.tight_layout()
+    ax = widget.fig3.add_subplot(111)
+    for field, label, color in PARAMETERS:
+        ax.plot(range(len(sample)), [item[field] for item in sample], marker='o', label=label, color=color)
+    ax.legend()
+    widget.fig3.tight_layout()
+    for canvas in (widget.canvas1, widget.canvas2, widget.canvas3):
+        canvas.draw()
+
+
+def wait_for_draws(app, widget, previous, timeout=30):
+    """Process events until every canvas has drawn again; returns the elapsed seconds."""
+    start = time.perf_counter()
+    while widget.draw_count < previous + 3 and time.perf_counter() - start < timeout:
+        app.processEvents()
+    return time.perf_counter() - start
+
+
+def bench(app, widget, rows, repeats):
+    equipment = make_records(rows)
+    print(f"\n{rows:,} records")
+
+    legacy = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        legacy_refresh(widget, equipment)
+        legacy.append(time.perf_counter() - start)
+    print(f"  previous refresh (all on GUI thread):   {min(legacy) * 1000:8.1f} ms blocked")
+
+    # Rebuild the widget's own artists after the legacy run cleared the figures
+    widget.deleteLater()
+    widget = make_widget()
+    widget.apply_chart_data(from_records(equipment))
+    wait_for_draws(app, widget, widget.draw_count - 3)
+
+    prepare, apply, paint = [], [], []
+    for seed in range(repeats):
+        # Same types, new values: the steady state of refreshing a live dataset
+        for item, value in zip(equipment, np.random.default_rng(seed).normal(150, 40, rows)):
+            item['flowrate'] = float(value)
+        start = time.perf_counter()
+        chart_data = from_records(equipment)
+        prepare.append(time.perf_counter() - start)
+
+        drawn = widget.draw_count
+        start = time.perf_counter()
+        widget.apply_chart_data(chart_data)
+        apply.append(time.perf_counter() - start)
+        paint.append(wait_for_draws(app, widget, drawn))
+    print(f"  NumPy aggregation (ChartDataThread):    {min(prepare) * 1000:8.1f} ms off GUI thread")
+    print(f"  in-place artist update:                 {min(apply) * 1000:8.1f} ms blocked")
+    print(f"  coalesced draw_idle paint:              {min(paint) * 1000:8.1f} ms blocked")
+
+    drawn = widget.draw_count
+    for _ in range(10):
+        widget.apply_chart_data(chart_data)
+    wait_for_draws(app, widget, drawn)
+    print(f"  10 back-to-back refreshes painted {(widget.draw_count - drawn) // 3} time(s)")
+    return widget
+
+
+def make_widget():
+    widget = ChartsWidget()
+    widget.resize(1000, 800)
+    widget.show()
+    widget.draw_count = 0
+
+    def count_draw(event):
+        widget.draw_count += 1
+    for canvas in (widget.canvas1, widget.canvas2, widget.canvas3):
+        canvas.mpl_connect('draw_event', count_draw)
+    return widget
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    widget = make_widget()
+    for rows in args.rows:
+        widget = bench(app, widget, rows, args.repeats)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""Measure desktop cold start: time to first paint and what is imported before it.
+
+Starts main.py in a fresh interpreter under -X importtime, records when the
+splash screen, the main window and (after switching to it) the Charts tab
+first paint, and sums the import time spent before the main window painted
+per root package (self time, so requests is not hidden inside services).
+
+    QT_QPA_PLATFORM=offscreen python bench_startup.py [--runs 5] [--eager-charts]
+
+--eager-charts imports the charts module before the window is built, as
+startup did before the Charts tab was loaded lazily.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+FIRST_PAINT_MARKER = 'bench_startup: main window painted'
+
+CHILD = r'''
+import json, os, sys, time
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication, QMainWindow, QSplashScreen, QWidget
+
+app = QApplication(sys.argv)
+painted = {}
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and isinstance(obj, QWidget):
+            window = obj.window()
+            if isinstance(window, QSplashScreen):
+                painted.setdefault('splash', time.time())
+            elif isinstance(window, QMainWindow):
+                if 'window' not in painted:
+                    painted['window'] = time.time()
+                    sys.stderr.write(MARKER + '\n')
+                    QTimer.singleShot(0, lambda: window.tabs.setCurrentWidget(window.charts_tab))
+                elif type(obj).__name__ == 'FigureCanvasQTAgg' and 'charts' not in painted:
+                    painted['charts'] = time.time()
+                    QTimer.singleShot(0, app.quit)
+        return False
+
+first_paint = FirstPaint()
+app.installEventFilter(first_paint)
+QTimer.singleShot(30000, app.quit)
+if EAGER_CHARTS:
+    import ui.charts_widget
+import main
+try:
+    main.main()
+except SystemExit:
+    pass
+print(json.dumps(painted))
+sys.stdout.flush()
+# Skip interpreter teardown: the initial data load may still be retrying
+os._exit(0)
+'''
+
+
+def parse_importtime(stderr):
+    """Import time (ms) spent in each root package before the main window painted."""
+    totals = defaultdict(float)
+    for line in stderr.split(FIRST_PAINT_MARKER)[0].splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us) / 1000
+    return totals
+
+
+def run_once(eager_charts):
+    code = CHILD.replace('MARKER', repr(FIRST_PAINT_MARKER)).replace('EAGER_CHARTS', str(eager_charts))
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=120,
+    )
+    if not result.stdout.strip():
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('startup failed:\n' + '\n'.join(errors[-20:]))
+    painted = json.loads(result.stdout.strip().splitlines()[-1])
+    return {name: (at - start) * 1000 for name, at in painted.items()}, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--eager-charts', action='store_true')
+    args = parser.parse_args()
+
+    # One untimed run warms the OS file cache and compiles bytecode
+    run_once(args.eager_charts)
+    paints, imports = defaultdict(list), defaultdict(list)
+    for _ in range(args.runs):
+        painted, totals = run_once(args.eager_charts)
+        for name, ms in painted.items():
+            paints[name].append(ms)
+        for package, ms in totals.items():
+            imports[package].append(ms)
+
+    print(f"Cold start, median of {args.runs} runs{' (charts imported eagerly)' if args.eager_charts else ''}")
+    for name, label in (('splash', 'splash screen'), ('window', 'main window'), ('charts', 'Charts tab')):
+        if paints[name]:
+            print(f"  first paint of {label:14} {statistics.median(paints[name]):7.0f} ms")
+
+    print("\nImport time before the main window painted (ms)")
+    medians = {package: statistics.median(values) for package, values in imports.items()}
+    for package, ms in sorted(medians.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {package:24} {ms:7.1f}")
+    print(f"  {'total':24} {sum(medians.values()):7.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
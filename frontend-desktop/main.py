@@ -1,21 +1,42 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from ui.main_window import MainWindow
-from services.api_client import APIClient
+from PyQt5.QtWidgets import QApplication, QSplashScreen
+from PyQt5.QtGui import QColor, QPixmap
+from PyQt5.QtCore import Qt
+
+def create_splash():
+    """Splash screen shown while the rest of the application is imported."""
+    pixmap = QPixmap(480, 240)
+    pixmap.fill(QColor("#1e40af"))
+    splash = QSplashScreen(pixmap)
+    splash.showMessage("Chemical Equipment Visualizer\n\nLoading...", Qt.AlignCenter, Qt.white)
+    return splash
 
 def main():
     """Entry point for the desktop application."""
-    app = QApplication(sys.argv)
+    # Reuse an existing application, e.g. one created by bench_startup.py
+    app = QApplication.instance() or QApplication(sys.argv)
     
     app.setApplicationName("Chemical Equipment Visualizer")
     app.setOrganizationName("Your Organization")
     
+    splash = create_splash()
+    splash.show()
+    app.processEvents()
+    
+    # Imported after the splash is up: requests, NumPy and the widgets take
+    # most of the startup time (matplotlib waits for the Charts tab)
+    from services.api_client import APIClient
+    from ui.main_window import MainWindow
+    
     api_client = APIClient()
     
     window = MainWindow(api_client)
     window.show()
+    splash.finish(window)
     
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    api_client.close()
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,50 +1,428 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import urlsplit
 import requests
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from .dataset_cache import DatasetCache, default_cache_dir
+
+def decode_columnar(data: Dict) -> Dict:
+    """Expand a ?layout=columnar payload back into a list of record dicts."""
+    columns = data.pop('equipment_columns', None)
+    if columns is not None:
+        fields = list(columns.keys())
+        data['equipment_records'] = [
+            dict(zip(fields, values)) for values in zip(*columns.values())
+        ]
+    return data
+
+def multipart_file_body(field: str, filename: str, f, boundary: str, block_size: int = 1024 * 1024):
+    """Yield a multipart/form-data body holding one file, reading the file block by block."""
+    # Quotes and line breaks in the name are percent-encoded, as browsers do
+    filename = filename.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+    yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+           f'Content-Type: text/csv\r\n\r\n').encode()
+    while block := f.read(block_size):
+        yield block
+    yield f'\r\n--{boundary}--\r\n'.encode()
+
+def gzip_stream(blocks, level: int = 6):
+    """gzip-compress an iterable of byte strings, yielding compressed blocks as they fill."""
+    # wbits=31: gzip header and trailer rather than a raw zlib stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@dataclass
+class RequestTiming:
+    """Latency of one API request, including reading the response body."""
+    method: str
+    path: str
+    status: Optional[int]
+    elapsed_ms: float
+    size: int
+
+    def __str__(self):
+        status = self.status if self.status is not None else 'failed'
+        return f"{self.method} {self.path} {status} · {self.elapsed_ms:.0f} ms · {format_size(self.size)}"
+
+def format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
 
 class APIClient:
     """
     Client for communicating with Django backend.
+    
+    All requests share one pooled requests.Session, so connections are kept
+    alive between calls. Idempotent requests are retried with exponential
+    backoff on connection errors and 502/503/504 responses, and every request
+    has a (connect, read) timeout. Each request's latency is recorded in
+    `timings` and passed to the listeners added with add_timing_listener().
+    
+    Dataset payloads are cached in memory and under cache_dir (by default
+    default_cache_dir(); '' keeps them in memory only) and revalidated with
+    If-None-Match, so unchanged datasets cost a 304 instead of a full download.
     """
     
-    def __init__(self, base_url: str = "http://127.0.0.1:8000/api"):
+    # Files larger than this are sent with the resumable chunked upload API
+    CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+    CHUNK_SIZE = 8 * 1024 * 1024
+    
+    # (connect, read) timeout in seconds
+    DEFAULT_TIMEOUT = (3.05, 30)
+    # Number of recent request timings kept for latency_stats()
+    TIMING_HISTORY = 200
+    # Seconds wait_for_job polls before giving up on an upload job
+    JOB_TIMEOUT = 30 * 60
+    # Seconds download_report waits for a report the server is still rendering
+    REPORT_TIMEOUT = 5 * 60
+    
+    def __init__(self, base_url: str = "http://127.0.0.1:8000/api",
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 retries: int = 3, backoff_factor: float = 0.5, pool_size: int = 10,
+                 cache_dir: Optional[str] = None):
         self.base_url = base_url
+        self.timeout = timeout
+        # Open chunked upload sessions by (path, size), so a failed upload resumes on retry
+        self.upload_sessions: Dict[tuple, str] = {}
+        
+        self.session = requests.Session()
+        # Everything urllib3 can decode: gzip and deflate, plus br when brotli is installed
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            # Return the last error response instead of raising RetryError
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self.timings = deque(maxlen=self.TIMING_HISTORY)
+        self._timing_listeners: List[Callable[[RequestTiming], None]] = []
+        self._timings_lock = threading.Lock()
+        
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.dataset_cache = DatasetCache(cache_dir, decode=lambda body: decode_columnar(json.loads(body)))
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+    
+    def add_timing_listener(self, callback: Callable[[RequestTiming], None]):
+        """Call callback(timing) after every request, from the thread that made it."""
+        self._timing_listeners.append(callback)
+    
+    def latency_stats(self) -> Dict:
+        """Count, mean, median and 95th percentile latency (ms) of recent requests."""
+        with self._timings_lock:
+            elapsed = sorted(timing.elapsed_ms for timing in self.timings)
+        if not elapsed:
+            return {'count': 0, 'mean_ms': None, 'p50_ms': None, 'p95_ms': None}
+        return {
+            'count': len(elapsed),
+            'mean_ms': sum(elapsed) / len(elapsed),
+            'p50_ms': elapsed[len(elapsed) // 2],
+            'p95_ms': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+        }
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the pooled session and record its latency."""
+        kwargs.setdefault('timeout', self.timeout)
+        status = None
+        size = 0
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            status = response.status_code
+            if not kwargs.get('stream'):
+                size = len(response.content)
+            return response
+        finally:
+            self._record(RequestTiming(
+                method=method,
+                path=self._path(url),
+                status=status,
+                elapsed_ms=(time.perf_counter() - start) * 1000,
+                size=size,
+            ))
+    
+    def _path(self, url: str) -> str:
+        if url.startswith(self.base_url):
+            return url[len(self.base_url):] or '/'
+        return urlsplit(url).path
+    
+    def _record(self, timing: RequestTiming):
+        with self._timings_lock:
+            self.timings.append(timing)
+        for callback in self._timing_listeners:
+            callback(timing)
+        
+    def upload_file(self, file_path: str, compress: bool = False) -> Dict:
+        """Upload CSV file to backend and return the queued upload job.
+        
+        With compress=True a plain .csv is gzip-compressed on the fly and sent
+        with Content-Encoding: gzip; .csv.gz and .csv.zst files are sent as is.
+        """
+        if os.path.getsize(file_path) > self.CHUNKED_UPLOAD_THRESHOLD:
+            return self.upload_file_chunked(file_path, compress=compress)
         
-    def upload_file(self, file_path: str) -> Dict:
-        """Upload CSV file to backend."""
         url = f"{self.base_url}/upload/"
         
         with open(file_path, 'rb') as f:
-            files = {'file': f}
-            response = requests.post(url, files=files)
+            if compress and file_path.lower().endswith('.csv'):
+                # The multipart body is compressed as it is read, into a temporary
+                # file that requests then streams with a Content-Length
+                boundary = uuid.uuid4().hex
+                parts = multipart_file_body('file', os.path.basename(file_path), f, boundary)
+                with tempfile.TemporaryFile() as body:
+                    for block in gzip_stream(parts):
+                        body.write(block)
+                    body.seek(0)
+                    response = self.request('POST', url, data=body, headers={
+                        'Content-Type': f'multipart/form-data; boundary={boundary}',
+                        'Content-Encoding': 'gzip',
+                    })
+            else:
+                response = self.request('POST', url, files={'file': (os.path.basename(file_path), f)})
             
         response.raise_for_status()
         return response.json()
     
-    def get_summary(self) -> Dict:
-        """Get summary of most recent dataset."""
-        url = f"{self.base_url}/summary/"
-        response = requests.get(url)
+    def get_upload_session(self, session_id: str) -> Dict:
+        """Get a chunked upload session, including the offset to resume from."""
+        url = f"{self.base_url}/uploads/{session_id}/"
+        response = self.request('GET', url)
         response.raise_for_status()
         return response.json()
     
+    def upload_file_chunked(self, file_path: str, chunk_size: Optional[int] = None,
+                            max_retries: int = 5, compress: bool = False,
+                            on_progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Upload a large CSV in chunks and return the queued upload job.
+        
+        Dropped connections are retried with backoff, resuming from the last
+        offset the server acknowledged. If the upload still fails, calling this
+        again for the same file resumes the same session. With compress=True
+        every chunk of a plain .csv is sent gzip-compressed.
+        """
+        compress = compress and file_path.lower().endswith('.csv')
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        size = os.path.getsize(file_path)
+        key = (os.path.abspath(file_path), size)
+        
+        session_id = self.upload_sessions.get(key)
+        offset = 0
+        if session_id:
+            try:
+                session = self.get_upload_session(session_id)
+                if session['status'] != 'open':
+                    session_id = None
+                else:
+                    offset = session['offset']
+            except requests.HTTPError:
+                session_id = None
+        if not session_id:
+            response = self.request('POST', f"{self.base_url}/uploads/",
+                                    json={'filename': os.path.basename(file_path), 'size': size})
+            response.raise_for_status()
+            session_id = response.json()['id']
+            self.upload_sessions[key] = session_id
+        
+        chunk_url = f"{self.base_url}/uploads/{session_id}/chunk/"
+        retries = 0
+        with open(file_path, 'rb') as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                headers = {'Content-Type': 'application/octet-stream'}
+                if compress:
+                    chunk = gzip.compress(chunk, compresslevel=6)
+                    headers['Content-Encoding'] = 'gzip'
+                try:
+                    response = self.request('PUT', chunk_url, params={'offset': offset}, data=chunk,
+                                            headers=headers)
+                    if response.status_code == 409:
+                        # The server acknowledged a different offset; continue from there
+                        offset = response.json()['offset']
+                        continue
+                    response.raise_for_status()
+                    offset = response.json()['offset']
+                    retries = 0
+                    if on_progress:
+                        on_progress(offset, size)
+                except (requests.ConnectionError, requests.Timeout):
+                    retries += 1
+                    if retries > max_retries:
+                        raise
+                    time.sleep(min(2 ** retries, 30))
+                    offset = self.get_upload_session(session_id)['offset']
+        
+        response = self.request('POST', f"{self.base_url}/uploads/{session_id}/complete/")
+        response.raise_for_status()
+        self.upload_sessions.pop(key, None)
+        return response.json()
+    
+    def get_job(self, job_id: str) -> Dict:
+        """Get status and progress of an upload job."""
+        url = f"{self.base_url}/jobs/{job_id}/"
+        response = self.request('GET', url)
+        response.raise_for_status()
+        return response.json()
+    
+    def wait_for_job(self, job_id: str, poll_interval: float = 0.5,
+                     on_progress: Optional[Callable[[Dict], None]] = None,
+                     timeout: Optional[float] = None) -> Dict:
+        """Poll an upload job until it finishes and return its final state.
+        
+        Raises TimeoutError if the job is still queued or running after
+        `timeout` seconds (JOB_TIMEOUT by default).
+        """
+        deadline = time.monotonic() + (self.JOB_TIMEOUT if timeout is None else timeout)
+        while True:
+            job = self.get_job(job_id)
+            if on_progress:
+                on_progress(job)
+            if job['status'] == 'succeeded':
+                return job
+            if job['status'] == 'failed':
+                raise RuntimeError(job.get('error') or 'Upload failed')
+            if time.monotonic() + poll_interval > deadline:
+                raise TimeoutError(
+                    f"Upload job did not finish in time (still {job['status']}, "
+                    f"{job.get('rows_processed') or 0:,} rows processed)"
+                )
+            time.sleep(poll_interval)
+    
+    def get_summary(self, records: bool = False) -> Dict:
+        """Get summary of most recent dataset (with its equipment_records if records=True)."""
+        url = f"{self.base_url}/summary/"
+        data = self._get_dataset_payload(url, self.dataset_cache.latest_id, records)
+        self.dataset_cache.latest_id = data['id']
+        return data
+    
     def get_history(self) -> List[Dict]:
         """Get list of all datasets (last 5)."""
         url = f"{self.base_url}/history/"
-        response = requests.get(url)
+        response = self.request('GET', url)
         response.raise_for_status()
         return response.json()
     
-    def get_dataset(self, dataset_id: int) -> Dict:
-        """Get specific dataset details."""
+    def get_dataset(self, dataset_id: int, records: bool = False) -> Dict:
+        """Get specific dataset details (with its equipment_records if records=True).
+        
+        The views page records in through get_records() instead, so by default
+        only the dataset's metadata and summary_stats are downloaded.
+        """
         url = f"{self.base_url}/dataset/{dataset_id}/"
-        response = requests.get(url)
+        return self._get_dataset_payload(url, dataset_id, records)
+    
+    def get_cached_dataset(self, dataset_id: int) -> Optional[Dict]:
+        """Return a dataset from the local cache without contacting the server, or None."""
+        entry = self.dataset_cache.get(dataset_id)
+        return entry.payload if entry else None
+    
+    def _get_dataset_payload(self, url: str, cached_id: Optional[int], records: bool = False) -> Dict:
+        """GET a dataset payload, revalidating the cached copy of cached_id if there is one.
+        
+        /summary/ and /dataset/<id>/ serve the same ETag for the same dataset,
+        so the summary is revalidated against the dataset it returned last.
+        Payloads with and without records have different ETags, so a cached
+        copy is only reused for the same kind of request.
+        """
+        cached = self.dataset_cache.get(cached_id) if cached_id is not None else None
+        headers = {'If-None-Match': cached.etag} if cached and cached.etag else {}
+        params = {'layout': 'columnar'} if records else {'records': 'false'}
+        response = self.request('GET', url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached.payload
+        if response.status_code == 404 and cached_id is not None:
+            self.dataset_cache.discard(cached_id)
+        response.raise_for_status()
+        
+        data = decode_columnar(response.json())
+        self.dataset_cache.put(data['id'], response.headers.get('ETag'), response.content, data)
+        return data
+    
+    def get_aggregates(self, dataset_id: int) -> Dict:
+        """Get per-type count/mean/min/max of every parameter for a dataset."""
+        url = f"{self.base_url}/dataset/{dataset_id}/aggregates/"
+        response = self.request('GET', url)
         response.raise_for_status()
         return response.json()
     
-    def download_report(self, dataset_id: int, save_path: str):
-        """Download PDF report."""
+    def get_series(self, dataset_id: int, param: str, points: int = 1000,
+                   method: str = 'lttb') -> Dict:
+        """Get one parameter over the whole dataset, downsampled to about `points` samples.
+        
+        method is 'lttb' (shape-preserving) or 'minmax' (keeps every bucket's extremes).
+        """
+        url = f"{self.base_url}/dataset/{dataset_id}/series/"
+        params = {'param': param, 'points': points, 'method': method}
+        response = self.request('GET', url, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    def get_records(self, dataset_id: int, cursor: Optional[int] = None, limit: int = 500,
+                    fields: Optional[List[str]] = None,
+                    equipment_type: Optional[str] = None, columnar: bool = False) -> Dict:
+        """Get one keyset-paginated page of equipment records for a dataset.
+        
+        With columnar=True the page holds {field: [values...]} under 'columns'
+        instead of a list of record dicts under 'results'.
+        """
+        url = f"{self.base_url}/dataset/{dataset_id}/records/"
+        params = {'limit': limit}
+        if columnar:
+            params['layout'] = 'columnar'
+        if cursor is not None:
+            params['cursor'] = cursor
+        if fields:
+            params['fields'] = ','.join(fields)
+        if equipment_type:
+            params['equipment_type'] = equipment_type
+        response = self.request('GET', url, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    def download_report(self, dataset_id: int, save_path: str, timeout: Optional[float] = None):
+        """Download PDF report.
+        
+        A report that is not cached yet is rendered by the server in the
+        background and answered with 202 and Retry-After; the request is
+        repeated until the PDF is ready, or TimeoutError is raised after
+        `timeout` seconds (REPORT_TIMEOUT by default).
+        """
         url = f"{self.base_url}/report/{dataset_id}/"
-        response = requests.get(url)
+        deadline = time.monotonic() + (self.REPORT_TIMEOUT if timeout is None else timeout)
+        while True:
+            response = self.request('GET', url)
+            if response.status_code != 202:
+                break
+            delay = float(response.headers.get('Retry-After', 1))
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError("The report was not rendered in time")
+            time.sleep(delay)
         response.raise_for_status()
         
         with open(save_path, 'wb') as f:
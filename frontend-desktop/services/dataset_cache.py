@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+def default_cache_dir() -> str:
+    """Per-user cache directory for dataset payloads."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'chemical-equipment-visualizer', 'datasets')
+
+@dataclass
+class CachedDataset:
+    """A dataset payload with the ETag it was served with."""
+    dataset_id: int
+    etag: Optional[str]
+    payload: Dict[str, Any]
+    size: int
+
+class DatasetCache:
+    """Two-level LRU cache of dataset payloads keyed by dataset id.
+
+    Decoded payloads are kept in memory up to max_memory_bytes (measured by
+    the size of the response body) and the raw response bodies on disk up to
+    max_disk_bytes, so datasets survive a restart. Disk recency is tracked by
+    file mtime. With directory=None only the memory level is used.
+
+    Payloads are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, directory: Optional[str] = None, decode=json.loads,
+                 max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.decode = decode
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: 'OrderedDict[int, CachedDataset]' = OrderedDict()
+        self._memory_bytes = 0
+        self._latest_id: Optional[int] = None
+        self._lock = threading.Lock()
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                self.directory = None
+
+    def get(self, dataset_id: int) -> Optional[CachedDataset]:
+        """Return the cached dataset from memory, else from disk, or None."""
+        with self._lock:
+            entry = self._memory.get(dataset_id)
+            if entry is not None:
+                self._memory.move_to_end(dataset_id)
+                return entry
+
+        entry = self._read_disk(dataset_id)
+        if entry is not None:
+            with self._lock:
+                self._remember(entry)
+        return entry
+
+    def put(self, dataset_id: int, etag: Optional[str], body: bytes,
+            payload: Dict[str, Any]) -> CachedDataset:
+        """Cache a freshly downloaded payload and its raw response body."""
+        entry = CachedDataset(dataset_id, etag, payload, len(body))
+        with self._lock:
+            self._remember(entry)
+        self._write_disk(entry, body)
+        return entry
+
+    def discard(self, dataset_id: int):
+        """Forget a dataset, e.g. after the server no longer has it."""
+        with self._lock:
+            entry = self._memory.pop(dataset_id, None)
+            if entry is not None:
+                self._memory_bytes -= entry.size
+        if self.directory:
+            try:
+                os.remove(self._path(dataset_id))
+            except OSError:
+                pass
+
+    @property
+    def latest_id(self) -> Optional[int]:
+        """Id of the dataset /summary/ returned last, remembered across restarts."""
+        if not self.directory:
+            return self._latest_id
+        try:
+            with open(os.path.join(self.directory, 'latest'), 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return self._latest_id
+
+    @latest_id.setter
+    def latest_id(self, dataset_id: int):
+        self._latest_id = dataset_id
+        if self.directory:
+            try:
+                self._atomic_write(os.path.join(self.directory, 'latest'), str(dataset_id).encode())
+            except OSError:
+                pass
+
+    def _remember(self, entry: CachedDataset):
+        previous = self._memory.pop(entry.dataset_id, None)
+        if previous is not None:
+            self._memory_bytes -= previous.size
+        self._memory[entry.dataset_id] = entry
+        self._memory_bytes += entry.size
+        # Evict least recently used entries, but always keep the newest one
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    def _path(self, dataset_id: int) -> str:
+        return os.path.join(self.directory, f"dataset_{dataset_id}.json")
+
+    def _read_disk(self, dataset_id: int) -> Optional[CachedDataset]:
+        if not self.directory:
+            return None
+        path = self._path(dataset_id)
+        try:
+            with open(path, 'rb') as f:
+                # First line holds the ETag, the rest is the response body
+                etag = f.readline().decode().strip() or None
+                body = f.read()
+            os.utime(path)
+            payload = self.decode(body)
+        except (OSError, ValueError):
+            return None
+        return CachedDataset(dataset_id, etag, payload, len(body))
+
+    def _write_disk(self, entry: CachedDataset, body: bytes):
+        if not self.directory:
+            return
+        try:
+            self._atomic_write(self._path(entry.dataset_id), (entry.etag or '').encode() + b'\n' + body)
+            self._evict_disk()
+        except OSError:
+            # The disk cache is best effort; the memory cache still works
+            pass
+
+    def _atomic_write(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _evict_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith('dataset_') and name.endswith('.json'):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        # Oldest first; the most recently written file is never removed
+        for _, size, name in files[:-1]:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
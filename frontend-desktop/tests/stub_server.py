@@ -0,0 +1,129 @@
+"""A local HTTP server standing in for the backend API in tests and benchmarks."""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUMMARY = json.dumps({
+    'id': 1,
+    'filename': 'stub.csv',
+    'row_count': 2000,
+    'equipment_columns': {
+        'equipment_name': [f"EQ-{i:04d}" for i in range(2000)],
+        'flowrate': [float(i % 300) for i in range(2000)],
+    },
+}).encode()
+
+
+def dataset_body(dataset_id, version=0):
+    return json.dumps({
+        'id': dataset_id,
+        'filename': f'dataset_{dataset_id}.csv',
+        'row_count': 3,
+        'version': version,
+        'equipment_columns': {'equipment_name': ['A', 'B', 'C'], 'flowrate': [1.0, 2.0, 3.0]},
+    }).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, Nagle's algorithm
+    # and delayed ACKs add ~40 ms to every response on a kept-alive connection
+    disable_nagle_algorithm = True
+    connections = 0
+    flaky_calls = 0
+    # /dataset/<id>/ bodies; tests replace or remove entries to change the server's data
+    datasets = {}
+    # (dataset id, If-None-Match, status) of every /dataset/<id>/ request
+    dataset_requests = []
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.connections = 0
+            cls.flaky_calls = 0
+            cls.datasets = {7: dataset_body(7), 8: dataset_body(8)}
+            cls.dataset_requests = []
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, gzipped=False, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if etag:
+            self.send_header('ETag', etag)
+        if gzipped:
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/api/summary/'):
+            self.send_body(200, SUMMARY, 'gzip' in self.headers.get('Accept-Encoding', ''))
+        elif self.path.startswith('/api/history/'):
+            # Fails twice, then succeeds: exercises retry with backoff
+            with StubHandler.lock:
+                StubHandler.flaky_calls += 1
+                calls = StubHandler.flaky_calls
+            if calls <= 2:
+                self.send_body(503, b'{"error": "busy"}')
+            else:
+                self.send_body(200, b'[]')
+        elif self.path.startswith('/api/dataset/'):
+            self.send_dataset(int(self.path.split('/')[3]))
+        elif self.path.startswith('/api/jobs/running/'):
+            self.send_body(200, b'{"id": "running", "status": "running", "rows_processed": 100}')
+        elif self.path.startswith('/api/jobs/'):
+            time.sleep(1)
+            self.send_body(200, b'{}')
+        else:
+            self.send_body(404, b'{"error": "not found"}')
+
+    def send_dataset(self, dataset_id):
+        """Serve a dataset with a strong ETag of its body, answering a matching If-None-Match with 304."""
+        body = StubHandler.datasets.get(dataset_id)
+        if_none_match = self.headers.get('If-None-Match')
+        etag = f'"{hashlib.sha1(body).hexdigest()}"' if body is not None else None
+        if body is None:
+            status = 404
+        elif if_none_match == etag:
+            status = 304
+        else:
+            status = 200
+        with StubHandler.lock:
+            StubHandler.dataset_requests.append((dataset_id, if_none_match, status))
+
+        if status == 404:
+            self.send_body(404, b'{"error": "Dataset not found"}')
+        elif status == 304:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+        else:
+            self.send_body(200, body, etag=etag)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out hang up before the slow endpoint answers
+        pass
+
+
+def start_stub_server():
+    """Serve StubHandler on a free local port in a daemon thread; returns (server, base_url)."""
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api"
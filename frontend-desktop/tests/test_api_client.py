@@ -0,0 +1,62 @@
+"""APIClient against a local stub server.
+
+    python -m unittest discover tests
+"""
+import tempfile
+import time
+import unittest
+import requests
+from services.api_client import APIClient
+from tests.stub_server import StubHandler, start_stub_server
+
+
+class APIClientTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.reset()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.client = APIClient(self.base_url, timeout=(1, 0.3), retries=3, backoff_factor=0.05,
+                                cache_dir=cache_dir.name)
+        self.addCleanup(self.client.close)
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.client.get_summary()
+        self.assertEqual(StubHandler.connections, 1)
+
+    def test_gzip_accepted(self):
+        response = self.client.request('GET', f"{self.base_url}/summary/")
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertEqual(response.json()['row_count'], 2000)
+
+    def test_retry_with_backoff(self):
+        self.assertEqual(self.client.get_history(), [])
+        self.assertEqual(StubHandler.flaky_calls, 3)
+
+    def test_read_timeout(self):
+        start = time.perf_counter()
+        # Read timeouts of retried GETs surface as ConnectionError once retries run out
+        with self.assertRaises((requests.ConnectionError, requests.Timeout)):
+            self.client.get_job('slow')
+        self.assertLess(time.perf_counter() - start, 5)
+
+        timing = self.client.timings[-1]
+        self.assertEqual(timing.path, '/jobs/slow/')
+        self.assertIsNone(timing.status)
+
+    def test_wait_for_job_deadline(self):
+        with self.assertRaises(TimeoutError):
+            self.client.wait_for_job('running', poll_interval=0.05, timeout=0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
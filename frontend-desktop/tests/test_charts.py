@@ -0,0 +1,182 @@
+"""Chart data preparation and in-place chart updates.
+
+    QT_QPA_PLATFORM=offscreen python -m unittest discover tests
+"""
+import sys
+import unittest
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from ui.chart_data import ChartDataThread, from_api, from_records, minmax_decimate
+from ui.charts_widget import ChartsWidget
+
+
+def setUpModule():
+    global app
+    app = QApplication.instance() or QApplication(sys.argv)
+
+
+def record(equipment_type, flowrate, pressure=1.0, temperature=20.0):
+    return {'equipment_type': equipment_type, 'flowrate': flowrate,
+            'pressure': pressure, 'temperature': temperature}
+
+
+class MinMaxDecimateTests(unittest.TestCase):
+    def setUp(self):
+        self.y = np.sin(np.arange(10000) / 300)
+        self.y[1234] = 50.0
+        self.y[8765] = -50.0
+
+    def test_point_budget_and_extremes(self):
+        positions = minmax_decimate(self.y, 200)
+        self.assertLessEqual(len(positions), 200)
+        self.assertTrue(np.all(np.diff(positions) > 0))
+        self.assertIn(1234, positions)
+        self.assertIn(8765, positions)
+
+    def test_short_series_is_kept_whole(self):
+        np.testing.assert_array_equal(minmax_decimate(self.y[:150], 200), np.arange(150))
+
+    def test_missing_values_are_skipped(self):
+        y = self.y.copy()
+        y[:100] = np.nan
+        positions = minmax_decimate(y, 200)
+        self.assertTrue(np.all(positions >= 100))
+        self.assertFalse(np.isnan(y[positions]).any())
+        self.assertEqual(len(minmax_decimate(np.full(5000, np.nan), 200)), 0)
+
+
+class ChartDataTests(unittest.TestCase):
+    def test_from_records(self):
+        equipment = [
+            record('Valve', 10.0), record('Pump', 20.0), record('Valve', None),
+            record('Pump', 40.0), record('Reactor', 5.0), record('Valve', 30.0),
+        ]
+        data = from_records(equipment, points=4)
+        # Largest types first, ties by name
+        self.assertEqual(data['types'], ['Valve', 'Pump', 'Reactor'])
+        np.testing.assert_array_equal(data['counts'], [3, 2, 1])
+        # A missing reading is left out of its type's mean
+        np.testing.assert_allclose(data['means']['flowrate'], [20.0, 30.0, 5.0])
+        self.assertEqual(data['total'], 6)
+
+        positions, values = data['trends']['flowrate']
+        self.assertLessEqual(len(positions), 4)
+        self.assertNotIn(2, positions)
+        np.testing.assert_array_equal(values, [equipment[p]['flowrate'] for p in positions])
+
+    def test_from_records_empty(self):
+        data = from_records([])
+        self.assertEqual(data['types'], [])
+        self.assertEqual(data['total'], 0)
+        self.assertEqual(len(data['trends']['pressure'][0]), 0)
+
+    def test_from_api(self):
+        stats = {'count': 2, 'mean': 1.5, 'min': 1.0, 'max': 2.0}
+        aggregates = {'types': [
+            {'equipment_type': 'Pump', 'count': 2, 'flowrate': stats, 'pressure': stats, 'temperature': stats},
+            {'equipment_type': 'Valve', 'count': 1, 'flowrate': {**stats, 'mean': None},
+             'pressure': stats, 'temperature': stats},
+        ]}
+        series = {field: {'x': [0, 2], 'y': [1.0, 2.0], 'total': 3}
+                  for field in ('flowrate', 'pressure', 'temperature')}
+        data = from_api(aggregates, series)
+        self.assertEqual(data['types'], ['Pump', 'Valve'])
+        np.testing.assert_array_equal(data['counts'], [2, 1])
+        np.testing.assert_array_equal(data['means']['flowrate'], [1.5, np.nan])
+        np.testing.assert_array_equal(data['trends']['pressure'][0], [0, 2])
+        self.assertEqual(data['total'], 3)
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def get_aggregates(self, dataset_id):
+        self.calls.append(('aggregates', dataset_id))
+        if self.fail:
+            raise ConnectionError('server unavailable')
+        return {'types': []}
+
+    def get_series(self, dataset_id, param, points):
+        self.calls.append(('series', param, points))
+        return {'x': [0], 'y': [1.0], 'total': 1}
+
+
+class ChartDataThreadTests(unittest.TestCase):
+    def run_thread(self, thread):
+        results = []
+        thread.finished.connect(lambda generation, data: results.append((generation, data)))
+        thread.error.connect(lambda generation, message: results.append((generation, message)))
+        # run() in the test thread; the signals are delivered directly
+        thread.run()
+        return results
+
+    def test_server_side_data(self):
+        client = FakeClient()
+        [(generation, data)] = self.run_thread(ChartDataThread(3, api_client=client, dataset_id=9, points=50))
+        self.assertEqual(generation, 3)
+        self.assertEqual(data['total'], 1)
+        self.assertIn(('series', 'temperature', 50), client.calls)
+
+    def test_records_without_server(self):
+        [(_, data)] = self.run_thread(ChartDataThread(1, equipment=[record('Pump', 1.0)]))
+        self.assertEqual(data['types'], ['Pump'])
+
+    def test_error(self):
+        [(generation, message)] = self.run_thread(
+            ChartDataThread(2, api_client=FakeClient(fail=True), dataset_id=9))
+        self.assertEqual((generation, message), (2, 'server unavailable'))
+
+
+class ChartsWidgetTests(unittest.TestCase):
+    def setUp(self):
+        self.widget = ChartsWidget()
+        self.addCleanup(self.widget.deleteLater)
+
+    def apply(self, types, counts, trend):
+        self.widget.apply_chart_data({
+            'types': types,
+            'counts': np.array(counts),
+            'means': {field: np.array(counts, dtype=float) for field in ('flowrate', 'pressure', 'temperature')},
+            'trends': {'flowrate': (np.arange(len(trend)), np.array(trend, dtype=float))},
+            'total': len(trend),
+        })
+
+    def test_artists_are_reused(self):
+        lines = dict(self.widget.trend_lines)
+        self.apply(['Pump', 'Valve'], [3, 1], [1, 2, 3])
+        wedges, bars = list(self.widget.wedges), self.widget.bars
+
+        self.apply(['Pump', 'Valve'], [1, 1], [4, 5])
+        self.assertEqual(self.widget.wedges, wedges)
+        self.assertIs(self.widget.bars, bars)
+        self.assertEqual([bar.get_height() for bar in bars], [1, 1])
+        self.assertAlmostEqual(wedges[0].theta2 - wedges[0].theta1, 180)
+        self.assertEqual(self.widget.trend_lines, lines)
+        np.testing.assert_array_equal(lines['flowrate'].get_ydata(), [4, 5])
+
+    def test_new_types_replace_artists(self):
+        self.apply(['Pump', 'Valve'], [3, 1], [1])
+        wedges = list(self.widget.wedges)
+        self.apply(['Pump', 'Reactor', 'Valve'], [1, 1, 1], [1])
+        self.assertEqual(len(self.widget.wedges), 3)
+        self.assertFalse(set(wedges) & set(self.widget.wedges))
+        self.assertEqual(len(self.widget.pie_ax.patches), 3)
+
+    def test_stale_refresh_is_ignored(self):
+        self.widget.generation = 2
+        self.widget.on_chart_data(1, from_records([record('Pump', 1.0)]))
+        self.assertEqual(self.widget.wedges, [])
+        self.widget.on_chart_data(2, from_records([record('Pump', 1.0)]))
+        self.assertEqual(len(self.widget.wedges), 1)
+
+    def test_clear(self):
+        self.apply(['Pump'], [1], [1, 2])
+        self.widget.clear_charts()
+        self.assertEqual(self.widget.wedges, [])
+        self.assertEqual(len(self.widget.trend_lines['flowrate'].get_xdata()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""DatasetCache on its own, and APIClient revalidating cached datasets against the stub server.
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import tempfile
+import unittest
+import requests
+from services.api_client import APIClient
+from services.dataset_cache import DatasetCache
+from tests.stub_server import StubHandler, dataset_body, start_stub_server
+
+
+def body(dataset_id, size=0):
+    """A JSON response body of at least size bytes."""
+    return json.dumps({'id': dataset_id, 'padding': 'x' * size}).encode()
+
+
+class DatasetCacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def put(self, cache, dataset_id, size=0, etag=None):
+        raw = body(dataset_id, size)
+        return cache.put(dataset_id, etag or f'"{dataset_id}"', raw, json.loads(raw))
+
+    def test_memory_lru(self):
+        cache = DatasetCache(max_memory_bytes=250)
+        for dataset_id in (1, 2):
+            self.put(cache, dataset_id, 100)
+        # Reading 1 makes 2 the least recently used
+        cache.get(1)
+        self.put(cache, 3, 100)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1).payload['id'], 1)
+        self.assertEqual(cache.get(3).payload['id'], 3)
+
+    def test_oversized_newest_entry_is_kept(self):
+        cache = DatasetCache(max_memory_bytes=50)
+        self.put(cache, 1, 10)
+        self.put(cache, 2, 100)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(2).etag, '"2"')
+
+    def test_disk_survives_restart(self):
+        self.put(DatasetCache(self.directory), 1, 10, etag='"abc"')
+        entry = DatasetCache(self.directory).get(1)
+        self.assertEqual(entry.etag, '"abc"')
+        self.assertEqual(entry.payload, json.loads(body(1, 10)))
+
+    def test_disk_lru(self):
+        cache = DatasetCache(self.directory, max_memory_bytes=0, max_disk_bytes=300)
+        for dataset_id in (1, 2):
+            self.put(cache, dataset_id, 100)
+            os.utime(os.path.join(self.directory, f'dataset_{dataset_id}.json'), (dataset_id, dataset_id))
+        # A disk read refreshes the file's mtime, so 2 becomes the oldest
+        self.assertIsNotNone(cache.get(1))
+        self.put(cache, 3, 100)
+
+        files = sorted(name for name in os.listdir(self.directory) if name.startswith('dataset_'))
+        self.assertEqual(files, ['dataset_1.json', 'dataset_3.json'])
+
+    def test_corrupt_file_is_a_miss(self):
+        with open(os.path.join(self.directory, 'dataset_1.json'), 'wb') as f:
+            f.write(b'"etag"\n{not json')
+        self.assertIsNone(DatasetCache(self.directory).get(1))
+
+    def test_discard(self):
+        cache = DatasetCache(self.directory)
+        self.put(cache, 1)
+        cache.discard(1)
+        self.assertIsNone(cache.get(1))
+        self.assertIsNone(DatasetCache(self.directory).get(1))
+
+    def test_latest_id(self):
+        DatasetCache(self.directory).latest_id = 5
+        self.assertEqual(DatasetCache(self.directory).latest_id, 5)
+        memory_only = DatasetCache()
+        memory_only.latest_id = 6
+        self.assertEqual(memory_only.latest_id, 6)
+
+
+class RevalidationTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.reset()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+
+    def client(self):
+        client = APIClient(self.base_url, timeout=(1, 1), retries=0, cache_dir=self.cache_dir)
+        self.addCleanup(client.close)
+        return client
+
+    def statuses(self):
+        return [status for _, _, status in StubHandler.dataset_requests]
+
+    def test_unchanged_dataset_is_not_downloaded_again(self):
+        client = self.client()
+        first = client.get_dataset(7)
+        self.assertIs(client.get_dataset(7), first)
+        self.assertEqual(self.statuses(), [200, 304])
+        self.assertEqual(first['equipment_records'][1], {'equipment_name': 'B', 'flowrate': 2.0})
+
+    def test_revalidation_after_restart(self):
+        self.client().get_dataset(7)
+        data = self.client().get_dataset(7)
+        self.assertEqual(self.statuses(), [200, 304])
+        self.assertEqual(data['id'], 7)
+        self.assertIsNotNone(StubHandler.dataset_requests[1][1])
+
+    def test_changed_dataset_is_replaced(self):
+        client = self.client()
+        client.get_dataset(7)
+        StubHandler.datasets[7] = dataset_body(7, version=1)
+        self.assertEqual(client.get_dataset(7)['version'], 1)
+        self.assertEqual(client.get_dataset(7)['version'], 1)
+        self.assertEqual(self.statuses(), [200, 200, 304])
+
+    def test_deleted_dataset_is_discarded(self):
+        client = self.client()
+        client.get_dataset(8)
+        del StubHandler.datasets[8]
+        with self.assertRaises(requests.HTTPError):
+            client.get_dataset(8)
+        self.assertIsNone(client.get_cached_dataset(8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Cold start: heavy modules stay unimported until they are needed.
+
+Each check runs in a fresh interpreter, since other test modules import
+matplotlib into this one.
+
+    QT_QPA_PLATFORM=offscreen python -m unittest discover tests
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+DESKTOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_CHARTS = r'''
+import json, sys, time
+from PyQt5.QtWidgets import QApplication
+
+app = QApplication(sys.argv)
+from services.api_client import APIClient
+from ui.main_window import MainWindow
+
+# Nothing listens on port 9: the initial load fails fast and the window stays empty
+client = APIClient('http://127.0.0.1:9/api', timeout=(0.5, 0.5), retries=0, cache_dir='')
+window = MainWindow(client)
+window.show()
+app.processEvents()
+result = {'before': {name: name in sys.modules for name in ('matplotlib', 'ui.charts_widget')}}
+
+window.current_data = {'id': None, 'equipment_records': [
+    {'equipment_type': 'Pump', 'flowrate': 1.0, 'pressure': 2.0, 'temperature': 3.0},
+]}
+window.tabs.setCurrentWidget(window.charts_tab)
+deadline = time.monotonic() + 10
+while window.charts_widget is None and time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+
+result['after'] = {name: name in sys.modules for name in ('matplotlib', 'ui.charts_widget')}
+result['created'] = window.charts_widget is not None
+result['refreshed'] = window.charts_widget is not None and window.charts_widget.generation == 1
+print(json.dumps(result))
+# A QThread destroyed while running aborts the interpreter
+for thread in [window.load_thread, *getattr(window.charts_widget, 'chart_threads', [])]:
+    thread.wait()
+client.close()
+'''
+
+MAIN_IMPORTS = r'''
+import json, sys
+import main
+print(json.dumps({name: name in sys.modules for name in ('requests', 'numpy', 'matplotlib', 'ui.main_window')}))
+'''
+
+
+def run_child(code):
+    env = {**os.environ, 'QT_QPA_PLATFORM': 'offscreen'}
+    output = subprocess.run([sys.executable, '-c', code], cwd=DESKTOP_DIR, env=env,
+                            capture_output=True, text=True, timeout=60, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class StartupTests(unittest.TestCase):
+    def test_charts_load_with_their_tab(self):
+        result = run_child(LAZY_CHARTS)
+        self.assertEqual(result['before'], {'matplotlib': False, 'ui.charts_widget': False})
+        self.assertEqual(result['after'], {'matplotlib': True, 'ui.charts_widget': True})
+        self.assertTrue(result['created'])
+        # The dataset shown before the tab was opened is charted straight away
+        self.assertTrue(result['refreshed'])
+
+    def test_main_imports_only_qt(self):
+        # The rest is imported once the splash screen is up
+        self.assertEqual(run_child(MAIN_IMPORTS),
+                         {'requests': False, 'numpy': False, 'matplotlib': False, 'ui.main_window': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# (field, label, color) of each parameter, in chart order
+PARAMETERS = [
+    ('flowrate', 'Flowrate', '#1e40af'),
+    ('pressure', 'Pressure', '#f59e0b'),
+    ('temperature', 'Temperature', '#ef4444'),
+]
+# Samples per trend line; about the chart's width in pixels
+TREND_POINTS = 1000
+
+def minmax_decimate(y, points=TREND_POINTS):
+    """Positions of the minimum and maximum of y in each of points // 2 buckets, in order.
+
+    Missing values are skipped. Series of at most `points` samples are kept whole.
+    """
+    n = len(y)
+    valid = ~np.isnan(y)
+    buckets = points // 2
+    if n <= points or buckets < 1:
+        return np.flatnonzero(valid)
+
+    size = -(-n // buckets)
+    lows = np.full(buckets * size, np.inf)
+    lows[:n] = np.where(valid, y, np.inf)
+    highs = np.full(buckets * size, -np.inf)
+    highs[:n] = np.where(valid, y, -np.inf)
+    offsets = np.arange(buckets) * size
+    positions = np.unique(np.concatenate([
+        lows.reshape(buckets, size).argmin(axis=1) + offsets,
+        highs.reshape(buckets, size).argmax(axis=1) + offsets,
+    ]))
+    positions = positions[positions < n]
+    return positions[valid[positions]]
+
+def from_records(equipment, points=TREND_POINTS):
+    """Chart data computed locally from a list of record dicts."""
+    count = len(equipment)
+    types = np.array([item['equipment_type'] for item in equipment], dtype=str)
+    columns = {
+        field: np.fromiter(
+            (np.nan if item[field] is None else item[field] for item in equipment), dtype=float, count=count
+        )
+        for field, _, _ in PARAMETERS
+    }
+
+    names, inverse, counts = np.unique(types, return_inverse=True, return_counts=True)
+    means = {}
+    for field, _, _ in PARAMETERS:
+        values = columns[field]
+        valid = ~np.isnan(values)
+        sums = np.bincount(inverse[valid], weights=values[valid], minlength=len(names))
+        present = np.bincount(inverse[valid], minlength=len(names))
+        means[field] = np.divide(sums, present, out=np.full(len(names), np.nan), where=present > 0)
+    # Largest types first, like /aggregates/
+    order = np.lexsort((names, -counts))
+
+    trends = {}
+    for field, _, _ in PARAMETERS:
+        positions = minmax_decimate(columns[field], points)
+        trends[field] = (positions, columns[field][positions])
+    return {
+        'types': names[order].tolist(),
+        'counts': counts[order],
+        'means': {field: values[order] for field, values in means.items()},
+        'trends': trends,
+        'total': count,
+    }
+
+def from_api(aggregates, series):
+    """Chart data from a dataset's /aggregates/ and /series/ responses."""
+    types = aggregates.get('types', [])
+    return {
+        'types': [entry['equipment_type'] for entry in types],
+        'counts': np.array([entry['count'] for entry in types], dtype=np.int64),
+        'means': {
+            field: np.array([entry[field]['mean'] for entry in types], dtype=float)
+            for field, _, _ in PARAMETERS
+        },
+        'trends': {
+            field: (np.asarray(series[field]['x'], dtype=np.int64), np.asarray(series[field]['y'], dtype=float))
+            for field, _, _ in PARAMETERS
+        },
+        'total': max((series[field]['total'] for field, _, _ in PARAMETERS), default=0),
+    }
+
+class ChartDataThread(QThread):
+    """Background thread preparing everything the charts plot as NumPy arrays.
+
+    With an API client and a dataset id, aggregates and downsampled trends
+    come from the server; otherwise they are computed from the records.
+    """
+
+    finished = pyqtSignal(int, dict)
+    error = pyqtSignal(int, str)
+
+    def __init__(self, generation, api_client=None, dataset_id=None, equipment=None, points=TREND_POINTS):
+        super().__init__()
+        self.generation = generation
+        self.api_client = api_client
+        self.dataset_id = dataset_id
+        self.equipment = equipment
+        self.points = points
+
+    def run(self):
+        try:
+            if self.api_client is not None and self.dataset_id is not None:
+                aggregates = self.api_client.get_aggregates(self.dataset_id)
+                series = {
+                    field: self.api_client.get_series(self.dataset_id, field, points=self.points)
+                    for field, _, _ in PARAMETERS
+                }
+                chart_data = from_api(aggregates, series)
+            else:
+                chart_data = from_records(self.equipment or [], self.points)
+            self.finished.emit(self.generation, chart_data)
+        except Exception as e:
+            self.error.emit(self.generation, str(e))
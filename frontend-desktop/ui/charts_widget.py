@@ -1,14 +1,38 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
 from PyQt5.QtGui import QFont
+from PyQt5.QtCore import pyqtSignal
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+from matplotlib import colormaps
+import numpy as np
+from .chart_data import ChartDataThread, PARAMETERS
 
 class ChartsWidget(QWidget):
-    """Widget for displaying charts using Matplotlib."""
+    """Widget for displaying charts using Matplotlib.
     
-    def __init__(self):
+    The type distribution, per-type averages and whole-dataset parameter
+    trends are prepared as NumPy arrays in a ChartDataThread, from the
+    dataset's /aggregates/ and /series/ endpoints or, without a server, from
+    its records. The GUI thread only updates the existing artists in place
+    and schedules a redraw with draw_idle(), so refreshes do not freeze the
+    window and bursts of refreshes are painted once.
+    """
+    
+    # Emitted with a message when the data for the latest refresh could not be prepared
+    error = pyqtSignal(str)
+    
+    def __init__(self, api_client=None):
         super().__init__()
+        self.api_client = api_client
+        # Bumped on every refresh so data prepared for an older one is ignored
+        self.generation = 0
+        self.chart_threads = []
+        self.pie_types = None
+        self.wedges = []
+        self.pie_labels = []
+        self.pie_pcts = []
+        self.bar_types = None
+        self.bars = None
         self.init_ui()
     
     def init_ui(self):
@@ -25,13 +49,21 @@ class ChartsWidget(QWidget):
         # Charts layout
         charts_layout = QHBoxLayout()
         
-        # Create matplotlib figures
+        # Create matplotlib figures; their axes and artists live as long as the widget
         self.fig1 = Figure(figsize=(5, 4), dpi=100)
         self.canvas1 = FigureCanvas(self.fig1)
+        self.pie_ax = self.fig1.add_subplot(111)
+        self.pie_ax.set_title('Equipment Type Distribution', fontweight='bold')
+        self.pie_ax.set_aspect('equal')
+        self.pie_ax.axis('off')
         charts_layout.addWidget(self.canvas1)
         
         self.fig2 = Figure(figsize=(5, 4), dpi=100)
         self.canvas2 = FigureCanvas(self.fig2)
+        self.bar_ax = self.fig2.add_subplot(111)
+        self.bar_ax.set_xlabel('Equipment Type')
+        self.bar_ax.set_ylabel('Avg Flowrate (L/min)')
+        self.bar_ax.set_title('Average Flowrate by Type', fontweight='bold')
         charts_layout.addWidget(self.canvas2)
         
         layout.addLayout(charts_layout)
@@ -39,105 +71,123 @@ class ChartsWidget(QWidget):
         # Bottom chart
         self.fig3 = Figure(figsize=(10, 4), dpi=100)
         self.canvas3 = FigureCanvas(self.fig3)
+        self.trend_ax = self.fig3.add_subplot(111)
+        self.trend_lines = {
+            field: self.trend_ax.plot([], [], label=label, color=color, linewidth=1)[0]
+            for field, label, color in PARAMETERS
+        }
+        self.trend_ax.set_xlabel('Equipment (record position)')
+        self.trend_ax.set_ylabel('Value')
+        self.trend_ax.set_title('Parameter Trends', fontweight='bold')
+        # A fixed location; 'best' would test every line vertex on each draw
+        self.trend_ax.legend(loc='upper right')
+        self.trend_ax.grid(True, alpha=0.3)
+        self.fig3.tight_layout()
         layout.addWidget(self.canvas3)
         
         self.setLayout(layout)
     
     def update_charts(self, data):
-        """Update all charts with new data."""
-        equipment = data.get('equipment_records', [])
-        
-        if not equipment:
+        """Update all charts with new data, preparing it off the GUI thread."""
+        self.generation += 1
+        self.chart_threads = [thread for thread in self.chart_threads if thread.isRunning()]
+        thread = ChartDataThread(
+            self.generation,
+            api_client=self.api_client,
+            dataset_id=data.get('id'),
+            equipment=data.get('equipment_records'),
+        )
+        thread.finished.connect(self.on_chart_data)
+        thread.error.connect(self.on_chart_error)
+        self.chart_threads.append(thread)
+        thread.start()
+    
+    def on_chart_data(self, generation, chart_data):
+        """Apply prepared chart data, unless a newer refresh was started meanwhile."""
+        if generation != self.generation:
             return
-        
-        self.fig1.clear()
-        self.fig2.clear()
-        self.fig3.clear()
-        
-        self.create_pie_chart(equipment)
-        self.create_bar_chart(equipment)
-        self.create_line_chart(equipment)
-        
-        self.canvas1.draw()
-        self.canvas2.draw()
-        self.canvas3.draw()
+        self.apply_chart_data(chart_data)
     
-    def create_pie_chart(self, equipment):
-        """Create pie chart for equipment type distribution."""
-        ax = self.fig1.add_subplot(111)
-        
-        type_counts = {}
-        for item in equipment:
-            eq_type = item['equipment_type']
-            type_counts[eq_type] = type_counts.get(eq_type, 0) + 1
-        
-        ax.pie(
-            type_counts.values(),
-            labels=type_counts.keys(),
-            autopct='%1.1f%%',
-            startangle=90,
-            colors=plt.cm.Set3.colors
-        )
-        ax.set_title('Equipment Type Distribution', fontweight='bold')
+    def on_chart_error(self, generation, message):
+        """Report a failed refresh, unless a newer one was started meanwhile."""
+        if generation == self.generation:
+            self.error.emit(message)
     
-    def create_bar_chart(self, equipment):
-        """Create bar chart for average parameters by type."""
-        ax = self.fig2.add_subplot(111)
-        
-        type_data = {}
-        for item in equipment:
-            eq_type = item['equipment_type']
-            if eq_type not in type_data:
-                type_data[eq_type] = {'flowrate': [], 'pressure': [], 'temperature': []}
-            
-            type_data[eq_type]['flowrate'].append(item['flowrate'])
-            type_data[eq_type]['pressure'].append(item['pressure'])
-            type_data[eq_type]['temperature'].append(item['temperature'])
-        
-        types = list(type_data.keys())
-        avg_flowrates = [sum(type_data[t]['flowrate']) / len(type_data[t]['flowrate']) for t in types]
-        
-        x = range(len(types))
-        ax.bar(x, avg_flowrates, color='#1e40af')
-        ax.set_xlabel('Equipment Type')
-        ax.set_ylabel('Avg Flowrate (L/min)')
-        ax.set_title('Average Flowrate by Type', fontweight='bold')
-        ax.set_xticks(x)
-        ax.set_xticklabels(types, rotation=45, ha='right')
-        
-        self.fig2.tight_layout()
+    def apply_chart_data(self, chart_data):
+        self.update_pie_chart(chart_data['types'], chart_data['counts'])
+        self.update_bar_chart(chart_data['types'], chart_data['means']['flowrate'])
+        self.update_line_chart(chart_data['trends'], chart_data['total'])
+        
+        self.canvas1.draw_idle()
+        self.canvas2.draw_idle()
+        self.canvas3.draw_idle()
     
-    def create_line_chart(self, equipment):
-        """Create line chart for parameter trends."""
-        ax = self.fig3.add_subplot(111)
-        
-        sample = equipment[:20]
-        names = [item['equipment_name'] for item in sample]
-        flowrates = [item['flowrate'] for item in sample]
-        pressures = [item['pressure'] for item in sample]
-        temperatures = [item['temperature'] for item in sample]
-        
-        x = range(len(sample))
-        
-        ax.plot(x, flowrates, marker='o', label='Flowrate', color='#1e40af')
-        ax.plot(x, pressures, marker='s', label='Pressure', color='#f59e0b')
-        ax.plot(x, temperatures, marker='^', label='Temperature', color='#ef4444')
-        
-        ax.set_xlabel('Equipment')
-        ax.set_ylabel('Value')
-        ax.set_title('Parameter Trends (First 20 Equipment)', fontweight='bold')
-        ax.set_xticks(x[::2])
-        ax.set_xticklabels([names[i] for i in range(0, len(names), 2)], rotation=45, ha='right')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
+    def update_pie_chart(self, types, counts):
+        """Equipment type distribution; wedges are reshaped in place while the types stay the same."""
+        if types != self.pie_types:
+            for artist in self.wedges + self.pie_labels + self.pie_pcts:
+                artist.remove()
+            self.wedges, self.pie_labels, self.pie_pcts = [], [], []
+            self.pie_types = types
+            if types:
+                self.wedges, self.pie_labels, self.pie_pcts = self.pie_ax.pie(
+                    counts,
+                    labels=types,
+                    autopct='%1.1f%%',
+                    startangle=90,
+                    colors=colormaps['Set3'].colors
+                )
+            return
         
-        self.fig3.tight_layout()
+        fractions = np.asarray(counts, dtype=float) / max(np.sum(counts), 1)
+        edges = 90 + 360 * np.concatenate([[0], np.cumsum(fractions)])
+        for wedge, label, pct, fraction, theta1, theta2 in zip(
+                self.wedges, self.pie_labels, self.pie_pcts, fractions, edges[:-1], edges[1:]):
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            middle = np.deg2rad((theta1 + theta2) / 2)
+            x, y = np.cos(middle), np.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f"{fraction * 100:.1f}%")
+    
+    def update_bar_chart(self, types, avg_flowrates):
+        """Average flowrate by type; bar heights are updated in place while the types stay the same."""
+        heights = np.nan_to_num(np.asarray(avg_flowrates, dtype=float))
+        if types != self.bar_types:
+            if self.bars is not None:
+                self.bars.remove()
+            self.bar_types = types
+            x = np.arange(len(types))
+            self.bars = self.bar_ax.bar(x, heights, color='#1e40af')
+            self.bar_ax.set_xticks(x)
+            self.bar_ax.set_xticklabels(types, rotation=45, ha='right')
+            # Only new tick labels can change the margins the layout needs
+            self.fig2.tight_layout()
+        else:
+            for bar, height in zip(self.bars, heights):
+                bar.set_height(height)
+        self.bar_ax.relim()
+        self.bar_ax.autoscale_view()
+    
+    def update_line_chart(self, trends, total):
+        """Parameter trends across the whole dataset; the lines are reused."""
+        for field, line in self.trend_lines.items():
+            x, y = trends.get(field, ([], []))
+            line.set_data(x, y)
+        self.trend_ax.relim()
+        self.trend_ax.autoscale_view()
+        self.trend_ax.set_title(f'Parameter Trends (All {total:,} Equipment)', fontweight='bold')
     
     def clear_charts(self):
         """Clear all charts."""
-        self.fig1.clear()
-        self.fig2.clear()
-        self.fig3.clear()
-        self.canvas1.draw()
-        self.canvas2.draw()
-        self.canvas3.draw()
\ No newline at end of file
+        self.generation += 1
+        self.apply_chart_data({
+            'types': [],
+            'counts': np.empty(0, dtype=np.int64),
+            'means': {field: np.empty(0) for field, _, _ in PARAMETERS},
+            'trends': {},
+            'total': 0,
+        })
+        self.trend_ax.set_title('Parameter Trends', fontweight='bold')
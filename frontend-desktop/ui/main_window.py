@@ -1,12 +1,13 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QTabWidget,
-    QStatusBar, QMenuBar, QAction, QMessageBox
+    QStatusBar, QMenuBar, QAction, QMessageBox, QLabel,
+    QHBoxLayout, QComboBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from .upload_widget import UploadWidget
 from .summary_widget import SummaryWidget
 from .table_widget import TableWidget
-from .charts_widget import ChartsWidget
+# ChartsWidget (and with it matplotlib) is imported when the Charts tab is first opened
 
 class LoadDataThread(QThread):
     """Background thread for loading data."""
@@ -14,25 +15,56 @@ class LoadDataThread(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     
-    def __init__(self, api_client):
+    def __init__(self, api_client, dataset_id=None):
         super().__init__()
         self.api_client = api_client
+        self.dataset_id = dataset_id
     
     def run(self):
         try:
-            result = self.api_client.get_summary()
+            if self.dataset_id is None:
+                result = self.api_client.get_summary()
+            else:
+                result = self.api_client.get_dataset(self.dataset_id)
             self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
 
+class HistoryThread(QThread):
+    """Background thread for loading the dataset history."""
+    
+    finished = pyqtSignal(list)
+    error = pyqtSignal(str)
+    
+    def __init__(self, api_client):
+        super().__init__()
+        self.api_client = api_client
+    
+    def run(self):
+        try:
+            self.finished.emit(self.api_client.get_history())
+        except Exception as e:
+            self.error.emit(str(e))
+
 class MainWindow(QMainWindow):
     """Main application window."""
     
+    # Emitted from whichever thread made the request; delivered on the UI thread
+    request_timed = pyqtSignal(object)
+    
     def __init__(self, api_client):
         super().__init__()
         self.api_client = api_client
         self.current_data = None
+        self.load_thread = None
+        self.history_thread = None
+        # Set when the history is asked for again while a request is in flight
+        self.history_pending = False
+        self.dataset_threads = []
+        self.charts_widget = None
         self.init_ui()
+        self.request_timed.connect(self.on_request_timed)
+        self.api_client.add_timing_listener(self.request_timed.emit)
         self.load_initial_data()
     
     def init_ui(self):
@@ -54,21 +86,40 @@ class MainWindow(QMainWindow):
         overview_widget = QWidget()
         overview_layout = QVBoxLayout()
         
+        # Dataset picker: switching back to an earlier upload is served from the client cache
+        dataset_row = QHBoxLayout()
+        dataset_row.addWidget(QLabel("Dataset:"))
+        self.dataset_combo = QComboBox()
+        self.dataset_combo.setMinimumWidth(320)
+        self.dataset_combo.activated.connect(self.on_dataset_selected)
+        dataset_row.addWidget(self.dataset_combo)
+        dataset_row.addStretch()
+        overview_layout.addLayout(dataset_row)
+        
         self.summary_widget = SummaryWidget()
-        self.charts_widget = ChartsWidget()
-        self.table_widget = TableWidget()
+        self.table_widget = TableWidget(self.api_client)
         
         overview_layout.addWidget(self.summary_widget)
-        overview_layout.addWidget(self.charts_widget)
         overview_layout.addWidget(self.table_widget)
         overview_widget.setLayout(overview_layout)
         
+        # Charts tab: a placeholder until the tab is first opened
+        self.charts_tab = QWidget()
+        self.charts_layout = QVBoxLayout()
+        self.charts_placeholder = QLabel("Loading charts...")
+        self.charts_placeholder.setAlignment(Qt.AlignCenter)
+        self.charts_placeholder.setStyleSheet("color: #64748b; font-size: 14px;")
+        self.charts_layout.addWidget(self.charts_placeholder)
+        self.charts_tab.setLayout(self.charts_layout)
+        
         # Upload tab
         self.upload_widget = UploadWidget(self.api_client)
         self.upload_widget.upload_complete.connect(self.on_data_updated)
         
         self.tabs.addTab(overview_widget, "Overview")
+        self.tabs.addTab(self.charts_tab, "Charts")
         self.tabs.addTab(self.upload_widget, "Upload")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
         
         layout.addWidget(self.tabs)
         
@@ -76,6 +127,10 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
         
+        self.latency_label = QLabel()
+        self.latency_label.setStyleSheet("color: #64748b; padding-right: 8px;")
+        self.status_bar.addPermanentWidget(self.latency_label)
+        
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #f8fafc;
@@ -98,6 +153,24 @@ class MainWindow(QMainWindow):
             }
         """)
     
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.charts_tab and self.charts_widget is None:
+            # Let the placeholder paint before matplotlib is imported
+            QTimer.singleShot(0, self.create_charts_widget)
+    
+    def create_charts_widget(self):
+        """Import matplotlib and build the charts on first use of their tab."""
+        if self.charts_widget is not None:
+            return
+        from .charts_widget import ChartsWidget
+        
+        self.charts_widget = ChartsWidget(self.api_client)
+        self.charts_widget.error.connect(self.on_charts_error)
+        self.charts_layout.replaceWidget(self.charts_placeholder, self.charts_widget)
+        self.charts_placeholder.deleteLater()
+        if self.current_data:
+            self.charts_widget.update_charts(self.current_data)
+    
     def create_menu_bar(self):
         """Create the menu bar."""
         menubar = self.menuBar()
@@ -124,6 +197,9 @@ class MainWindow(QMainWindow):
     
     def load_initial_data(self):
         """Load initial data when app starts."""
+        if self.load_thread is not None and self.load_thread.isRunning():
+            # A load started moments ago already returns the latest dataset
+            return
         self.status_bar.showMessage("Loading data...")
         
         self.load_thread = LoadDataThread(self.api_client)
@@ -136,21 +212,103 @@ class MainWindow(QMainWindow):
         self.current_data = data
         self.update_all_widgets(data)
         self.status_bar.showMessage("Data loaded successfully", 3000)
+        self.load_history()
+    
+    def load_history(self):
+        """Refresh the dataset picker from the backend.
+        
+        Only one HistoryThread runs at a time; a refresh asked for meanwhile
+        is queued and started when the running one is done.
+        """
+        if self.history_thread is not None and self.history_thread.isRunning():
+            self.history_pending = True
+            return
+        self.history_pending = False
+        self.history_thread = HistoryThread(self.api_client)
+        self.history_thread.finished.connect(self.on_history_loaded)
+        self.history_thread.error.connect(self.on_history_done)
+        self.history_thread.start()
+    
+    def on_history_done(self, *args):
+        """Start the queued history refresh, if any."""
+        if self.history_pending:
+            # The thread emitted its result as its last step; let it return first
+            self.history_thread.wait()
+            self.load_history()
+    
+    def on_history_loaded(self, history):
+        """Fill the dataset picker, keeping the shown dataset selected."""
+        if self.history_pending:
+            # Skip this result; the queued refresh fetches a newer one
+            self.on_history_done()
+            return
+        self.dataset_combo.blockSignals(True)
+        self.dataset_combo.clear()
+        for dataset in history:
+            uploaded = dataset.get('upload_date', '')[:16].replace('T', ' ')
+            self.dataset_combo.addItem(f"{dataset['filename']}  ({uploaded})", dataset['id'])
+        if self.current_data:
+            index = self.dataset_combo.findData(self.current_data.get('id'))
+            if index >= 0:
+                self.dataset_combo.setCurrentIndex(index)
+        self.dataset_combo.blockSignals(False)
+    
+    def on_dataset_selected(self, index):
+        """Show the picked dataset: from the cache at once if possible, then revalidate."""
+        dataset_id = self.dataset_combo.itemData(index)
+        if dataset_id is None or (self.current_data and self.current_data.get('id') == dataset_id):
+            return
+        
+        cached = self.api_client.get_cached_dataset(dataset_id)
+        if cached:
+            self.current_data = cached
+            self.update_all_widgets(cached)
+            self.status_bar.showMessage("Loaded from cache", 3000)
+        else:
+            self.status_bar.showMessage("Loading dataset...")
+        
+        # Drop references to finished loaders; keep running ones alive
+        self.dataset_threads = [thread for thread in self.dataset_threads if thread.isRunning()]
+        thread = LoadDataThread(self.api_client, dataset_id)
+        thread.finished.connect(self.on_dataset_loaded)
+        thread.error.connect(self.on_load_error)
+        self.dataset_threads.append(thread)
+        thread.start()
+    
+    def on_dataset_loaded(self, data):
+        """Show a dataset fetched (or revalidated) from the backend if it is still the selected one."""
+        if self.dataset_combo.currentData() != data.get('id'):
+            return
+        if data is not self.current_data:
+            self.current_data = data
+            self.update_all_widgets(data)
+            self.status_bar.showMessage("Data loaded successfully", 3000)
     
     def on_load_error(self, error_msg):
         """Handle data load error."""
         self.status_bar.showMessage("No data available", 3000)
     
+    def on_charts_error(self, error_msg):
+        """Handle a chart refresh whose data could not be loaded."""
+        self.status_bar.showMessage(f"Could not load chart data: {error_msg}", 5000)
+    
+    def on_request_timed(self, timing):
+        """Show the latest API request latency in the status bar."""
+        stats = self.api_client.latency_stats()
+        self.latency_label.setText(f"{timing}  (p95 {stats['p95_ms']:.0f} ms)")
+    
     def on_data_updated(self, data):
         """Handle new data from upload."""
         self.current_data = data
         self.update_all_widgets(data)
         self.tabs.setCurrentIndex(0)
+        self.load_history()
     
     def update_all_widgets(self, data):
         """Update all widgets with new data."""
         self.summary_widget.update_summary(data)
-        self.charts_widget.update_charts(data)
+        if self.charts_widget is not None:
+            self.charts_widget.update_charts(data)
         self.table_widget.update_data(data)
     
     def refresh_data(self):
@@ -91,9 +91,9 @@ class SummaryWidget(QWidget):
         stats = data.get('summary_stats', {})
         
         self.update_card_value(self.total_card, str(stats.get('total_count', 0)))
-        self.update_card_value(self.flowrate_card, f"{stats.get('avg_flowrate', 0):.2f} L/min")
-        self.update_card_value(self.pressure_card, f"{stats.get('avg_pressure', 0):.2f} bar")
-        self.update_card_value(self.temp_card, f"{stats.get('avg_temperature', 0):.2f} °C")
+        self.update_card_value(self.flowrate_card, self.format_average(stats.get('avg_flowrate'), "L/min"))
+        self.update_card_value(self.pressure_card, self.format_average(stats.get('avg_pressure'), "bar"))
+        self.update_card_value(self.temp_card, self.format_average(stats.get('avg_temperature'), "°C"))
         
         equipment_types = stats.get('equipment_types', {})
         if equipment_types:
@@ -102,6 +102,10 @@ class SummaryWidget(QWidget):
         else:
             self.type_list.setText("No type distribution available")
     
+    def format_average(self, value, unit):
+        """Format an average; it is null for a dataset without values."""
+        return "N/A" if value is None else f"{value:.2f} {unit}"
+    
     def update_card_value(self, card, value):
         """Update the value in a stat card."""
         value_label = card.findChild(QLabel, "value")
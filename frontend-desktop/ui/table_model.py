@@ -0,0 +1,365 @@
+import numpy as np
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QThread, pyqtSignal
+)
+
+FIELDS = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+HEADERS = ["Equipment Name", "Type", "Flowrate (L/min)", "Pressure (bar)", "Temperature (°C)"]
+NUMERIC_FIELDS = {'flowrate', 'pressure', 'temperature'}
+
+# Records requested per page when paging from /dataset/<id>/records/
+PAGE_SIZE = 2000
+# Page size while loading every remaining record for a sort or name filter
+# (the endpoint's maximum)
+FETCH_ALL_PAGE_SIZE = 5000
+
+def empty_columns():
+    return {
+        field: np.empty(0, dtype=float if field in NUMERIC_FIELDS else str)
+        for field in FIELDS
+    }
+
+def to_arrays(columns):
+    """Convert {field: [values...]} into NumPy column arrays."""
+    return {
+        field: np.asarray(columns[field], dtype=float if field in NUMERIC_FIELDS else str)
+        for field in FIELDS
+    }
+
+class PageFetchThread(QThread):
+    """Background thread fetching one columnar page of records."""
+
+    finished = pyqtSignal(int, dict)
+    error = pyqtSignal(int, str)
+
+    def __init__(self, api_client, dataset_id, cursor, generation, limit=PAGE_SIZE, equipment_type=None):
+        super().__init__()
+        self.api_client = api_client
+        self.dataset_id = dataset_id
+        self.cursor = cursor
+        self.generation = generation
+        self.limit = limit
+        self.equipment_type = equipment_type
+
+    def run(self):
+        try:
+            page = self.api_client.get_records(
+                self.dataset_id, cursor=self.cursor, limit=self.limit, fields=FIELDS,
+                equipment_type=self.equipment_type, columnar=True
+            )
+            self.finished.emit(self.generation, page)
+        except Exception as e:
+            self.error.emit(self.generation, str(e))
+
+class EquipmentTableModel(QAbstractTableModel):
+    """Table model over NumPy column arrays; cells are formatted only when the view asks.
+
+    Rows come either from a payload that already holds every record
+    (load_columns) or page by page from the records endpoint as the view
+    scrolls towards the end (load_remote, via canFetchMore/fetchMore). A
+    remote dataset can be limited to one equipment type on the server, and
+    fetch_all() pages in the rest at once before a sort or name filter.
+    """
+
+    error = pyqtSignal(str)
+    # Emitted as fetch_all() receives pages and once it is done
+    loading_all = pyqtSignal()
+
+    def __init__(self, api_client=None, parent=None):
+        super().__init__(parent)
+        self.api_client = api_client
+        self.columns = empty_columns()
+        self.total = 0
+        self.dataset_id = None
+        self.equipment_type = None
+        self.next_cursor = None
+        self.fetching = False
+        # Pages held back by fetch_all() until the last one arrives
+        self.fetching_all = False
+        self.pending_pages = []
+        # Running fetch threads, referenced so they are not collected mid-run
+        self.fetch_threads = []
+        # Bumped on every reset so pages of a previous dataset are ignored
+        self.generation = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns['flowrate'])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(FIELDS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        field = FIELDS[index.column()]
+        if role == Qt.DisplayRole:
+            value = self.columns[field][index.row()]
+            return f"{value:.1f}" if field in NUMERIC_FIELDS else str(value)
+        if role == Qt.TextAlignmentRole and field in NUMERIC_FIELDS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return str(section + 1)
+
+    def column(self, field):
+        return self.columns[field]
+
+    def load_columns(self, columns):
+        """Show a dataset whose records are all at hand ({field: [values...]})."""
+        self.beginResetModel()
+        self.generation += 1
+        self.columns = to_arrays(columns)
+        self.total = len(self.columns['flowrate'])
+        self.dataset_id = None
+        self.equipment_type = None
+        self.next_cursor = None
+        self.fetching = False
+        self.fetching_all = False
+        self.pending_pages = []
+        self.endResetModel()
+
+    def load_remote(self, dataset_id, total, equipment_type=None):
+        """Show a dataset whose records are paged in from the server on demand.
+
+        With equipment_type only records of that type are requested; total is
+        then the number of records of that type.
+        """
+        self.beginResetModel()
+        self.generation += 1
+        self.columns = empty_columns()
+        self.total = total
+        self.dataset_id = dataset_id
+        self.equipment_type = equipment_type or None
+        self.next_cursor = 0
+        self.fetching = False
+        self.fetching_all = False
+        self.pending_pages = []
+        self.endResetModel()
+
+    def is_remote(self):
+        return self.dataset_id is not None
+
+    def fetch_all(self):
+        """Page in every remaining record of a remote dataset.
+
+        The pages are inserted together once the last one has arrived, so a
+        sort or filter runs once over the complete dataset instead of once
+        per page.
+        """
+        if self.fetching_all or self.next_cursor is None or self.api_client is None:
+            return
+        self.fetching_all = True
+        self.loading_all.emit()
+        if not self.fetching:
+            self.fetchMore()
+
+    def clear(self):
+        self.load_columns(empty_columns())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid() and self.api_client is not None
+                and self.next_cursor is not None and not self.fetching)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.fetching = True
+        self.fetch_threads = [thread for thread in self.fetch_threads if thread.isRunning()]
+        limit = FETCH_ALL_PAGE_SIZE if self.fetching_all else PAGE_SIZE
+        thread = PageFetchThread(self.api_client, self.dataset_id, self.next_cursor, self.generation,
+                                 limit=limit, equipment_type=self.equipment_type)
+        thread.finished.connect(self.on_page_fetched)
+        thread.error.connect(self.on_page_error)
+        self.fetch_threads.append(thread)
+        thread.start()
+
+    def on_page_fetched(self, generation, page):
+        if generation != self.generation:
+            return
+        self.fetching = False
+        self.next_cursor = page.get('next_cursor')
+        if self.fetching_all:
+            self.pending_pages.append(to_arrays(page['columns']))
+            if self.next_cursor is not None:
+                self.loading_all.emit()
+                self.fetchMore()
+                return
+            self.insert_pending()
+        else:
+            self.insert_rows([to_arrays(page['columns'])])
+
+    def on_page_error(self, generation, message):
+        if generation == self.generation:
+            self.fetching = False
+            self.next_cursor = None
+            # Keep whatever fetch_all() had received
+            self.insert_pending()
+            self.error.emit(message)
+
+    def received_count(self):
+        """Records received so far, including pages fetch_all() has not inserted yet."""
+        return self.rowCount() + sum(len(page['flowrate']) for page in self.pending_pages)
+
+    def insert_pending(self):
+        if not self.fetching_all:
+            return
+        pages, self.pending_pages = self.pending_pages, []
+        self.fetching_all = False
+        self.insert_rows(pages)
+        self.loading_all.emit()
+
+    def insert_rows(self, pages):
+        """Append pages of column arrays as one block of rows."""
+        count = sum(len(page['flowrate']) for page in pages)
+        if not count:
+            return
+        start = self.rowCount()
+        self.beginInsertRows(QModelIndex(), start, start + count - 1)
+        self.columns = {
+            field: np.concatenate([self.columns[field], *(page[field] for page in pages)]) for field in FIELDS
+        }
+        self.endInsertRows()
+
+class ArraySortFilterProxyModel(QAbstractProxyModel):
+    """Sorts and filters an EquipmentTableModel with NumPy instead of per-row callbacks.
+
+    The proxy holds one array of source rows in display order, so sorting is
+    a single argsort and filtering a vectorized mask, where
+    QSortFilterProxyModel would call Python lessThan/filterAcceptsRow for
+    every comparison and every row. Sorting or filtering by name first has
+    the source load every remaining page, so the result covers the whole
+    dataset and not just the rows scrolled in so far.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.inverse = np.empty(0, dtype=np.int64)
+        self.sort_column = None
+        self.sort_order = Qt.AscendingOrder
+        self.filter_text = ''
+        self.type_filter = ''
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.modelReset.connect(self.reset_rows)
+        model.rowsInserted.connect(self.on_rows_inserted)
+        self.rows, self.inverse = self.compute_rows()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return self.sourceModel().columnCount() if self.sourceModel() else 0
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or proxy_index.row() >= len(self.rows):
+            return QModelIndex()
+        return self.sourceModel().index(int(self.rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid() or source_index.row() >= len(self.inverse):
+            return QModelIndex()
+        row = int(self.inverse[source_index.row()])
+        return self.createIndex(row, source_index.column()) if row >= 0 else QModelIndex()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        if role == Qt.DisplayRole:
+            return str(section + 1)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column if column >= 0 else None
+        self.sort_order = order
+        self.relayout()
+        self.fetch_all_if_needed()
+
+    def set_filters(self, text='', equipment_type=''):
+        """Show only rows whose name contains text (case-insensitive) and, if given, of one type."""
+        self.filter_text = text.strip().lower()
+        self.type_filter = equipment_type or ''
+        self.relayout()
+        self.fetch_all_if_needed()
+
+    def fetch_all_if_needed(self):
+        """A sort or name filter needs every record, not only the pages fetched so far."""
+        source = self.sourceModel()
+        if source is not None and (self.sort_column is not None or self.filter_text):
+            source.fetch_all()
+
+    def compute_rows(self):
+        """Source rows in display order and, for each source row, its proxy row (-1 if hidden)."""
+        source = self.sourceModel()
+        count = source.rowCount()
+        mask = np.ones(count, dtype=bool)
+        if self.filter_text:
+            names = np.char.lower(source.column('equipment_name'))
+            mask &= np.char.find(names, self.filter_text) >= 0
+        if self.type_filter:
+            mask &= source.column('equipment_type') == self.type_filter
+        rows = np.flatnonzero(mask)
+
+        if self.sort_column is not None:
+            keys = source.column(FIELDS[self.sort_column])[rows]
+            order = np.argsort(keys, kind='stable')
+            if self.sort_order == Qt.DescendingOrder:
+                order = order[::-1]
+            rows = rows[order]
+
+        inverse = np.full(count, -1, dtype=np.int64)
+        inverse[rows] = np.arange(len(rows))
+        return rows, inverse
+
+    def reset_rows(self):
+        self.beginResetModel()
+        self.rows, self.inverse = self.compute_rows()
+        self.endResetModel()
+        self.fetch_all_if_needed()
+
+    def relayout(self):
+        """Recompute the row order, keeping selection and current index on the same records."""
+        if self.sourceModel() is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self.rows
+        persistent = self.persistentIndexList()
+        self.rows, self.inverse = self.compute_rows()
+
+        new_indexes = []
+        for index in persistent:
+            source_row = int(old_rows[index.row()])
+            row = int(self.inverse[source_row]) if source_row < len(self.inverse) else -1
+            new_indexes.append(self.createIndex(row, index.column()) if row >= 0 else QModelIndex())
+        self.changePersistentIndexList(persistent, new_indexes)
+        self.layoutChanged.emit()
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.sort_column is None:
+            # Unsorted: appended source rows that pass the filter go at the end
+            rows, inverse = self.compute_rows()
+            added = len(rows) - len(self.rows)
+            if added > 0:
+                self.beginInsertRows(QModelIndex(), len(self.rows), len(rows) - 1)
+                self.rows, self.inverse = rows, inverse
+                self.endInsertRows()
+            else:
+                self.rows, self.inverse = rows, inverse
+        else:
+            self.relayout()
@@ -1,20 +1,33 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem,
-    QLabel, QHeaderView
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+    QLabel, QHeaderView, QLineEdit, QComboBox
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
+from .table_model import EquipmentTableModel, ArraySortFilterProxyModel, FIELDS
 
 class TableWidget(QWidget):
-    """Widget for displaying equipment data in a table."""
-    
-    def __init__(self):
+    """Widget for displaying equipment data in a table.
+
+    The view is virtualized: rows live in NumPy arrays inside the model and
+    cells are only formatted for the rows on screen. Datasets sent without
+    their records are paged in from the server while scrolling; for those
+    the type filter is applied by the server, and sorting or filtering by
+    name loads every record first.
+    """
+
+    def __init__(self, api_client=None):
         super().__init__()
+        self.api_client = api_client
+        # Remote dataset shown (id and record count per type), or None
+        self.dataset_id = None
+        self.row_count = 0
+        self.type_counts = {}
         self.init_ui()
-    
+
     def init_ui(self):
         layout = QVBoxLayout()
-        
+
         # Title
         title = QLabel("Equipment Data")
         title_font = QFont()
@@ -22,24 +35,49 @@ class TableWidget(QWidget):
         title_font.setBold(True)
         title.setFont(title_font)
         layout.addWidget(title)
-        
+
+        # Filters
+        filter_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Filter by equipment name...")
+        self.search_edit.textChanged.connect(self.on_filter_changed)
+        filter_layout.addWidget(self.search_edit)
+
+        self.type_combo = QComboBox()
+        self.type_combo.addItem("All types", "")
+        self.type_combo.currentIndexChanged.connect(self.on_filter_changed)
+        filter_layout.addWidget(self.type_combo)
+
+        self.count_label = QLabel()
+        self.count_label.setStyleSheet("color: #64748b;")
+        filter_layout.addWidget(self.count_label)
+        layout.addLayout(filter_layout)
+
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "Equipment Name", "Type", "Flowrate (L/min)", 
-            "Pressure (bar)", "Temperature (°C)"
-        ])
-        
+        self.model = EquipmentTableModel(self.api_client)
+        self.model.error.connect(self.on_fetch_error)
+        self.model.loading_all.connect(self.update_count)
+        self.proxy = ArraySortFilterProxyModel()
+        self.proxy.setSourceModel(self.model)
+        for signal in (self.proxy.modelReset, self.proxy.rowsInserted, self.proxy.layoutChanged):
+            signal.connect(self.update_count)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, Qt.AscendingOrder)
+        # Fixed row heights let the view skip measuring every row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(28)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #e2e8f0;
                 border-radius: 5px;
                 background-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
             }
             QHeaderView::section {
@@ -49,23 +87,66 @@ class TableWidget(QWidget):
                 font-weight: bold;
             }
         """)
-        
+
         layout.addWidget(self.table)
         self.setLayout(layout)
-    
+
     def update_data(self, data):
         """Update table with new data."""
-        equipment = data.get('equipment_records', [])
-        
-        self.table.setRowCount(len(equipment))
-        
-        for row, item in enumerate(equipment):
-            self.table.setItem(row, 0, QTableWidgetItem(item['equipment_name']))
-            self.table.setItem(row, 1, QTableWidgetItem(item['equipment_type']))
-            self.table.setItem(row, 2, QTableWidgetItem(f"{item['flowrate']:.1f}"))
-            self.table.setItem(row, 3, QTableWidgetItem(f"{item['pressure']:.1f}"))
-            self.table.setItem(row, 4, QTableWidgetItem(f"{item['temperature']:.1f}"))
-    
+        self.type_counts = data.get('summary_stats', {}).get('equipment_types', {})
+        equipment_types = sorted(self.type_counts)
+        self.type_combo.blockSignals(True)
+        self.type_combo.clear()
+        self.type_combo.addItem("All types", "")
+        for equipment_type in equipment_types:
+            self.type_combo.addItem(equipment_type, equipment_type)
+        self.type_combo.blockSignals(False)
+        self.search_edit.blockSignals(True)
+        self.search_edit.clear()
+        self.search_edit.blockSignals(False)
+        self.proxy.filter_text = ''
+        self.proxy.type_filter = ''
+
+        equipment = data.get('equipment_records')
+        self.dataset_id = None
+        if equipment is not None:
+            self.model.load_columns({field: [item[field] for item in equipment] for field in FIELDS})
+        elif self.api_client is not None and data.get('id') is not None:
+            self.dataset_id = data['id']
+            self.row_count = data.get('row_count', 0)
+            self.model.load_remote(self.dataset_id, self.row_count)
+        else:
+            self.model.clear()
+
+    def on_filter_changed(self, *args):
+        equipment_type = self.type_combo.currentData() or ''
+        if self.dataset_id is None:
+            self.proxy.set_filters(self.search_edit.text(), equipment_type)
+            return
+        # Remote dataset: page in only the records of the chosen type
+        if equipment_type != (self.model.equipment_type or ''):
+            total = self.type_counts.get(equipment_type, 0) if equipment_type else self.row_count
+            self.model.load_remote(self.dataset_id, total, equipment_type)
+        self.proxy.set_filters(self.search_edit.text())
+
+    def on_fetch_error(self, message):
+        self.count_label.setText(f"Could not load more records: {message}")
+
+    def update_count(self, *args):
+        if self.model.fetching_all:
+            self.count_label.setText(
+                f"Loading all {self.model.total:,} rows to sort and filter "
+                f"({self.model.received_count():,} so far)..."
+            )
+            return
+        loaded = self.model.rowCount()
+        shown = self.proxy.rowCount()
+        text = f"{shown:,} of {loaded:,} rows"
+        if self.model.total > loaded:
+            text += f" (loaded {loaded:,} of {self.model.total:,})"
+        self.count_label.setText(text)
+
     def clear_data(self):
         """Clear all table data."""
-        self.table.setRowCount(0)
\ No newline at end of file
+        self.dataset_id = None
+        self.model.clear()
@@ -9,6 +9,7 @@ class UploadThread(QThread):
     """Background thread for file upload."""
     
     finished = pyqtSignal(dict)
+    progress = pyqtSignal(dict)
     error = pyqtSignal(str)
     
     def __init__(self, api_client, file_path):
@@ -18,7 +19,9 @@ class UploadThread(QThread):
     
     def run(self):
         try:
-            result = self.api_client.upload_file(self.file_path)
+            job = self.api_client.upload_file(self.file_path)
+            job = self.api_client.wait_for_job(job['id'], on_progress=self.progress.emit)
+            result = self.api_client.get_dataset(job['dataset_id'])
             self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
@@ -108,6 +111,10 @@ class UploadWidget(QWidget):
         self.progress_bar.hide()
         layout.addWidget(self.progress_bar)
         
+        self.progress_label = QLabel("")
+        self.progress_label.hide()
+        layout.addWidget(self.progress_label)
+        
         layout.addStretch()
         self.setLayout(layout)
     
@@ -117,7 +124,7 @@ class UploadWidget(QWidget):
             self,
             "Select CSV File",
             "",
-            "CSV Files (*.csv)"
+            "CSV Files (*.csv *.csv.gz *.csv.zst)"
         )
         
         if file_path:
@@ -134,13 +141,23 @@ class UploadWidget(QWidget):
         self.progress_bar.show()
         
         self.upload_thread = UploadThread(self.api_client, self.selected_file)
+        self.upload_thread.progress.connect(self.on_upload_progress)
         self.upload_thread.finished.connect(self.on_upload_complete)
         self.upload_thread.error.connect(self.on_upload_error)
         self.upload_thread.start()
     
+    def on_upload_progress(self, job):
+        """Show rows processed and throughput of the running upload job."""
+        self.progress_label.setText(
+            f"{job.get('status', '').capitalize()}: {job.get('rows_processed', 0):,} rows "
+            f"({job.get('rows_per_second', 0):,.0f} rows/sec)"
+        )
+        self.progress_label.show()
+    
     def on_upload_complete(self, result):
         """Handle successful upload."""
         self.progress_bar.hide()
+        self.progress_label.hide()
         self.upload_btn.setEnabled(True)
         
         QMessageBox.information(
@@ -158,6 +175,7 @@ class UploadWidget(QWidget):
     def on_upload_error(self, error_msg):
         """Handle upload error."""
         self.progress_bar.hide()
+        self.progress_label.hide()
         self.upload_btn.setEnabled(True)
         
         QMessageBox.critical(
@@ -5,7 +5,7 @@ import Summary from './components/Summary';
 import Charts from './components/Charts';
 import DataTable from './components/DataTable';
 import History from './components/History';
-import { uploadFile, getSummary, getDataset } from './services/api';
+import { uploadFile, waitForJob, getSummary, getDataset } from './services/api';
 import { BarChart3 } from 'lucide-react';
 
 function App() {
@@ -27,10 +27,12 @@ function App() {
         }
     };
 
-    const handleUploadSuccess = async (file) => {
+    const handleUploadSuccess = async (file, onProgress) => {
         setLoading(true);
         try {
-            const result = await uploadFile(file);
+            const job = await uploadFile(file);
+            const finished = await waitForJob(job.id, onProgress);
+            const result = await getDataset(finished.dataset_id);
             setCurrentData(result);
             setActiveTab('overview'); // Switch to overview after upload
             alert('File uploaded successfully!');
@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import {
     Chart as ChartJS,
     CategoryScale,
@@ -12,6 +12,15 @@ import {
     Legend
 } from 'chart.js';
 import { Bar, Pie, Line } from 'react-chartjs-2';
+import { getAggregates, getSeries } from '../services/api';
+
+// Lines of the trend chart, each fetched downsampled from /dataset/<id>/series/
+const TREND_PARAMETERS = [
+    { param: 'flowrate', label: 'Flowrate', color: '#1e40af', fill: 'rgba(30, 64, 175, 0.1)' },
+    { param: 'pressure', label: 'Pressure', color: '#f59e0b', fill: 'rgba(245, 158, 11, 0.1)' },
+    { param: 'temperature', label: 'Temperature', color: '#ef4444', fill: 'rgba(239, 68, 68, 0.1)' },
+];
+const TREND_POINTS = 1000;
 
 // Register Chart.js components
 ChartJS.register(
@@ -27,7 +36,31 @@ ChartJS.register(
 );
 
 const Charts = ({ data }) => {
-    if (!data || !data.equipment_records || data.equipment_records.length === 0) {
+    const [aggregates, setAggregates] = useState(null);
+    const [trends, setTrends] = useState(null);
+    const datasetId = data ? data.id : null;
+
+    // Type counts and per-type averages come pre-aggregated from the backend
+    useEffect(() => {
+        if (datasetId == null) return undefined;
+        let cancelled = false;
+        getAggregates(datasetId)
+            .then(result => { if (!cancelled) setAggregates(result); })
+            .catch(error => console.error('Error loading aggregates:', error));
+        return () => { cancelled = true; };
+    }, [datasetId]);
+
+    // Trends cover the whole dataset, downsampled server-side to TREND_POINTS per line
+    useEffect(() => {
+        if (datasetId == null) return undefined;
+        let cancelled = false;
+        Promise.all(TREND_PARAMETERS.map(({ param }) => getSeries(datasetId, param, { points: TREND_POINTS })))
+            .then(series => { if (!cancelled) setTrends({ datasetId, series }); })
+            .catch(error => console.error('Error loading trends:', error));
+        return () => { cancelled = true; };
+    }, [datasetId]);
+
+    if (!data || !data.row_count) {
         return (
             <div className="charts-container">
                 <p className="no-data">No data available for charts</p>
@@ -35,19 +68,15 @@ const Charts = ({ data }) => {
         );
     }
 
-    const equipment = data.equipment_records;
+    const typeStats = aggregates && aggregates.dataset_id === datasetId ? aggregates.types : [];
+    const types = typeStats.map(entry => entry.equipment_type);
 
     // Prepare data for Equipment Type Distribution (Pie Chart)
-    const typeDistribution = {};
-    equipment.forEach(item => {
-        typeDistribution[item.equipment_type] = (typeDistribution[item.equipment_type] || 0) + 1;
-    });
-
     const pieData = {
-        labels: Object.keys(typeDistribution),
+        labels: types,
         datasets: [{
             label: 'Equipment Count',
-            data: Object.values(typeDistribution),
+            data: typeStats.map(entry => entry.count),
             backgroundColor: [
                 '#1e40af',
                 '#0891b2',
@@ -64,33 +93,9 @@ const Charts = ({ data }) => {
     };
 
     // Prepare data for Average Parameters by Type (Bar Chart)
-    const avgByType = {};
-    equipment.forEach(item => {
-        if (!avgByType[item.equipment_type]) {
-            avgByType[item.equipment_type] = {
-                flowrate: [],
-                pressure: [],
-                temperature: []
-            };
-        }
-        avgByType[item.equipment_type].flowrate.push(item.flowrate);
-        avgByType[item.equipment_type].pressure.push(item.pressure);
-        avgByType[item.equipment_type].temperature.push(item.temperature);
-    });
-
-    const types = Object.keys(avgByType);
-    const avgFlowrates = types.map(type => {
-        const values = avgByType[type].flowrate;
-        return values.reduce((a, b) => a + b, 0) / values.length;
-    });
-    const avgPressures = types.map(type => {
-        const values = avgByType[type].pressure;
-        return values.reduce((a, b) => a + b, 0) / values.length;
-    });
-    const avgTemperatures = types.map(type => {
-        const values = avgByType[type].temperature;
-        return values.reduce((a, b) => a + b, 0) / values.length;
-    });
+    const avgFlowrates = typeStats.map(entry => entry.flowrate.mean);
+    const avgPressures = typeStats.map(entry => entry.pressure.mean);
+    const avgTemperatures = typeStats.map(entry => entry.temperature.mean);
 
     const barData = {
         labels: types,
@@ -113,37 +118,19 @@ const Charts = ({ data }) => {
         ]
     };
 
-    // Prepare data for Parameter Trends (Line Chart) - First 20 equipment
-    const lineLabels = equipment.slice(0, 20).map(item => item.equipment_name);
-    const lineFlowrates = equipment.slice(0, 20).map(item => item.flowrate);
-    const linePressures = equipment.slice(0, 20).map(item => item.pressure);
-    const lineTemperatures = equipment.slice(0, 20).map(item => item.temperature);
+    // Prepare data for Parameter Trends (Line Chart) - whole dataset, x = record position
+    const trendSeries = trends && trends.datasetId === datasetId ? trends.series : [];
+    const total = trendSeries.length ? trendSeries[0].total : data.row_count;
 
     const lineData = {
-        labels: lineLabels,
-        datasets: [
-            {
-                label: 'Flowrate',
-                data: lineFlowrates,
-                borderColor: '#1e40af',
-                backgroundColor: 'rgba(30, 64, 175, 0.1)',
-                tension: 0.4,
-            },
-            {
-                label: 'Pressure',
-                data: linePressures,
-                borderColor: '#f59e0b',
-                backgroundColor: 'rgba(245, 158, 11, 0.1)',
-                tension: 0.4,
-            },
-            {
-                label: 'Temperature',
-                data: lineTemperatures,
-                borderColor: '#ef4444',
-                backgroundColor: 'rgba(239, 68, 68, 0.1)',
-                tension: 0.4,
-            }
-        ]
+        datasets: trendSeries.map((series, i) => ({
+            label: TREND_PARAMETERS[i].label,
+            data: series.x.map((x, j) => ({ x, y: series.y[j] })),
+            borderColor: TREND_PARAMETERS[i].color,
+            backgroundColor: TREND_PARAMETERS[i].fill,
+            borderWidth: 1,
+            pointRadius: 0,
+        }))
     };
 
     const chartOptions = {
@@ -156,6 +143,19 @@ const Charts = ({ data }) => {
         }
     };
 
+    const lineOptions = {
+        ...chartOptions,
+        animation: false,
+        scales: {
+            x: {
+                type: 'linear',
+                min: 0,
+                max: Math.max(total - 1, 0),
+                title: { display: true, text: 'Equipment (record position)' },
+            },
+        },
+    };
+
     return (
         <div className="charts-container">
             <h2>Data Visualization</h2>
@@ -179,9 +179,9 @@ const Charts = ({ data }) => {
 
                 {/* Line Chart */}
                 <div className="chart-card full-width">
-                    <h3>Parameter Trends (First 20 Equipment)</h3>
+                    <h3>Parameter Trends (All {total.toLocaleString()} Equipment)</h3>
                     <div className="chart-wrapper">
-                        <Line data={lineData} options={chartOptions} />
+                        <Line data={lineData} options={lineOptions} />
                     </div>
                 </div>
             </div>
@@ -6,6 +6,7 @@ const FileUpload = ({ onUploadSuccess }) => {
     const [isDragging, setIsDragging] = useState(false);
     const [uploading, setUploading] = useState(false);
     const [error, setError] = useState(null);
+    const [job, setJob] = useState(null);
 
     // Handle file selection
     const handleFileChange = (e) => {
@@ -17,16 +18,12 @@ const FileUpload = ({ onUploadSuccess }) => {
     const validateAndSetFile = (selectedFile) => {
         if (!selectedFile) return;
         
-        if (!selectedFile.name.endsWith('.csv')) {
+        const name = selectedFile.name.toLowerCase();
+        if (!['.csv', '.csv.gz', '.csv.zst'].some((suffix) => name.endsWith(suffix))) {
             setError('Please upload a CSV file');
             return;
         }
         
-        if (selectedFile.size > 5 * 1024 * 1024) { // 5MB limit
-            setError('File size must be less than 5MB');
-            return;
-        }
-        
         setFile(selectedFile);
         setError(null);
     };
@@ -56,14 +53,16 @@ const FileUpload = ({ onUploadSuccess }) => {
         
         setUploading(true);
         setError(null);
+        setJob(null);
         
         try {
-            await onUploadSuccess(file);
+            await onUploadSuccess(file, setJob);
             setFile(null); // Reset after success
         } catch (err) {
             setError(err.response?.data?.error || 'Upload failed. Please try again.');
         } finally {
             setUploading(false);
+            setJob(null);
         }
     };
 
@@ -88,7 +87,7 @@ const FileUpload = ({ onUploadSuccess }) => {
                         <label className="file-label">
                             <input
                                 type="file"
-                                accept=".csv"
+                                accept=".csv,.gz,.zst"
                                 onChange={handleFileChange}
                                 style={{ display: 'none' }}
                             />
@@ -102,6 +101,12 @@ const FileUpload = ({ onUploadSuccess }) => {
                         <p className="upload-subtext">
                             {(file.size / 1024).toFixed(2)} KB
                         </p>
+                        {job && (
+                            <p className="upload-subtext">
+                                {job.rows_processed.toLocaleString()} rows processed
+                                ({Math.round(job.rows_per_second).toLocaleString()} rows/sec)
+                            </p>
+                        )}
                         <div className="upload-actions">
                             <button
                                 className="btn btn-primary"
@@ -135,8 +140,8 @@ const FileUpload = ({ onUploadSuccess }) => {
                 <h4>CSV Format Requirements:</h4>
                 <ul>
                     <li>Columns: Equipment Name, Type, Flowrate, Pressure, Temperature</li>
-                    <li>File size: Maximum 5MB</li>
-                    <li>Format: .csv only</li>
+                    <li>File size: no limit; files over 16MB are sent in resumable chunks</li>
+                    <li>Format: .csv, or compressed .csv.gz / .csv.zst</li>
                 </ul>
             </div>
         </div>
@@ -11,12 +11,43 @@ const apiClient = axios.create({
     },
 });
 
+/**
+ * Expand a ?layout=columnar payload back into an array of record objects
+ * @param {Object} data - Dataset payload with equipment_columns
+ * @returns {Object} Dataset payload with equipment_records
+ */
+export const decodeColumnar = (data) => {
+    if (!data || !data.equipment_columns) return data;
+    const { equipment_columns: columns, ...rest } = data;
+    const fields = Object.keys(columns);
+    const length = fields.length ? columns[fields[0]].length : 0;
+    const records = new Array(length);
+    for (let i = 0; i < length; i++) {
+        const record = {};
+        for (const field of fields) record[field] = columns[field][i];
+        records[i] = record;
+    }
+    return { ...rest, equipment_records: records };
+};
+
+// Files larger than this are sent with the resumable chunked upload API
+export const CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024;
+const CHUNK_SIZE = 8 * 1024 * 1024;
+
+// Open chunked upload sessions by file, so a failed upload resumes on retry
+const uploadSessions = new Map();
+const uploadKey = (file) => `${file.name}:${file.size}:${file.lastModified}`;
+
 /**
  * Upload CSV file to backend
  * @param {File} file - The CSV file to upload
- * @returns {Promise} Response with dataset info
+ * @returns {Promise} Queued upload job (poll it with waitForJob)
  */
 export const uploadFile = async (file) => {
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+        return uploadFileChunked(file);
+    }
+    
     const formData = new FormData();
     formData.append('file', file);
     
@@ -29,13 +60,126 @@ export const uploadFile = async (file) => {
     return response.data;
 };
 
+/**
+ * Get a chunked upload session, including the offset to resume from
+ * @param {string} id - Upload session ID
+ * @returns {Promise} Session with offset and status
+ */
+export const getUploadSession = async (id) => {
+    const response = await apiClient.get(`/uploads/${id}/`);
+    return response.data;
+};
+
+/**
+ * Upload a large CSV file in chunks, resuming after dropped connections
+ * @param {File} file - The CSV file to upload
+ * @param {Object} options - chunkSize, maxRetries and onProgress(sentBytes, totalBytes)
+ * @returns {Promise} Queued upload job (poll it with waitForJob)
+ */
+export const uploadFileChunked = async (file, { chunkSize = CHUNK_SIZE, maxRetries = 5, onProgress } = {}) => {
+    const key = uploadKey(file);
+    let sessionId = uploadSessions.get(key);
+    let offset = 0;
+    
+    if (sessionId) {
+        try {
+            const session = await getUploadSession(sessionId);
+            if (session.status === 'open') {
+                offset = session.offset;
+            } else {
+                sessionId = null;
+            }
+        } catch (error) {
+            sessionId = null;
+        }
+    }
+    if (!sessionId) {
+        const response = await apiClient.post('/uploads/', { filename: file.name, size: file.size });
+        sessionId = response.data.id;
+        uploadSessions.set(key, sessionId);
+    }
+    
+    let retries = 0;
+    while (offset < file.size) {
+        const chunk = file.slice(offset, offset + chunkSize);
+        try {
+            const response = await apiClient.put(`/uploads/${sessionId}/chunk/`, chunk, {
+                params: { offset },
+                headers: { 'Content-Type': 'application/octet-stream' },
+            });
+            offset = response.data.offset;
+            retries = 0;
+            if (onProgress) onProgress(offset, file.size);
+        } catch (error) {
+            if (error.response && error.response.status === 409) {
+                // The server acknowledged a different offset; continue from there
+                offset = error.response.data.offset;
+                continue;
+            }
+            // Only network failures are retried; HTTP errors are final
+            if (error.response || retries >= maxRetries) throw error;
+            retries += 1;
+            await new Promise((resolve) => setTimeout(resolve, Math.min(2 ** retries, 30) * 1000));
+            offset = (await getUploadSession(sessionId)).offset;
+        }
+    }
+    
+    const response = await apiClient.post(`/uploads/${sessionId}/complete/`);
+    uploadSessions.delete(key);
+    return response.data;
+};
+
+/**
+ * Get status and progress of an upload job
+ * @param {string} id - Upload job ID
+ * @returns {Promise} Job with status, rows_processed and rows_per_second
+ */
+export const getJob = async (id) => {
+    const response = await apiClient.get(`/jobs/${id}/`);
+    return response.data;
+};
+
+// Milliseconds waitForJob polls before giving up on an upload job
+export const JOB_TIMEOUT = 30 * 60 * 1000;
+
+/**
+ * Poll an upload job until it finishes
+ * @param {string} id - Upload job ID
+ * @param {Function} onProgress - Called with the job after every poll
+ * @param {number} interval - Milliseconds between polls
+ * @param {number} timeout - Milliseconds to wait before rejecting with a timeout error
+ * @returns {Promise} Finished job (rejects if the job failed or did not finish in time)
+ */
+export const waitForJob = async (id, onProgress, interval = 500, timeout = JOB_TIMEOUT) => {
+    const deadline = Date.now() + timeout;
+    while (true) {
+        const job = await getJob(id);
+        if (onProgress) onProgress(job);
+        if (job.status === 'succeeded') return job;
+        if (job.status === 'failed') {
+            const error = new Error(job.error || 'Upload failed');
+            error.response = { data: { error: job.error } };
+            throw error;
+        }
+        if (Date.now() + interval > deadline) {
+            const message = `Upload job did not finish in time (still ${job.status}, `
+                + `${(job.rows_processed || 0).toLocaleString()} rows processed)`;
+            const error = new Error(message);
+            error.code = 'ETIMEDOUT';
+            error.response = { data: { error: message } };
+            throw error;
+        }
+        await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+};
+
 /**
  * Get summary of most recent dataset
  * @returns {Promise} Dataset summary with statistics
  */
 export const getSummary = async () => {
-    const response = await apiClient.get('/summary/');
-    return response.data;
+    const response = await apiClient.get('/summary/', { params: { layout: 'columnar' } });
+    return decodeColumnar(response.data);
 };
 
 /**
@@ -53,18 +197,76 @@ export const getHistory = async () => {
  * @returns {Promise} Full dataset with equipment records
  */
 export const getDataset = async (id) => {
-    const response = await apiClient.get(`/dataset/${id}/`);
+    const response = await apiClient.get(`/dataset/${id}/`, { params: { layout: 'columnar' } });
+    return decodeColumnar(response.data);
+};
+
+/**
+ * Get per-type count/mean/min/max of every parameter for a dataset
+ * @param {number} id - Dataset ID
+ * @returns {Promise} { dataset_id, parameters, overall, types: [{ equipment_type, count, flowrate: {...}, ... }] }
+ */
+export const getAggregates = async (id) => {
+    const response = await apiClient.get(`/dataset/${id}/aggregates/`);
     return response.data;
 };
 
 /**
- * Download PDF report for a dataset
+ * Get one parameter over the whole dataset, downsampled for a trend chart
  * @param {number} id - Dataset ID
+ * @param {string} param - flowrate, pressure or temperature
+ * @param {Object} options - points (target sample count) and method ('lttb' or 'minmax')
+ * @returns {Promise} { dataset_id, param, method, total, points, x, ids, y }
  */
-export const downloadReport = async (id) => {
-    const response = await apiClient.get(`/report/${id}/`, {
-        responseType: 'blob', // Important for file download
+export const getSeries = async (id, param, { points = 1000, method = 'lttb' } = {}) => {
+    const response = await apiClient.get(`/dataset/${id}/series/`, {
+        params: { param, points, method },
     });
+    return response.data;
+};
+
+/**
+ * Get one page of equipment records for a dataset
+ * @param {number} id - Dataset ID
+ * @param {Object} options - cursor, limit, fields (array) and equipmentType
+ * @returns {Promise} { results, next_cursor, next }
+ */
+export const getRecords = async (id, { cursor, limit = 500, fields, equipmentType } = {}) => {
+    const params = { limit };
+    if (cursor != null) params.cursor = cursor;
+    if (fields) params.fields = fields.join(',');
+    if (equipmentType) params.equipment_type = equipmentType;
+    const response = await apiClient.get(`/dataset/${id}/records/`, { params });
+    return response.data;
+};
+
+// Milliseconds downloadReport waits for a report the server is still rendering
+export const REPORT_TIMEOUT = 5 * 60 * 1000;
+
+/**
+ * Download PDF report for a dataset
+ * 
+ * A report that is not cached yet is rendered in the background and answered
+ * with 202 and Retry-After; the request is repeated until the PDF is ready.
+ * @param {number} id - Dataset ID
+ * @param {number} timeout - Milliseconds to wait before rejecting with a timeout error
+ */
+export const downloadReport = async (id, timeout = REPORT_TIMEOUT) => {
+    const deadline = Date.now() + timeout;
+    let response;
+    while (true) {
+        response = await apiClient.get(`/report/${id}/`, {
+            responseType: 'blob', // Important for file download
+        });
+        if (response.status !== 202) break;
+        const delay = Number(response.headers['retry-after'] || 1) * 1000;
+        if (Date.now() + delay > deadline) {
+            const error = new Error('The report was not rendered in time');
+            error.code = 'ETIMEDOUT';
+            throw error;
+        }
+        await new Promise((resolve) => setTimeout(resolve, delay));
+    }
     
     // Create download link
     const url = window.URL.createObjectURL(new Blob([response.data]));
@@ -78,9 +280,16 @@ export const downloadReport = async (id) => {
 
 const api = {
     uploadFile,
+    uploadFileChunked,
+    getUploadSession,
+    getJob,
+    waitForJob,
     getSummary,
     getHistory,
     getDataset,
+    getAggregates,
+    getSeries,
+    getRecords,
     downloadReport,
 };
 